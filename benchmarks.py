@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Benchmarks
+Timing scripts for the headless tools. Run all of them or pick by name:
+
+    python benchmarks.py
+    python benchmarks.py fleet parallel trace actions codegen_c codegen_py export_html export_batch
+"""
+
+import random
+import sys
+import time
+
+# Benchmark name -> function, filled in by the @benchmark decorator
+BENCHMARKS = {}
+
+
+def benchmark(function):
+    """Register a benchmark under its function name (without the bench_ prefix)."""
+    BENCHMARKS[function.__name__[len('bench_'):]] = function
+    return function
+
+
+def make_design(states=200, events=30, transitions=600, processes=1, seed=1):
+    """Generate a synthetic design dict: per Process one StateMachine with nested States."""
+    rng = random.Random(seed)
+    nodes = []
+    edges = []
+    next_id = 1
+    for process_number in range(processes):
+        process_id = next_id
+        statemachine_id = next_id + 1
+        next_id += 2
+        nodes.append({'id': process_id, 'parent_id': None, 'node_type': 'Process',
+                      'title': f'Process{process_number + 1}Pr', 'is_initial': False})
+        nodes.append({'id': statemachine_id, 'parent_id': process_id, 'node_type': 'StateMachine',
+                      'title': f'Statemachine{process_number + 1}Sm', 'is_initial': False})
+        state_ids = []
+        for number in range(states):
+            # A tenth of the States are top level, the rest nest under earlier States
+            parent_id = statemachine_id if number < max(1, states // 10) else rng.choice(state_ids)
+            nodes.append({'id': next_id, 'parent_id': parent_id, 'node_type': 'State',
+                          'title': f'State{next_id}St', 'is_initial': False})
+            state_ids.append(next_id)
+            next_id += 1
+        for _ in range(transitions):
+            edges.append({'start_node_id': rng.choice(state_ids), 'end_node_id': rng.choice(state_ids),
+                          'title': f'EV_{rng.randrange(events)}'})
+    return {'product': 'modeller', 'version': 'v1.1.0', 'nodes': nodes, 'edges': edges}
+
+
+def add_geometry(design_data):
+    """Give a make_design() design editor geometry (positions, sizes, edge offsets) so it can be drawn."""
+    children = {}
+    for node in design_data['nodes']:
+        children.setdefault(node['parent_id'], []).append(node)
+
+    def size(node):
+        # Children in a grid of up to 4 columns of 200x120 cells
+        kids = children.get(node['id'], [])
+        if not kids:
+            node['rect'] = {'x': 0, 'y': 0, 'width': 160, 'height': 80}
+            node['is_container'] = False
+            return
+        cell_width = cell_height = 0
+        for kid in kids:
+            size(kid)
+            cell_width = max(cell_width, kid['rect']['width'] + 40)
+            cell_height = max(cell_height, kid['rect']['height'] + 40)
+        for i, kid in enumerate(kids):
+            kid['pos'] = {'x': 20 + (i % 4) * cell_width, 'y': 20 + (i // 4) * cell_height}
+        node['rect'] = {'x': 0, 'y': 0, 'width': 20 + min(len(kids), 4) * cell_width,
+                        'height': 20 + (len(kids) + 3) // 4 * cell_height}
+        node['is_container'] = True
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10_000))
+    x = 0
+    for root in children.get(None, []):
+        size(root)
+        root['pos'] = {'x': x, 'y': 0}
+        x += root['rect']['width'] + 100
+    nodes = {node['id']: node for node in design_data['nodes']}
+    for i, edge in enumerate(design_data['edges']):
+        start = nodes[edge['start_node_id']]['rect']
+        end = nodes[edge['end_node_id']]['rect']
+        edge['start_offset'] = {'x': start['width'], 'y': start['height'] / 2}
+        edge['end_offset'] = {'x': end['width'] / 2, 'y': -3.5 if i % 2 else end['height']}
+        edge['waypoint_ratio'] = (i % 5) / 4
+    return design_data
+
+
+def timed(function, repeat=5):
+    """Best wall-clock time of function() over repeat runs, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+@benchmark
+def bench_fleet():
+    """Vectorized fleet stepping vs looping the scalar Simulator per instance."""
+    import numpy as np
+    from sm_fleet import Fleet
+    from sm_model import DesignModel
+    from sm_simulator import Simulator
+
+    model = DesignModel(make_design())
+    events = [f'EV_{i}' for i in range(30)]
+
+    # Scalar engine: one Simulator per instance, one event each
+    scalar_count = 10_000
+    simulators = [Simulator(model) for _ in range(scalar_count)]
+    for simulator in simulators:
+        simulator.start()
+
+    def scalar_step():
+        for number, simulator in enumerate(simulators):
+            simulator.dispatch(events[number % len(events)])
+
+    scalar_seconds = timed(scalar_step, repeat=3)
+    scalar_rate = scalar_count / scalar_seconds
+    print(f"scalar Simulator:   {scalar_count:>9,} instances x 1 event  {scalar_seconds * 1000:9.2f} ms"
+          f"  ({scalar_rate:,.0f} instance-events/s)")
+
+    # Same event for every instance
+    count = 1_000_000
+    fleet = Fleet(model, count)
+    event_id = fleet.event_ids[events[0]]
+    seconds = timed(lambda: fleet.step(event_id))
+    print(f"Fleet.step:         {count:>9,} instances x 1 event  {seconds * 1000:9.2f} ms"
+          f"  ({count / seconds:,.0f} instance-events/s, {count / seconds / scalar_rate:,.0f}x scalar)")
+
+    # Random (instance, event) pairs, duplicates included
+    rng = np.random.default_rng(1)
+    instances = rng.integers(0, count, size=count)
+    event_ids = fleet.encode_events(events)[rng.integers(0, len(events), size=count)]
+    seconds = timed(lambda: fleet.dispatch(instances, event_ids))
+    print(f"Fleet.dispatch:     {count:>9,} random pairs         {seconds * 1000:9.2f} ms"
+          f"  ({count / seconds:,.0f} instance-events/s)")
+
+    # Cross-check a sample against the scalar engine
+    fleet = Fleet(model, 100)
+    check = [Simulator(model) for _ in range(100)]
+    for simulator in check:
+        simulator.start()
+    for step in range(50):
+        step_events = [events[(number * 7 + step) % len(events)] for number in range(100)]
+        fleet.dispatch(np.arange(100), step_events)
+        for simulator, event in zip(check, step_events):
+            simulator.dispatch(event)
+    mismatches = sum(1 for simulator, state in zip(check, fleet.active_states())
+                     if simulator.active_leaf(fleet.statemachine) is not state)
+    print(f"cross-check vs scalar: {mismatches} mismatches in 100 instances x 50 events")
+
+
+@benchmark
+def bench_parallel():
+    """Independent Processes on worker processes vs one Simulator."""
+    import os
+    from sm_model import DesignModel
+    from sm_parallel import ParallelSimulator
+    from sm_simulator import Simulator
+
+    design_data = make_design(states=200, events=30, transitions=600, processes=16)
+    rng = random.Random(2)
+    events = [f'EV_{rng.randrange(30)}' for _ in range(200_000)]
+
+    simulator = Simulator(DesignModel(design_data))
+    simulator.start()
+    stats = simulator.dispatch_many(events)
+    print(f"Simulator:              {stats.seconds * 1000:9.1f} ms  ({stats.events_per_second:,.0f} events/s)")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        with ParallelSimulator(design_data, workers=workers, record_trace=False) as parallel:
+            stats = parallel.dispatch_many(events)
+        print(f"ParallelSimulator x{workers:<3}  {stats.seconds * 1000:9.1f} ms  ({stats.events_per_second:,.0f} events/s)")
+        workers *= 2
+
+
+@benchmark
+def bench_trace():
+    """Trace recording overhead, file size and seek latency."""
+    import os
+    import tempfile
+    from sm_model import DesignModel
+    from sm_simulator import Simulator
+    from sm_trace import Trace, TraceRecorder
+
+    model = DesignModel(make_design(processes=3))
+    rng = random.Random(3)
+    events = [f'EV_{rng.randrange(30)}' for _ in range(300_000)]
+
+    simulator = Simulator(model)
+    simulator.start()
+    plain = simulator.dispatch_many(events)
+
+    simulator = Simulator(model)
+    recorder = TraceRecorder(simulator)
+    simulator.start()
+    recorded = simulator.dispatch_many(events)
+    trace = recorder.trace
+    print(f"dispatch:          {plain.seconds * 1000:9.1f} ms")
+    print(f"dispatch + record: {recorded.seconds * 1000:9.1f} ms  ({len(trace):,} steps)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'bench.smtrace')
+        trace.save(file_path)
+        size = os.path.getsize(file_path)
+        seconds = timed(lambda: Trace.load(file_path), repeat=3)
+    print(f"file:              {size / len(trace):9.1f} bytes/step, loaded in {seconds * 1000:.1f} ms")
+
+    positions = [rng.randrange(len(trace) + 1) for _ in range(1000)]
+    seconds = timed(lambda: [trace.configuration(step) for step in positions], repeat=3)
+    print(f"seek:              {seconds:9.3f} ms per configuration (checkpoint every "
+          f"{trace.checkpoint_interval} steps)")
+
+    from sm_json_to_html import encode_trace
+    started = time.perf_counter()
+    encoded = encode_trace(trace)
+    seconds = time.perf_counter() - started
+    print(f"HTML page:         {len(encoded) * 4 / 3 / len(trace):9.1f} bytes/step embedded "
+          f"(delta varints, zlib, base64), encoded in {seconds * 1000:.1f} ms")
+
+
+@benchmark
+def bench_actions():
+    """Entry/Exit actions: cached code objects vs compiling the text on every run."""
+    from sm_actions import ActionRunner
+    from sm_model import DesignModel
+    from sm_simulator import Simulator
+
+    design_data = make_design(states=200, events=30, transitions=600)
+    text = "visits = globals().get('visits', 0) + 1\nif visits % 1000 == 0:\n    last = state\n"
+    next_id = max(node['id'] for node in design_data['nodes']) + 1
+    for node in list(design_data['nodes']):
+        if node['node_type'] == 'State':
+            for node_type in ('Entry', 'Exit'):
+                design_data['nodes'].append({'id': next_id, 'parent_id': node['id'], 'node_type': node_type,
+                                             'title': node_type, 'user_text': text})
+                next_id += 1
+    model = DesignModel(design_data)
+    rng = random.Random(4)
+    events = [f'EV_{rng.randrange(30)}' for _ in range(100_000)]
+
+    simulator = Simulator(model)
+    simulator.start()
+    plain = simulator.dispatch_many(events)
+    print(f"no actions:            {plain.seconds * 1000:9.1f} ms")
+
+    simulator = Simulator(model)
+    runner = ActionRunner(simulator)
+    simulator.start()
+    cached = simulator.dispatch_many(events)
+    print(f"cached code objects:   {cached.seconds * 1000:9.1f} ms  ({runner.context['visits']:,} actions)")
+
+    class Recompiling(ActionRunner):
+        def _execute(self, state, actions):
+            self.context['state'] = state.title
+            for node, _code in actions:
+                exec(compile(node.user_text, "<action>", "exec"), self.context)
+
+    simulator = Simulator(model)
+    runner = Recompiling(simulator)
+    simulator.start()
+    recompiled = simulator.dispatch_many(events)
+    print(f"compile on every run:  {recompiled.seconds * 1000:9.1f} ms  ({runner.context['visits']:,} actions)")
+
+
+@benchmark
+def bench_codegen_c():
+    """Generated C dispatch (built with the system C compiler) vs the Python simulator, in events/second."""
+    import os
+    import shutil
+    import subprocess
+    import tempfile
+    from sm_codegen_c import generate_c
+    from sm_compiler import StateMachineTables, compile_design
+    from sm_model import DesignModel
+    from sm_simulator import Simulator
+
+    compiler = os.environ.get('CC') or shutil.which('cc') or shutil.which('gcc') or shutil.which('clang')
+    if compiler is None:
+        print("no C compiler found (set CC); skipped")
+        return
+
+    model = DesignModel(make_design(states=200, events=30, transitions=600))
+    statemachine = model.statemachines()[0]
+    tables = StateMachineTables(compile_design(model), statemachine)
+    rng = random.Random(5)
+    events = [rng.randrange(len(tables.events)) for _ in range(100_000)]
+
+    simulator = Simulator(model)
+    simulator.start()
+    python = simulator.dispatch_many([tables.events[event] for event in events])
+    print(f"Python simulator:  {len(events) / python.seconds:14,.0f} events/s")
+
+    files = generate_c(tables)
+    prefix = os.path.splitext(next(iter(files)))[0]
+    repeat = 200
+    harness = f"""#define _POSIX_C_SOURCE 199309L
+#include <stdio.h>
+#include <time.h>
+#include "{prefix}.h"
+
+static const unsigned short events[] = {{{', '.join(map(str, events))}}};
+
+int main(void)
+{{
+    {prefix}_t sm;
+    struct timespec started, stopped;
+    unsigned long fired = 0;
+    unsigned i, round;
+    {prefix}_start(&sm, NULL);
+    clock_gettime(CLOCK_MONOTONIC, &started);
+    for (round = 0; round < {repeat}; ++round) {{
+        for (i = 0; i < sizeof events / sizeof events[0]; ++i) {{
+            fired += {prefix}_dispatch(&sm, ({prefix}_event_t)events[i]);
+        }}
+    }}
+    clock_gettime(CLOCK_MONOTONIC, &stopped);
+    printf("%f %lu\\n", (stopped.tv_sec - started.tv_sec) + (stopped.tv_nsec - started.tv_nsec) / 1e9, fired);
+    return 0;
+}}
+"""
+    with tempfile.TemporaryDirectory() as build_dir:
+        for name, text in list(files.items()) + [("main.c", harness)]:
+            with open(os.path.join(build_dir, name), 'w') as f:
+                f.write(text)
+        executable = os.path.join(build_dir, "bench")
+        subprocess.run([compiler, "-std=c99", "-O2", "-o", executable,
+                        os.path.join(build_dir, f"{prefix}.c"), os.path.join(build_dir, "main.c")],
+                       check=True)
+        seconds, fired = subprocess.run([executable], check=True, capture_output=True,
+                                        text=True).stdout.split()
+    rate = len(events) * repeat / float(seconds)
+    print(f"generated C:       {rate:14,.0f} events/s  ({int(fired) // repeat:,} transitions per pass, "
+          f"{rate * python.seconds / len(events):,.0f}x)")
+
+
+@benchmark
+def bench_codegen_py():
+    """Generated Python module vs the interpreter-style simulator, in events/second."""
+    import types
+    from sm_codegen_py import generate_py
+    from sm_compiler import StateMachineTables, compile_design
+    from sm_model import DesignModel
+    from sm_simulator import Simulator
+
+    model = DesignModel(make_design(states=200, events=30, transitions=600))
+    statemachine = model.statemachines()[0]
+    tables = StateMachineTables(compile_design(model), statemachine)
+    rng = random.Random(6)
+    events = [rng.choice(tables.events) for _ in range(200_000)]
+
+    simulator = Simulator(model)
+    simulator.start()
+    dispatch = simulator.dispatch
+    started = time.perf_counter()
+    for event in events:
+        dispatch(event)
+    simulator_seconds = time.perf_counter() - started
+    print(f"Simulator.dispatch:   {len(events) / simulator_seconds:12,.0f} events/s")
+    batch = simulator.dispatch_many(events)
+    print(f"Simulator batch:      {batch.events_per_second:12,.0f} events/s")
+
+    (file_name, source), = generate_py(tables).items()
+    module = types.ModuleType(file_name[:-3])
+    exec(compile(source, file_name, 'exec'), module.__dict__)
+    instance = getattr(module, next(name for name, value in vars(module).items()
+                                    if isinstance(value, type) and value.__module__ == module.__name__))()
+    instance.start()
+    dispatch = instance.dispatch
+    started = time.perf_counter()
+    for event in events:
+        dispatch(event)
+    generated_seconds = time.perf_counter() - started
+    print(f"generated module:     {len(events) / generated_seconds:12,.0f} events/s  "
+          f"({simulator_seconds / generated_seconds:.1f}x per-event dispatch)")
+
+
+@benchmark
+def bench_export_html():
+    """HTML export time on synthetic designs: memoized hierarchy and positions vs rebuilding them per use,
+    and the time and size of the canvas target."""
+    import contextlib
+    import io
+    import json
+    import os
+    import tempfile
+    import tracemalloc
+    from sm_json_to_html import StatechartGenerator
+
+    class Unmemoized(StatechartGenerator):
+        def get_node_hierarchy(self):
+            return self._build_hierarchy()
+
+        def calculate_absolute_position(self, node):
+            return self._walk_position(node)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        output_file = os.path.join(work_dir, "design.html")
+        for states in (1_000, 5_000, 20_000, 50_000):
+            design_file = os.path.join(work_dir, f"design_{states}.json")
+            with open(design_file, 'w') as f:
+                json.dump(add_geometry(make_design(states=states, events=50, transitions=states)), f)
+            row = f"{states + 2:7,} nodes:"
+            generators = [("memoized", StatechartGenerator)]
+            if states <= 5_000:
+                generators.append(("unmemoized", Unmemoized))
+            for label, generator_class in generators:
+                generator = generator_class(design_file)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    seconds = timed(lambda: generator.generate_html(output_file), repeat=1)
+                row += f"  {label} {seconds * 1000:9.1f} ms"
+            # The page is streamed to the file, so peak memory stays below its size
+            generator = StatechartGenerator(design_file)
+            tracemalloc.start()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generator.generate_html(output_file)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            row += (f"  peak {peak / 2 ** 20:6.1f} MB writing "
+                    f"{os.path.getsize(output_file) / 2 ** 20:6.1f} MB")
+            generator = StatechartGenerator(design_file)
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds = timed(lambda: generator.generate_html(output_file, "canvas"), repeat=1)
+            row += f"  canvas {seconds * 1000:7.1f} ms {os.path.getsize(output_file) / 2 ** 20:5.1f} MB"
+            print(row)
+
+
+@benchmark
+def bench_export_batch():
+    """Batch HTML export of 100 synthetic designs across worker processes, and output size with shared assets."""
+    import json
+    import os
+    import tempfile
+    from sm_json_to_html import export_batch
+
+    def total_size(directory):
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(directory) for name in names)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        design_dir = os.path.join(work_dir, "designs")
+        os.makedirs(design_dir)
+        for number in range(100):
+            with open(os.path.join(design_dir, f"design_{number:03}.json"), 'w') as f:
+                json.dump(add_geometry(make_design(states=300, events=30, transitions=450, seed=number)), f)
+        for target in ("svg", "canvas"):
+            jobs = 1
+            while jobs <= (os.cpu_count() or 1):
+                output_dir = os.path.join(work_dir, f"{target}_{jobs}")
+                seconds = timed(lambda: export_batch([design_dir], output_dir, target, jobs), repeat=1)
+                print(f"{target:6} x{jobs:<3}  {seconds * 1000:9.1f} ms  {total_size(output_dir) / 2 ** 20:6.1f} MB")
+                jobs *= 2
+
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    names = argv[1:] or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark(s): {', '.join(unknown)}")
+        print(f"Available: {', '.join(BENCHMARKS)}")
+        sys.exit(1)
+    for name in names:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from PyQt5.QtCore import QLineF, Qt, QPointF, QRectF
 from PyQt5.QtGui import QPen, QPainterPath, QColor, QBrush, QPainterPathStroker
 from PyQt5.QtWidgets import QGraphicsPathItem, QGraphicsItem, QGraphicsEllipseItem, QGraphicsTextItem
+from sm_coverage import heat_rgb
 
 
 class EdgeControlPoint(QGraphicsEllipseItem):
@@ -341,6 +342,132 @@ class WaypointControlPoint(QGraphicsEllipseItem):
         return super().itemChange(change, value)
 
 
+class SceneEdgeIndex:
+    """Ordered collection of a scene's edges with adjacency and title indexes.
+    
+    Replaces the plain ``scene.edges`` list: it still supports append/remove,
+    membership tests and ordered iteration, but finding the edges that leave or
+    enter a node, or that share a title, costs time proportional to the result
+    rather than to the total number of edges. Registered edges keep the indexes
+    current from set_start_node(), set_end_node(), set_title() and delete_edge().
+    """
+    
+    def __init__(self, edges=()):
+        self._edges = {}  # edge -> insertion sequence number (dict keeps order)
+        self._next_seq = 0
+        self._outgoing = {}  # id(node) -> {edge: None}
+        self._incoming = {}  # id(node) -> {edge: None}
+        self._by_title = {}  # title -> {edge: None}
+        self._titles = {}  # edge -> title it is indexed under
+        for edge in edges:
+            self.append(edge)
+    
+    def append(self, edge):
+        """Register an edge (no-op if it is already registered)"""
+        if edge in self._edges:
+            return
+        self._edges[edge] = self._next_seq
+        self._next_seq += 1
+        edge._edge_index = self
+        self._link(self._outgoing, edge._start_node, edge)
+        self._link(self._incoming, edge._end_node, edge)
+        title = edge.title_item.toPlainText() if edge.title_item else ""
+        self._titles[edge] = title
+        self._by_title.setdefault(title, {})[edge] = None
+    
+    def remove(self, edge):
+        """Unregister an edge, like list.remove()"""
+        if edge not in self._edges:
+            raise ValueError("edge is not registered in this index")
+        del self._edges[edge]
+        if edge._edge_index is self:
+            edge._edge_index = None
+        self._unlink(self._outgoing, edge._start_node, edge)
+        self._unlink(self._incoming, edge._end_node, edge)
+        title = self._titles.pop(edge, "")
+        bucket = self._by_title.get(title)
+        if bucket is not None:
+            bucket.pop(edge, None)
+            if not bucket:
+                del self._by_title[title]
+    
+    def clear(self):
+        for edge in self._edges:
+            if edge._edge_index is self:
+                edge._edge_index = None
+        self._edges.clear()
+        self._outgoing.clear()
+        self._incoming.clear()
+        self._by_title.clear()
+        self._titles.clear()
+    
+    def __contains__(self, edge):
+        return edge in self._edges
+    
+    def __iter__(self):
+        # Iterate over a snapshot so callers may delete edges while looping
+        return iter(list(self._edges))
+    
+    def __len__(self):
+        return len(self._edges)
+    
+    def __getitem__(self, index):
+        return list(self._edges)[index]
+    
+    def outgoing(self, node):
+        """Edges starting at the given node"""
+        return list(self._outgoing.get(id(node), ()))
+    
+    def incoming(self, node):
+        """Edges ending at the given node"""
+        return list(self._incoming.get(id(node), ()))
+    
+    def edges_of(self, node):
+        """Edges starting or ending at the given node (each edge once)"""
+        edges = dict.fromkeys(self._outgoing.get(id(node), ()))
+        edges.update(dict.fromkeys(self._incoming.get(id(node), ())))
+        return list(edges)
+    
+    def with_title(self, title):
+        """Edges carrying the given title, in the order they were added"""
+        bucket = self._by_title.get(title, ())
+        return sorted(bucket, key=self._edges.__getitem__)
+    
+    def _endpoint_changed(self, edge, is_start, old_node, new_node):
+        """Move an edge between adjacency buckets when an endpoint changes"""
+        adjacency = self._outgoing if is_start else self._incoming
+        self._unlink(adjacency, old_node, edge)
+        self._link(adjacency, new_node, edge)
+    
+    def _title_changed(self, edge, title):
+        """Move an edge between title buckets when its title changes"""
+        old_title = self._titles.get(edge)
+        if old_title == title:
+            return
+        bucket = self._by_title.get(old_title)
+        if bucket is not None:
+            bucket.pop(edge, None)
+            if not bucket:
+                del self._by_title[old_title]
+        self._titles[edge] = title
+        self._by_title.setdefault(title, {})[edge] = None
+    
+    @staticmethod
+    def _link(adjacency, node, edge):
+        if node is not None:
+            adjacency.setdefault(id(node), {})[edge] = None
+    
+    @staticmethod
+    def _unlink(adjacency, node, edge):
+        if node is None:
+            return
+        bucket = adjacency.get(id(node))
+        if bucket is not None:
+            bucket.pop(edge, None)
+            if not bucket:
+                del adjacency[id(node)]
+
+
 class Edge(QGraphicsPathItem):
     """An edge with orthogonal (90-degree) routing between nodes"""
     _title_seq = 1  # class-level counter for default titles
@@ -352,6 +479,9 @@ class Edge(QGraphicsPathItem):
         self._start_node = None
         self._end_node = None
         
+        # Scene edge index this edge is registered in (set by SceneEdgeIndex.append)
+        self._edge_index = None
+        
         # Control points for dragging
         self.start_control = None
         self.end_control = None
@@ -371,6 +501,8 @@ class Edge(QGraphicsPathItem):
         self.selected_pen = QPen(self.selected_color, 3, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin)
         # Set initial pen
         self.setPen(self.normal_pen)
+        self.coverage_pen = None  # Heat-map pen while the coverage overlay is shown
+        self.conflict_pen = None  # Dashed warning pen while the edge is in an event conflict
         # Arrow styling
         self.arrow_size = 10.0
         self._arrow_end = None
@@ -407,10 +539,14 @@ class Edge(QGraphicsPathItem):
             if self in self._start_node.connected_edges:
                 self._start_node.connected_edges.remove(self)
         
+        old_node = self._start_node
         self._start_node = node
         if node is not None and hasattr(node, 'connected_edges'):
             if self not in node.connected_edges:
                 node.connected_edges.append(self)
+        if self._edge_index is not None:
+            self._edge_index._endpoint_changed(self, True, old_node, node)
+        self._notify_search_index()
         self.update_path()
     
     def set_end_node(self, node):
@@ -419,10 +555,13 @@ class Edge(QGraphicsPathItem):
             if self in self._end_node.connected_edges:
                 self._end_node.connected_edges.remove(self)
         
+        old_node = self._end_node
         self._end_node = node
         if node is not None and hasattr(node, 'connected_edges'):
             if self not in node.connected_edges:
                 node.connected_edges.append(self)
+        if self._edge_index is not None:
+            self._edge_index._endpoint_changed(self, False, old_node, node)
         self.update_path()
     
     def create_control_points(self, scene):
@@ -595,6 +734,22 @@ class Edge(QGraphicsPathItem):
         if self.title_item:
             self.title_item.setPlainText(text)
             self.update_title_position()
+            if self._edge_index is not None:
+                self._edge_index._title_changed(self, text)
+            self._notify_search_index()
+
+    def _notify_search_index(self):
+        """Refresh this edge's entry in the window's search index"""
+        scene = self.scene()
+        if scene and scene.views():
+            window = scene.views()[0].window()
+            if hasattr(window, 'update_search_entry'):
+                window.update_search_entry(self)
+
+    def itemChange(self, change, value):
+        if change == QGraphicsItem.ItemSceneHasChanged and value:
+            self._notify_search_index()
+        return super().itemChange(change, value)
 
     def snap_endpoints_to_nodes(self, saved_start=None, saved_end=None):
         """Ensure both endpoints land on their node boundaries."""
@@ -788,7 +943,10 @@ class Edge(QGraphicsPathItem):
         if self.title_item and self.title_item.scene():
             self.title_item.scene().removeItem(self.title_item)
         
-        # Remove from scene's edges list
+        # Remove from the scene's edge index
+        if self._edge_index is not None:
+            self._edge_index.remove(self)
+        
         scene = self.scene()
         if scene:
             if hasattr(scene, 'edges') and self in scene.edges:
@@ -796,6 +954,24 @@ class Edge(QGraphicsPathItem):
             # Remove from scene
             scene.removeItem(self)
     
+    def set_coverage_heat(self, heat):
+        """Colour the edge by simulation coverage (0.0 = never fired .. 1.0 = most fired); None restores it"""
+        if heat is None:
+            self.coverage_pen = None
+        else:
+            self.coverage_pen = QPen(QColor(*heat_rgb(heat)), 3 + 2 * heat, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin)
+        self.update()
+    
+    def set_conflict(self, message):
+        """Flag the edge as conflicting with another transition of the same event; None clears it"""
+        if message is None:
+            self.conflict_pen = None
+            self.setToolTip("")
+        else:
+            self.conflict_pen = QPen(QColor(231, 76, 60), 3, Qt.DashLine, Qt.RoundCap, Qt.RoundJoin)
+            self.setToolTip(message)
+        self.update()
+    
     def shape(self):
         """Return a wider shape for easier selection"""
         # Create a path stroker with wider pen for hit detection
@@ -813,7 +989,12 @@ class Edge(QGraphicsPathItem):
             # Keep title white
             self.title_item.setDefaultTextColor(QColor(255, 255, 255))
         else:
-            painter.setPen(self.normal_pen)
+            if self.coverage_pen is not None:
+                painter.setPen(self.coverage_pen)
+            elif self.conflict_pen is not None:
+                painter.setPen(self.conflict_pen)
+            else:
+                painter.setPen(self.normal_pen)
             # Keep title white
             self.title_item.setDefaultTextColor(QColor(255, 255, 255))
         painter.drawPath(self.path())
@@ -1,15 +1,28 @@
 import sys
 import math
 import json
+import time
+from contextlib import contextmanager
 from PyQt5.QtWidgets import (QApplication, QGraphicsView, QGraphicsScene, 
                              QMainWindow, QVBoxLayout, QWidget, QGraphicsItem,
                              QGraphicsRectItem, QGraphicsTextItem, QGraphicsPathItem,
                              QGraphicsEllipseItem, QMenu, QAction, QLineEdit, QSizePolicy,
-                             QFileDialog, QMessageBox, QPushButton)
+                             QFileDialog, QMessageBox, QPushButton, QDockWidget,
+                             QListWidget, QListWidgetItem, QSlider, QSpinBox, QLabel,
+                             QHBoxLayout, QInputDialog)
 from PyQt5.QtCore import Qt, QRectF, QPointF, QSizeF, QByteArray, QTimer, QPropertyAnimation, pyqtProperty
-from PyQt5.QtGui import QPainter, QPen, QColor, QWheelEvent, QBrush, QFont, QPainterPath, QIcon, QPixmap
+from PyQt5.QtGui import QPainter, QPen, QColor, QWheelEvent, QBrush, QFont, QPainterPath, QIcon, QPixmap, QImage
 from PyQt5.QtSvg import QSvgRenderer
-from edge import Edge, EdgeControlPoint, WaypointControlPoint, EdgeTitleItem
+from edge import Edge, EdgeControlPoint, WaypointControlPoint, EdgeTitleItem, SceneEdgeIndex
+from search_index import DesignSearchIndex, PATH_SEPARATOR
+from sm_actions import ActionRunner
+from sm_analysis import DesignAnalyzer
+from sm_clock import SimulationClock
+from sm_coverage import heat_rgb
+from sm_layout import compute_layout
+from sm_model import DesignModel
+from sm_simulator import Simulator, SimulatorObserver, read_event_trace
+from sm_trace import Trace, TraceRecorder
 
 # ============================================================================
 # NODE TYPE COLOR DEFINITIONS
@@ -40,6 +53,10 @@ COLOR_DEFAULT = "#3498db"  # Blue
 # Border color for all nodes
 COLOR_BORDER = "#747574"  # Neutral gray
 
+# Border of the active states in Simulator mode
+COLOR_SIMULATOR_ACTIVE = "#ff8c00"  # Orange
+SIMULATOR_ACTIVE_BORDER_WIDTH = 5
+
 # Background opacity for container area (0-255, lower = more transparent)
 CONTAINER_BG_OPACITY = 5  # Very subtle background (was 10, now 50% more transparent)
 
@@ -139,6 +156,233 @@ class UserActionMonitor:
         self.actions[action_type] = {'color': color, 'duration': duration}
 
 
+class SearchPanel(QDockWidget):
+    """Dockable Find panel: type to filter nodes and edges, select a result to jump to it"""
+    
+    MAX_RESULTS = 200
+    
+    def __init__(self, window):
+        super().__init__("Find", window)
+        self.editor = window
+        self.setObjectName("SearchPanel")
+        self.setAllowedAreas(Qt.LeftDockWidgetArea | Qt.RightDockWidgetArea)
+        
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(4, 4, 4, 4)
+        
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Title, type or Entry/Exit/Run text...")
+        self.query_edit.setClearButtonEnabled(True)
+        self.query_edit.textChanged.connect(self.refresh)
+        self.query_edit.returnPressed.connect(self.jump_to_first)
+        layout.addWidget(self.query_edit)
+        
+        self.results_list = QListWidget()
+        self.results_list.itemActivated.connect(self.jump_to_item)
+        self.results_list.itemClicked.connect(self.jump_to_item)
+        layout.addWidget(self.results_list)
+        
+        self.setWidget(container)
+    
+    def focus_query(self):
+        """Show the panel and put the cursor in the query field"""
+        self.show()
+        self.raise_()
+        self.query_edit.setFocus()
+        self.query_edit.selectAll()
+    
+    def refresh(self):
+        """Re-run the current query against the window's search index"""
+        self.results_list.clear()
+        results = self.editor.search_design(self.query_edit.text(), self.MAX_RESULTS)
+        for result in results:
+            kind = result.node_type or ("Transition" if result.kind == 'edge' else "Node")
+            entry = QListWidgetItem(f"{result.title}  [{kind}]")
+            entry.setToolTip(result.path or result.title)
+            entry.setData(Qt.UserRole, result.item)
+            self.results_list.addItem(entry)
+    
+    def jump_to_first(self):
+        if self.results_list.count():
+            self.jump_to_item(self.results_list.item(0))
+    
+    def jump_to_item(self, entry):
+        item = entry.data(Qt.UserRole)
+        if item is not None:
+            self.editor.jump_to_item(item)
+
+
+class MinimapWidget(QWidget):
+    """Overview of the whole scene, drawn from a cached low-resolution image of node rects.
+    
+    Only node rectangles are drawn (no text, edges or antialiasing). The image is
+    rebuilt when the scene rect or widget size changes; otherwise only the regions
+    reported by QGraphicsScene.changed are repainted, coalesced by a short timer.
+    """
+    
+    REFRESH_DELAY_MS = 100
+    MAX_DIRTY_RECTS = 32  # Beyond this, repaint the union instead of each rect
+    
+    def __init__(self, editor):
+        super().__init__()
+        self.editor = editor
+        self.scene = editor.scene
+        self.view = editor.view
+        self.setMinimumSize(160, 120)
+        self.setCursor(Qt.PointingHandCursor)
+        
+        # Cached image and the scene -> image mapping it was drawn with
+        self._image = None
+        self._source_rect = QRectF()
+        self._scale = 1.0
+        self._offset = QPointF()
+        
+        # Pending work
+        self._dirty_rects = []
+        self._needs_full_render = True
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(self.REFRESH_DELAY_MS)
+        self._refresh_timer.timeout.connect(self.refresh_image)
+        
+        self.scene.changed.connect(self._on_scene_changed)
+        self.scene.sceneRectChanged.connect(lambda _rect: self.invalidate())
+        
+        # The viewport overlay is drawn on top of the cached image, so scrolling only repaints the widget
+        for scroll_bar in (self.view.horizontalScrollBar(), self.view.verticalScrollBar()):
+            scroll_bar.valueChanged.connect(lambda _value: self.update())
+            scroll_bar.rangeChanged.connect(lambda _min, _max: self.update())
+    
+    def invalidate(self):
+        """Schedule a full re-render of the cached image"""
+        self._needs_full_render = True
+        self._dirty_rects.clear()
+        self._schedule_refresh()
+    
+    def _on_scene_changed(self, regions):
+        if self._needs_full_render:
+            self._schedule_refresh()
+            return
+        self._dirty_rects.extend(regions)
+        self._schedule_refresh()
+    
+    def _schedule_refresh(self):
+        if self.isVisible() and not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+    
+    def refresh_image(self):
+        """Bring the cached image up to date with the pending dirty regions"""
+        if not self.isVisible():
+            return
+        if self._needs_full_render or self._image is None or self._image.size() != self.size():
+            self._render_full()
+        elif self._dirty_rects:
+            rects = self._dirty_rects
+            if len(rects) > self.MAX_DIRTY_RECTS:
+                union = QRectF(rects[0])
+                for rect in rects[1:]:
+                    union = union.united(rect)
+                rects = [union]
+            painter = QPainter(self._image)
+            for rect in rects:
+                self._render_region(painter, rect)
+            painter.end()
+        self._dirty_rects = []
+        self.update()
+    
+    def _render_full(self):
+        self._needs_full_render = False
+        self._image = QImage(self.size(), QImage.Format_ARGB32_Premultiplied)
+        self._image.fill(QColor(COLOR_BACKGROUND))
+        
+        # Fit the scene rect into the widget, keeping the aspect ratio
+        self._source_rect = self.scene.sceneRect()
+        if self._source_rect.width() <= 0 or self._source_rect.height() <= 0:
+            return
+        self._scale = min(self.width() / self._source_rect.width(),
+                          self.height() / self._source_rect.height())
+        self._offset = QPointF((self.width() - self._source_rect.width() * self._scale) / 2,
+                               (self.height() - self._source_rect.height() * self._scale) / 2)
+        
+        painter = QPainter(self._image)
+        self._render_region(painter, self._source_rect)
+        painter.end()
+    
+    def _render_region(self, painter, scene_rect):
+        """Repaint one scene region of the cached image with simplified node rects"""
+        target = self.map_from_scene(scene_rect).adjusted(-1, -1, 1, 1)
+        painter.setClipRect(target)
+        painter.fillRect(target, QColor(COLOR_BACKGROUND))
+        
+        # Ascending stacking order draws containers before their children
+        for item in self.scene.items(scene_rect, Qt.IntersectsItemBoundingRect, Qt.AscendingOrder):
+            if not isinstance(item, Node):
+                continue
+            rect = self.map_from_scene(item.sceneBoundingRect())
+            fill = QColor(item.title_color)
+            fill.setAlpha(60)
+            painter.setPen(QPen(item.title_color, 1))
+            painter.setBrush(fill)
+            painter.drawRect(rect)
+        painter.setClipping(False)
+    
+    def map_from_scene(self, rect):
+        """Map a scene rect to minimap (widget) coordinates"""
+        return QRectF(
+            (rect.x() - self._source_rect.x()) * self._scale + self._offset.x(),
+            (rect.y() - self._source_rect.y()) * self._scale + self._offset.y(),
+            rect.width() * self._scale,
+            rect.height() * self._scale)
+    
+    def map_to_scene(self, point):
+        """Map a minimap (widget) point to scene coordinates"""
+        if self._scale <= 0:
+            return QPointF()
+        return QPointF((point.x() - self._offset.x()) / self._scale + self._source_rect.x(),
+                       (point.y() - self._offset.y()) / self._scale + self._source_rect.y())
+    
+    def paintEvent(self, event):
+        if self._image is None or self._needs_full_render or self._image.size() != self.size():
+            self._render_full()
+        painter = QPainter(self)
+        painter.drawImage(0, 0, self._image)
+        
+        # Outline of the area currently shown in the main view
+        visible = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+        painter.setPen(QPen(QColor(255, 140, 0), 1))
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(self.map_from_scene(visible))
+        painter.end()
+    
+    def resizeEvent(self, event):
+        self.invalidate()
+        super().resizeEvent(event)
+    
+    def showEvent(self, event):
+        # Changes made while hidden only set the full-render flag
+        self.invalidate()
+        super().showEvent(event)
+    
+    def hideEvent(self, event):
+        self._needs_full_render = True
+        super().hideEvent(event)
+    
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.view.centerOn(self.map_to_scene(event.pos()))
+            event.accept()
+        else:
+            super().mousePressEvent(event)
+    
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self.view.centerOn(self.map_to_scene(event.pos()))
+            event.accept()
+        else:
+            super().mouseMoveEvent(event)
+
+
 class NodeEditorGraphicsView(QGraphicsView):
     def __init__(self, scene, parent=None):
         super().__init__(parent)
@@ -173,8 +417,7 @@ class NodeEditorGraphicsView(QGraphicsView):
         self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
         self.setDragMode(QGraphicsView.RubberBandDrag)
         
-        # Set scene rect
-        self.setSceneRect(-1000, -1000, 2000, 2000)
+        # The view follows the scene rect, which grows with the content (see NodeEditorWindow.update_scene_bounds)
         
         # Edge creation state
         self.edge_start_node = None
@@ -373,6 +616,24 @@ class NodeEditorGraphicsView(QGraphicsView):
     def keyPressEvent(self, event):
         """Handle key press events"""
         # No keyboard deletion - use toolbar button instead
+        # Arrow keys nudge the selected nodes by one grid step (Shift: one major step)
+        arrow_directions = {
+            Qt.Key_Left: (-1, 0),
+            Qt.Key_Right: (1, 0),
+            Qt.Key_Up: (0, -1),
+            Qt.Key_Down: (0, 1),
+        }
+        # Leave arrow keys to titles and text boxes while they are being edited
+        editing_text = isinstance(self.scene.focusItem(), QGraphicsTextItem)
+        if event.key() in arrow_directions and not editing_text and \
+           hasattr(self.window(), 'move_selected_items'):
+            step = self.grid_size
+            if event.modifiers() & Qt.ShiftModifier:
+                step *= self.grid_squares
+            dx, dy = arrow_directions[event.key()]
+            self.window().move_selected_items(dx * step, dy * step)
+            event.accept()
+            return
         super().keyPressEvent(event)
                 
     def mousePressEvent(self, event):
@@ -503,7 +764,7 @@ class NodeEditorGraphicsView(QGraphicsView):
                 self.temp_edge.create_control_points(self.scene)
                 # Keep the edge in the scene
                 if not hasattr(self.scene, 'edges'):
-                    self.scene.edges = []
+                    self.scene.edges = SceneEdgeIndex()
                 self.scene.edges.append(self.temp_edge)
                 
                 # Record edge creation for undo
@@ -600,6 +861,9 @@ class Node(QGraphicsItem):
         self.border_color = QColor("#747574")  # Default neutral border color
         self.border_width = 3  # Border width set to 3 pixels
         self.text_color = QColor("#ecf0f1")
+        self.coverage_color = None  # Heat-map fill while the coverage overlay is shown
+        self.sim_active = False  # Active state in Simulator mode (drawn with an orange border)
+        self._sim_indicator = None  # ActiveStateIndicator currently attached to this node
         
         # Node title
         self.title_item = QGraphicsTextItem(self.title, self)
@@ -695,9 +959,20 @@ class Node(QGraphicsItem):
         # Keep border consistent neutral for all types
         self.border_color = QColor(COLOR_BORDER)
         
+        # Keep the Find index in step with the new type and title
+        self._notify_search_index()
+        
         # Force redraw
         self.update()
     
+    def _notify_search_index(self):
+        """Refresh this node's entry in the window's search index"""
+        scene = self.scene()
+        if scene and scene.views():
+            window = scene.views()[0].window()
+            if hasattr(window, 'update_search_entry'):
+                window.update_search_entry(self)
+    
     def set_initial_state(self, is_initial):
         """Mark this node as an initial state (only for State nodes)"""
         if self.node_type == "State":
@@ -733,6 +1008,7 @@ class Node(QGraphicsItem):
         self.text_box = QGraphicsTextItem("", self)
         self.text_box.setDefaultTextColor(QColor("#ecf0f1"))  # Light text color
         self.text_box.setTextInteractionFlags(Qt.TextEditorInteraction)  # Make it editable
+        self.text_box.document().contentsChanged.connect(self._notify_search_index)
         
         # Set font to be 2 points smaller than title font
         title_font = self.title_item.font()
@@ -872,6 +1148,11 @@ class Node(QGraphicsItem):
         painter.setBrush(QBrush(title_bg_color))
         painter.drawPath(title_path.simplified())
         
+        # Coverage heat-map overlay
+        if self.coverage_color is not None:
+            painter.setBrush(QBrush(self.coverage_color))
+            painter.drawPath(path)
+        
         # Draw the border
         if self.isSelected():
             # Highlight border when selected (thicker yellow border)
@@ -881,6 +1162,9 @@ class Node(QGraphicsItem):
             # Draw resize handle when selected
             painter.setBrush(QBrush(Qt.white))
             painter.drawRect(self.resize_handle)
+        elif self.sim_active:
+            painter.setPen(QPen(QColor(COLOR_SIMULATOR_ACTIVE), SIMULATOR_ACTIVE_BORDER_WIDTH,
+                                Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
         else:
             # Normal border with light blue color and specified width
             painter.setPen(QPen(self.border_color, self.border_width, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
@@ -913,6 +1197,21 @@ class Node(QGraphicsItem):
             painter.setPen(QPen(QColor("#2c3e50"), 1))  # Thin dark border for contrast
             painter.drawEllipse(QPointF(circle_x, circle_y), circle_radius, circle_radius)
     
+    def set_sim_active(self, active):
+        """Mark the node as an active state in Simulator mode"""
+        if self.sim_active != active:
+            self.sim_active = active
+            self.update()
+    
+    def set_coverage_heat(self, heat):
+        """Tint the node by simulation coverage (0.0 = never entered .. 1.0 = most entered); None removes it"""
+        if heat is None:
+            self.coverage_color = None
+        else:
+            self.coverage_color = QColor(*heat_rgb(heat))
+            self.coverage_color.setAlpha(90)
+        self.update()
+    
     def update_size(self):
         """Update the node size based on content"""
         # Store old size for comparison
@@ -964,19 +1263,27 @@ class Node(QGraphicsItem):
             if self.node_type in ["Entry", "Exit", "Run"]:
                 self._update_text_box_size()
             
-            # Update smiley face position if in simulator mode
-            if hasattr(self, '_simulator_smiley'):
-                if self.scene() and hasattr(self.scene(), 'views') and self.scene().views():
-                    view = self.scene().views()[0]
-                    if hasattr(view, 'window'):
-                        main_window = view.window()
-                        if hasattr(main_window, 'position_smiley_near_initial_dot'):
-                            main_window.position_smiley_near_initial_dot(self)
+            # Keep the simulator indicator next to the initial dot
+            if self._sim_indicator is not None:
+                self._sim_indicator.place()
             
             # Update parent node's size if this node has a parent
             if self.parent_node and isinstance(self.parent_node, Node):
                 self.parent_node.update_size()
     
+    def set_rect(self, rect):
+        """Resize the node to rect, keeping inner rect, pinned children and text box in step"""
+        self.prepareGeometryChange()
+        self.rect = QRectF(rect)
+        self.width = rect.width()
+        self.height = rect.height()
+        self.update_handles()
+        if self.is_container:
+            self.update_inner_rect()
+        if self.node_type in ["Entry", "Exit", "Run"]:
+            self._update_text_box_size()
+        self.update()
+    
     def update_handles(self):
         """Update the position of the resize handle"""
         h = self.resize_handle_size
@@ -1185,7 +1492,6 @@ class Node(QGraphicsItem):
             
     def edit_title(self):
         """Enable editing of the node's title using a dialog"""
-        from PyQt5.QtWidgets import QInputDialog
         
         # Get the parent widget for the dialog
         parent = None
@@ -1206,6 +1512,7 @@ class Node(QGraphicsItem):
             self.title = new_title.strip()
             self.title_item.setPlainText(self.title)
             self.update()
+            self._notify_search_index()
             
             # Record the title change for undo
             if self.scene() and self.scene().views():
@@ -1371,6 +1678,11 @@ class Node(QGraphicsItem):
         elif change == QGraphicsItem.ItemSceneHasChanged and value:
             # When added to a scene, set initial z-order
             self.update_z_order()
+            self._notify_search_index()
+            
+        elif change == QGraphicsItem.ItemParentHasChanged and self.scene():
+            # Reparenting changes the hierarchy path shown in search results
+            self._notify_search_index()
             
         return super().itemChange(change, value)
         
@@ -1633,35 +1945,313 @@ class Node(QGraphicsItem):
         return QPointF(rect.right(), center.y())
 
 
+class ActiveStateIndicator(QGraphicsTextItem):
+    """The smiley marking one StateMachine's active state.
+    
+    One indicator exists per StateMachine for the whole simulation and is
+    moved to the new active state, instead of creating a text item on every
+    state entry.
+    """
+    
+    def __init__(self):
+        super().__init__("😊")
+        font = self.font()
+        font.setPointSize(16)
+        self.setFont(font)
+        color = QColor("#FFD700")  # Gold, half transparent
+        color.setAlpha(120)
+        self.setDefaultTextColor(color)
+        self.setZValue(100)  # Draw on top
+        self.state = None
+    
+    def attach(self, state):
+        """Show the indicator on state"""
+        if self.state is not state:
+            self.detach()
+            self.setParentItem(state)
+            self.state = state
+            state._sim_indicator = self
+            self.place()
+        if not self.isVisible():
+            self.show()
+    
+    def detach(self):
+        if self.state is not None:
+            if self.state._sim_indicator is self:
+                self.state._sim_indicator = None
+            self.state = None
+        self.hide()
+    
+    def place(self):
+        """Position 30 pixels left of where the initial dot is drawn, vertically centred with it"""
+        state = self.state
+        if state is None:
+            return
+        margin = state.title_height / 2  # Initial dot centre (see Node.paint)
+        dot_x = state.boundingRect().width() - margin
+        rect = self.boundingRect()
+        self.setPos(dot_x - 30 - rect.width(), margin - rect.height() / 2)
+
+
+class SimulatorHighlighter(SimulatorObserver):
+    """Mirrors the headless simulator onto the editor: highlights each StateMachine's active leaf.
+    
+    Leaf changes are collected while the simulator runs and written to the
+    window's current_states once per dispatch (or per dispatch_many batch);
+    the window repaints the highlights at most once per frame.
+    """
+    
+    def __init__(self, window, items):
+        self.window = window
+        self.items = items  # Model node ID -> Node
+        self.pending = {}  # StateMachine -> (leaf before the run, latest leaf)
+    
+    def active_state_changed(self, statemachine, old_leaf, new_leaf):
+        previous = self.pending.get(statemachine)
+        self.pending[statemachine] = (previous[0] if previous else old_leaf, new_leaf)
+    
+    def run_completed(self):
+        if not self.pending:
+            return
+        for statemachine, (old_leaf, new_leaf) in self.pending.items():
+            if old_leaf is not new_leaf:
+                self.window.current_states[self.items.get(statemachine.id)] = self.items.get(new_leaf.id)
+        self.pending.clear()
+        self.window.schedule_highlights()
+        self.window.trace_panel.follow_live()
+        self.window.schedule_coverage_refresh()
+        self.window.schedule_clock()
+    
+    def transition_suppressed(self, transition):
+        self.window.statusBar().showMessage(f"Already inside {transition.target.title}", 2000)
+
+
+class TracePanel(QDockWidget):
+    """Dockable trace scrubber: shows the configuration after any recorded simulator step.
+    
+    The panel follows the live recording while its slider is at the end;
+    moving it back redraws the highlights from the trace's checkpoints, so
+    scrubbing stays fast on traces with millions of steps.
+    """
+    
+    def __init__(self, window):
+        super().__init__("Trace", window)
+        self.editor = window
+        self.setObjectName("TracePanel")
+        self.setAllowedAreas(Qt.TopDockWidgetArea | Qt.BottomDockWidgetArea)
+        self.trace = None
+        self.live = True  # Showing the simulator's own recording
+        self.items = []  # Trace state index -> Node (None if not in the scene)
+        
+        container = QWidget()
+        layout = QHBoxLayout(container)
+        layout.setContentsMargins(4, 4, 4, 4)
+        
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.valueChanged.connect(self.show_step)
+        layout.addWidget(self.slider, 1)
+        
+        self.step_box = QSpinBox()
+        self.step_box.setKeyboardTracking(False)
+        self.step_box.valueChanged.connect(self.slider.setValue)
+        self.slider.valueChanged.connect(self.step_box.setValue)
+        layout.addWidget(self.step_box)
+        
+        self.step_label = QLabel()
+        self.step_label.setMinimumWidth(240)
+        layout.addWidget(self.step_label, 1)
+        
+        self.setWidget(container)
+    
+    def set_trace(self, trace, live=True):
+        """Show a trace; live traces are the ones the running simulator records into"""
+        self.trace = trace
+        self.live = live
+        self.items = self.editor.trace_items(trace, live) if trace is not None else []
+        steps = len(trace) if trace is not None else 0
+        for widget in (self.slider, self.step_box):
+            widget.blockSignals(True)
+            widget.setRange(0, steps)
+            widget.setValue(steps)
+            widget.blockSignals(False)
+        if trace is not None:
+            self.slider.setPageStep(max(1, trace.checkpoint_interval))
+        self.show_step(steps)
+    
+    def follow_live(self):
+        """New steps were recorded: move to the end if the slider was there"""
+        recorder = self.editor.trace_recorder
+        if recorder is None:
+            return
+        if not self.live or self.trace is not recorder.trace:
+            self.set_trace(recorder.trace, live=True)
+            return
+        at_end = self.slider.value() == self.slider.maximum()
+        steps = len(self.trace)
+        for widget in (self.slider, self.step_box):
+            widget.blockSignals(True)
+            widget.setMaximum(steps)
+            if at_end:
+                widget.setValue(steps)
+            widget.blockSignals(False)
+        if at_end:
+            self.update_label(steps)
+    
+    def show_step(self, step):
+        """Highlight the configuration after the first step steps"""
+        if self.trace is None:
+            self.step_label.setText("No trace recorded")
+            return
+        configuration = self.trace.configuration(step)
+        self.editor.show_trace_configuration(
+            {self.items[statemachine]: self.items[leaf] for statemachine, leaf in configuration.items()})
+        self.update_label(step)
+    
+    def update_label(self, step):
+        trace = self.trace
+        if step == 0:
+            self.step_label.setText(f"Step 0 / {len(trace):,}")
+            return
+        last = trace.step(step - 1)
+        if last.event is None:
+            description = f"start {trace.state_paths[last.target]}"
+        else:
+            source = trace.state_paths[last.source].rsplit(PATH_SEPARATOR, 1)[-1]
+            target = trace.state_paths[last.target].rsplit(PATH_SEPARATOR, 1)[-1]
+            description = f"{last.event}: {source} → {target}"
+        self.step_label.setText(f"Step {step:,} / {len(trace):,}  {description}")
+
+
+class AnalysisPanel(QDockWidget):
+    """Dockable design check: unreachable and sink states, initial-state problems and event conflicts.
+    
+    While visible the panel re-runs the analysis shortly after the design
+    changes; the analyzer only re-checks the StateMachines that changed.
+    Transitions in an event conflict are drawn dashed red on the canvas.
+    """
+    
+    KIND_LABELS = {
+        'unreachable': "Unreachable",
+        'sink': "Sink",
+        'missing_initial': "No initial",
+        'duplicate_initial': "Several initial",
+    }
+    
+    def __init__(self, window):
+        super().__init__("Analysis", window)
+        self.editor = window
+        self.setObjectName("AnalysisPanel")
+        self.setAllowedAreas(Qt.LeftDockWidgetArea | Qt.RightDockWidgetArea)
+        self.analyzer = DesignAnalyzer()
+        self.conflict_edges = set()  # Edges currently flagged on the canvas
+        
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(4, 4, 4, 4)
+        
+        header = QHBoxLayout()
+        self.summary_label = QLabel()
+        header.addWidget(self.summary_label, 1)
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(self.refresh)
+        header.addWidget(refresh_button)
+        layout.addLayout(header)
+        
+        self.findings_list = QListWidget()
+        self.findings_list.itemActivated.connect(self.jump_to_item)
+        self.findings_list.itemClicked.connect(self.jump_to_item)
+        layout.addWidget(self.findings_list)
+        
+        self.setWidget(container)
+    
+    def refresh(self):
+        """Analyse the current design and list the findings"""
+        report = self.analyzer.analyze(DesignModel(self.editor.serialize_design()))
+        nodes_by_id = self.editor._nodes_by_id()
+        edges = self.editor._design_edges()  # In model transition order
+        self.findings_list.clear()
+        for finding in report.findings:
+            entry = QListWidgetItem(f"{self.KIND_LABELS[finding.kind]}: {finding.node.title}")
+            entry.setToolTip(finding.message)
+            entry.setData(Qt.UserRole, nodes_by_id.get(finding.node.id))
+            self.findings_list.addItem(entry)
+        
+        conflict_messages = {}
+        for conflict in report.conflicts:
+            entry = QListWidgetItem(f"Conflict: {conflict.message}")
+            entry.setToolTip(f"{conflict.first.source.path()}\n{conflict.second.source.path()}")
+            entry.setData(Qt.UserRole, edges[conflict.second.index])
+            self.findings_list.addItem(entry)
+            for transition in (conflict.first, conflict.second):
+                conflict_messages.setdefault(edges[transition.index], conflict.message)
+        self.show_conflicts(conflict_messages)
+        
+        count = len(report.findings) + len(report.conflicts)
+        self.summary_label.setText(f"{count} finding(s)" if count else "No findings")
+    
+    def show_conflicts(self, messages):
+        """Flag the edges in messages (Edge -> conflict description) and clear the others"""
+        for edge in self.conflict_edges - messages.keys():
+            edge.set_conflict(None)
+        for edge, message in messages.items():
+            edge.set_conflict(message)
+        self.conflict_edges = set(messages)
+    
+    def jump_to_item(self, entry):
+        item = entry.data(Qt.UserRole)
+        if item is not None:
+            self.editor.jump_to_item(item)
+
+
 class NodeEditorWindow(QMainWindow):
+    # Initial scene bounds; the scene rect grows from here as content is added
+    DEFAULT_SCENE_RECT = QRectF(-1000, -1000, 2000, 2000)
+    SCENE_MARGIN = 500  # Free space kept around the content for panning and placing nodes
+    SCENE_BOUNDS_DELAY_MS = 200
+    COVERAGE_REFRESH_DELAY_MS = 200
+    ANALYSIS_DELAY_MS = 500  # Analysis panel refresh after the last design change
+    SIMULATION_TICK_MS = 100  # Run actions interval of the simulation clock
+    HIGHLIGHT_FRAME_MS = 16  # Simulator highlights are repainted at most once per frame
+    
     def __init__(self):
         super().__init__()
         self.current_file = None  # Track the currently opened file
         self.initUI()
 
-    def _relink_stored_edge_nodes(self, original_node_id, new_node):
-        """Update pending edge actions to reference the recreated node."""
-        stacks = [self.undo_stack]
+    def _iter_recorded_actions(self):
+        """Yield every recorded undo/redo action, including the steps inside batches."""
+        pending = [self.undo_stack]
         if hasattr(self, 'redo_stack'):
-            stacks.append(self.redo_stack)
+            pending.append(self.redo_stack)
+        # Batches being replayed have already been popped off their stack
+        pending.append(getattr(self, '_replaying_batches', []))
 
-        for stack in stacks:
+        while pending:
+            stack = pending.pop()
             if not stack:
                 continue
             for action in stack:
                 if not isinstance(action, dict):
                     continue
-                if action.get('type') != 'edge_delete':
-                    continue
-                edge_data = action.get('edge_data')
-                if not edge_data:
+                if action.get('type') == 'batch':
+                    pending.append(action.get('actions', []))
                     continue
-                if edge_data.get('start_node_id') == original_node_id:
-                    edge_data['start_node'] = new_node
-                    edge_data['start_node_id'] = id(new_node)
-                if edge_data.get('end_node_id') == original_node_id:
-                    edge_data['end_node'] = new_node
-                    edge_data['end_node_id'] = id(new_node)
+                yield action
+
+    def _relink_stored_edge_nodes(self, original_node_id, new_node):
+        """Update pending edge actions to reference the recreated node."""
+        for action in self._iter_recorded_actions():
+            if action.get('type') != 'edge_delete':
+                continue
+            edge_data = action.get('edge_data')
+            if not edge_data:
+                continue
+            if edge_data.get('start_node_id') == original_node_id:
+                edge_data['start_node'] = new_node
+                edge_data['start_node_id'] = id(new_node)
+            if edge_data.get('end_node_id') == original_node_id:
+                edge_data['end_node'] = new_node
+                edge_data['end_node_id'] = id(new_node)
     
     def initUI(self):
         # Set window properties
@@ -1810,7 +2400,11 @@ class NodeEditorWindow(QMainWindow):
         
         # Create a graphics scene
         self.scene = QGraphicsScene()
-        self.scene.setSceneRect(-1000, -1000, 2000, 2000)
+        self.scene.setSceneRect(self.DEFAULT_SCENE_RECT)
+        # Edges live in an index keyed by node and title for fast lookups
+        self.scene.edges = SceneEdgeIndex()
+        # Titles, types and action text are indexed for the Find panel
+        self.search_index = DesignSearchIndex()
         
         # Create the custom graphics view
         self.view = NodeEditorGraphicsView(self.scene, self)
@@ -1830,10 +2424,19 @@ class NodeEditorWindow(QMainWindow):
         self.edge_start = None
         self.current_edge = None
         
+        # Headless simulator driving Simulator mode (created when the mode is turned on)
+        self.simulator = None
+        self.simulator_items = {}  # Model node ID -> Node
+        self.simulator_edge_index = {}  # Edge -> model transition index
+        self.action_runner = None  # Runs Entry/Exit/Run texts while simulating
+        self.simulation_clock = None  # Timed events (after(ms, event)) and Run ticks
+        self._clock_origin = 0.0  # time.monotonic() at simulation time 0 in real-time mode
+        
         # Undo/redo stacks
         self.undo_stack = []
         self.redo_stack = []
         self.max_undo_stack_size = 50  # Limit stack size to prevent memory issues
+        self._replaying_batches = []  # Batch actions currently being undone/redone
         
         # Set up the status bar
         self.statusBar().showMessage("Ready")
@@ -1852,6 +2455,61 @@ class NodeEditorWindow(QMainWindow):
         # Initialize the user action monitor
         self.action_monitor = UserActionMonitor(self.action_signal_dot)
         
+        # Find panel (hidden until Ctrl+F)
+        self.search_panel = SearchPanel(self)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.search_panel)
+        self.search_panel.hide()
+        
+        # Overview (minimap) panel
+        self.minimap = MinimapWidget(self)
+        self.minimap_dock = QDockWidget("Overview", self)
+        self.minimap_dock.setObjectName("MinimapDock")
+        self.minimap_dock.setWidget(self.minimap)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.minimap_dock)
+        
+        # Trace scrubber (shown from the Simulator menu)
+        self.trace_recorder = None
+        self.trace_panel = TracePanel(self)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.trace_panel)
+        self.trace_panel.hide()
+        
+        # Design analysis (shown from the View menu), refreshed after edits while visible
+        self.analysis_panel = AnalysisPanel(self)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.analysis_panel)
+        self.analysis_panel.hide()
+        self._analysis_timer = QTimer(self)
+        self._analysis_timer.setSingleShot(True)
+        self._analysis_timer.setInterval(self.ANALYSIS_DELAY_MS)
+        self._analysis_timer.timeout.connect(self.analysis_panel.refresh)
+        self.analysis_panel.visibilityChanged.connect(self._on_analysis_visibility)
+        
+        # Simulator highlights: current_states is applied to the scene once per frame
+        self.current_states = {}  # StateMachine node -> active leaf node
+        self._highlighted = set()  # Nodes drawn as active
+        self._indicators = {}  # StateMachine node -> ActiveStateIndicator
+        self._highlight_timer = QTimer(self)
+        self._highlight_timer.setSingleShot(True)
+        self._highlight_timer.setInterval(self.HIGHLIGHT_FRAME_MS)
+        self._highlight_timer.timeout.connect(self.apply_highlights)
+        
+        # Real-time simulation clock: fires at the next timer deadline
+        self._clock_timer = QTimer(self)
+        self._clock_timer.setSingleShot(True)
+        self._clock_timer.timeout.connect(self._on_clock_timer)
+        
+        # Coverage heat-map refresh, coalesced while events are being dispatched
+        self._coverage_timer = QTimer(self)
+        self._coverage_timer.setSingleShot(True)
+        self._coverage_timer.setInterval(self.COVERAGE_REFRESH_DELAY_MS)
+        self._coverage_timer.timeout.connect(self.refresh_coverage_overlay)
+        
+        # Grow the scene rect with the content; checked at most every SCENE_BOUNDS_DELAY_MS
+        self._scene_bounds_timer = QTimer(self)
+        self._scene_bounds_timer.setSingleShot(True)
+        self._scene_bounds_timer.setInterval(self.SCENE_BOUNDS_DELAY_MS)
+        self._scene_bounds_timer.timeout.connect(self.update_scene_bounds)
+        self.scene.changed.connect(self._on_scene_changed)
+        
         # Create a simple menu
         self.createMenu()
         
@@ -1961,14 +2619,15 @@ class NodeEditorWindow(QMainWindow):
             if not nodes:
                 return
         
-        # Apply the type to all selected nodes and record for undo
-        for node in nodes:
-            # Record the old type and title before changing
-            old_type = node.node_type
-            old_title = node.title  # Capture title before it gets changed
-            node.set_node_type(node_type)
-            # Record the type change for undo
-            self.record_node_type_change(node, old_type, node_type, old_title)
+        # Apply the type to all selected nodes and record them as one undo step
+        with self.batched_scene_update(f"Applied {node_type} to {len(nodes)} node(s)"):
+            for node in nodes:
+                # Record the old type and title before changing
+                old_type = node.node_type
+                old_title = node.title  # Capture title before it gets changed
+                node.set_node_type(node_type)
+                # Record the type change for undo
+                self.record_node_type_change(node, old_type, node_type, old_title)
         
         # Update status bar
         if node_type == "Process":
@@ -2002,18 +2661,19 @@ class NodeEditorWindow(QMainWindow):
         marked_count = 0
         non_state_count = 0
         
-        for node in nodes:
-            # Toggle initial state for State nodes
-            if node.node_type == "State":
-                previous_state = node.is_initial
-                new_state = not previous_state
-                # Record before changing so undo can revert
-                self.record_node_initial_change(node, previous_state, new_state)
-                # Toggle the initial state
-                node.set_initial_state(new_state)
-                marked_count += 1
-            else:
-                non_state_count += 1
+        with self.batched_scene_update("Toggled initial state"):
+            for node in nodes:
+                # Toggle initial state for State nodes
+                if node.node_type == "State":
+                    previous_state = node.is_initial
+                    new_state = not previous_state
+                    # Record before changing so undo can revert
+                    self.record_node_initial_change(node, previous_state, new_state)
+                    # Toggle the initial state
+                    node.set_initial_state(new_state)
+                    marked_count += 1
+                else:
+                    non_state_count += 1
         
         # Update status bar with appropriate message
         if marked_count > 0 and non_state_count == 0:
@@ -2049,8 +2709,8 @@ class NodeEditorWindow(QMainWindow):
             self.view.setDragMode(QGraphicsView.NoDrag)
             
             # Initialize state machine simulation - track state per StateMachine
-            self.current_states = {}  # Dict: {statemachine_node: current_state_node}
-            self.enter_initial_state()
+            self.current_states = {}
+            self.start_simulation()
         else:
             self.simulator_button.setText("Simulator OFF")
             self.statusBar().showMessage("Editor mode enabled", 2000)
@@ -2073,193 +2733,83 @@ class NodeEditorWindow(QMainWindow):
             self.view.setDragMode(QGraphicsView.RubberBandDrag)
             
             # Exit simulation - clear all current state highlighting
-            if hasattr(self, 'current_states'):
-                for statemachine, state in list(self.current_states.items()):
-                    if state:
-                        self.exit_state(state)
-                self.current_states = {}
-    
-    def enter_initial_state(self):
-        """Enter the initial state when starting simulation - supports multiple Process nodes"""
-        # Find all Process nodes in the scene
-        process_nodes = [node for node in self.nodes if node.node_type == "Process"]
-        
-        if not process_nodes:
+            self.current_states = {}
+            self.apply_highlights()
+            for indicator in self._indicators.values():
+                indicator.detach()
+                indicator.setParentItem(None)
+                if indicator.scene():
+                    indicator.scene().removeItem(indicator)
+            self._indicators = {}
+            self.simulator = None
+            self.trace_recorder = None
+            self.action_runner = None
+            self.simulation_clock = None
+            self._clock_timer.stop()
+            self.trace_panel.set_trace(None)
+            self.refresh_coverage_overlay()
+    
+    def start_simulation(self):
+        """Build a headless Simulator from the current design and enter the initial states"""
+        # Model IDs are id(node) (see serialize_design); transitions keep the edge list order
+        self.simulator_items = self._nodes_by_id()
+        self.simulator_edge_index = {edge: index for index, edge in enumerate(self._design_edges())}
+        self.simulator = Simulator(DesignModel(self.serialize_design()))
+        self.trace_recorder = TraceRecorder(self.simulator)
+        self.simulator.enable_coverage()
+        self.action_runner = ActionRunner(self.simulator)
+        self.simulation_clock = SimulationClock(
+            self.simulator, self.action_runner,
+            tick_interval=self.SIMULATION_TICK_MS if self.action_runner.actions["Run"] else None)
+        self.set_real_time_clock(self.real_time_action.isChecked())
+        self.simulator.add_observer(SimulatorHighlighter(self, self.simulator_items))
+        
+        if not any(node.node_type == "Process" for node in self.nodes):
             self.statusBar().showMessage("No Process nodes found to simulate", 2000)
             return
         
-        # For each Process, find its StateMachine and initialize it
-        statemachines_found = 0
-        for process in process_nodes:
-            if not process.is_container or not process.child_nodes:
-                continue
-            
-            # Find StateMachine child
-            statemachine = None
-            for child in process.child_nodes:
-                if child.node_type == "StateMachine":
-                    statemachine = child
-                    break
-            
-            if not statemachine:
-                continue
-            
-            # Find initial state in this StateMachine
-            initial_state = None
-            if statemachine.is_container and statemachine.child_nodes:
-                # Look for initial state among children
-                for child in statemachine.child_nodes:
-                    if child.node_type == "State" and child.is_initial:
-                        initial_state = child
-                        break
-                
-                # If no initial state marked, pick the first State
-                if not initial_state:
-                    for child in statemachine.child_nodes:
-                        if child.node_type == "State":
-                            initial_state = child
-                            break
-            
-            # Enter the initial state for this StateMachine
-            if initial_state:
-                self.enter_state(initial_state, statemachine)
-                statemachines_found += 1
-        
+        statemachines_found = self.simulator.start()
+        self.trace_panel.set_trace(self.trace_recorder.trace)
+        self.refresh_coverage_overlay()
         if statemachines_found == 0:
             self.statusBar().showMessage("No StateMachines with States found in Process nodes", 2000)
         else:
-            self.statusBar().showMessage(f"Simulating {statemachines_found} StateMachine(s)", 2000)
+            message = f"Simulating {statemachines_found} StateMachine(s)"
+            skipped = sum(1 for error in self.action_runner.errors if error.message.startswith("SyntaxError"))
+            if skipped:
+                message += f" - {skipped} Entry/Exit/Run text(s) are not Python and will not run"
+            self.statusBar().showMessage(message, 4000)
     
-    def enter_state(self, state, statemachine=None):
-        """Enter a state with hierarchical support"""
-        if not state or state.node_type not in ["State", "StateMachine"]:
-            return
-        
-        # Find the StateMachine this state belongs to if not provided
-        if statemachine is None:
-            statemachine = self.find_parent_statemachine(state)
-        
-        if statemachine is None:
-            return
-        
-        # Exit current state for this StateMachine if any
-        if statemachine in self.current_states and self.current_states[statemachine]:
-            self.exit_state(self.current_states[statemachine])
-        
-        # Enter the new state
-        self.current_states[statemachine] = state
-        self.highlight_state(state, True)
-        
-        # Check if this state has children - if so, enter the initial child
-        if state.is_container and state.child_nodes:
-            # Find initial child state
-            initial_child = None
-            for child in state.child_nodes:
-                if child.node_type == "State" and child.is_initial:
-                    initial_child = child
-                    break
-            
-            # If no initial child, take the first State child
-            if not initial_child:
-                for child in state.child_nodes:
-                    if child.node_type == "State":
-                        initial_child = child
-                        break
-            
-            # Recursively enter the child state
-            if initial_child:
-                self.enter_state(initial_child, statemachine)
-        else:
-            # Leaf state - show status for all active states
-            self.update_simulator_status()
-    
-    def exit_state(self, state):
-        """Exit a state and remove highlighting"""
-        if state:
-            self.highlight_state(state, False)
-    
-    def highlight_state(self, state, active):
-        """Highlight or unhighlight a state"""
-        if active:
-            # Store original border color and set to orange
-            if not hasattr(state, '_original_border_color'):
-                state._original_border_color = state.border_color
-            state.border_color = QColor("#ff8c00")  # Orange
-            state.border_width = 5
-            
-            # Add yellow smiley face
-            from PyQt5.QtWidgets import QGraphicsTextItem
-            smiley = QGraphicsTextItem("😊", state)
-            
-            # Increase size by 30% from original 12pt
-            # 12pt * 1.30 = 15.6pt, rounded to 16pt
-            font = smiley.font()
-            font.setPointSize(16)  # 30% larger than original 12pt
-            smiley.setFont(font)
-            
-            # Set color with 50% transparency
-            color = QColor("#FFD700")  # Gold/yellow color
-            color.setAlpha(120)  # 50% transparent (255 * 0.5 = 127.5)
-            smiley.setDefaultTextColor(color)
-            
-            smiley.setZValue(100)  # Draw on top
-            state._simulator_smiley = smiley
-            
-            # Position 10 pixels left of initial dot position
-            self.position_smiley_near_initial_dot(state)
-        else:
-            # Restore original border color
-            if hasattr(state, '_original_border_color'):
-                state.border_color = state._original_border_color
-                delattr(state, '_original_border_color')
-            state.border_width = 3
-            
-            # Remove smiley face
-            if hasattr(state, '_simulator_smiley'):
-                if state._simulator_smiley.scene():
-                    state._simulator_smiley.scene().removeItem(state._simulator_smiley)
-                delattr(state, '_simulator_smiley')
-        state.update()
-    
-    def position_smiley_near_initial_dot(self, state):
-        """Position smiley face 10 pixels left of where the initial dot would be"""
-        if hasattr(state, '_simulator_smiley'):
-            smiley = state._simulator_smiley
-            
-            # Dynamically get current node dimensions from bounding rect
-            # This ensures we always use the actual current size, not cached values
-            state_rect = state.boundingRect()
-            current_width = state_rect.width()
-            current_height = state_rect.height()
-            current_title_height = state.title_height
-            
-            # Initial dot position (from Node.paint method)
-            circle_radius = 7.5  # 15 pixel diameter = 7.5 pixel radius
-            margin = current_title_height / 2  # Half of title bar height
-            dot_x = current_width - margin  # Equal distance from right edge
-            dot_y = margin  # Equal distance from top edge
-            
-            # Get smiley dimensions
-            smiley_rect = smiley.boundingRect()
-            
-            # Position smiley 30 pixels to the left of the dot (10 + 20 extra), vertically centered with dot
-            x = dot_x - 30 - smiley_rect.width()
-            y = dot_y - smiley_rect.height() / 2
-            
-            smiley.setPos(x, y)
+    def schedule_highlights(self):
+        """Repaint the simulator highlights from current_states on the next frame"""
+        if not self._highlight_timer.isActive():
+            self._highlight_timer.start()
     
-    def find_parent_statemachine(self, state):
-        """Find the StateMachine that contains this state"""
-        current = state
-        while current:
-            if current.node_type == "StateMachine":
-                return current
-            current = current.parent_node if hasattr(current, 'parent_node') else None
-        return None
+    def apply_highlights(self):
+        """Make the scene show current_states: active flags, one indicator per StateMachine, status bar"""
+        self._highlight_timer.stop()
+        active = {state for state in self.current_states.values() if state is not None}
+        for state in self._highlighted - active:
+            state.set_sim_active(False)
+        for state in active - self._highlighted:
+            state.set_sim_active(True)
+        self._highlighted = active
+        
+        for statemachine, indicator in self._indicators.items():
+            if self.current_states.get(statemachine) is None:
+                indicator.detach()
+        for statemachine, state in self.current_states.items():
+            if statemachine is None or state is None:
+                continue
+            indicator = self._indicators.get(statemachine)
+            if indicator is None:
+                indicator = self._indicators[statemachine] = ActiveStateIndicator()
+            indicator.attach(state)
+        self.update_simulator_status()
     
     def update_simulator_status(self):
         """Update status bar with all active states"""
-        if not hasattr(self, 'current_states') or not self.current_states:
+        if not self.current_states:
             return
         
         state_messages = []
@@ -2278,6 +2828,10 @@ class NodeEditorWindow(QMainWindow):
     
     def get_state_path(self, state):
         """Get the hierarchical path of a state"""
+        # The search index caches paths and drops them when a title changes
+        cached = self.search_index.path(id(state))
+        if cached is not None:
+            return cached
         path = []
         current = state
         while current:
@@ -2285,94 +2839,264 @@ class NodeEditorWindow(QMainWindow):
             current = current.parent_node if hasattr(current, 'parent_node') else None
         return " → ".join(path)
     
-    def transition_to_state(self, target_state, statemachine=None):
-        """Transition from current state to target state"""
-        if not target_state or target_state.node_type not in ["State", "StateMachine"]:
+    def run_event_trace(self):
+        """Dispatch every event of a trace file (one event per line, or a JSON list) as one batch"""
+        if not self.simulator_mode or self.simulator is None:
+            self.statusBar().showMessage("Turn on Simulator mode to run an event trace", 2000)
             return
         
-        # Find the StateMachine this state belongs to if not provided
-        if statemachine is None:
-            statemachine = self.find_parent_statemachine(target_state)
-        
-        if statemachine is None:
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Run Event Trace",
+            "",
+            "Event Traces (*.txt *.json);;All Files (*)"
+        )
+        if not file_path:
             return
         
-        # Get current state for this StateMachine
-        current_state = self.current_states.get(statemachine)
-        
-        # Check if we're already inside the target state's hierarchy
-        if self.is_inside_state(current_state, target_state):
-            # Already inside this state, no transition needed
-            self.statusBar().showMessage(f"Already inside {target_state.title}", 2000)
+        try:
+            events = read_event_trace(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to read event trace: {str(e)}")
             return
         
-        self.enter_state(target_state, statemachine)
+        stats = self.simulator.dispatch_many(events)
+        self.statusBar().showMessage(
+            f"Processed {stats.events} event(s), {stats.transitions} transition(s) "
+            f"in {stats.seconds * 1000:.1f} ms ({stats.events_per_second:,.0f} events/s)", 5000)
     
-    def is_inside_state(self, current, target):
-        """Check if current state is inside the target state's hierarchy"""
-        if not current or not target:
-            return False
+    def trace_items(self, trace, live=True):
+        """Scene nodes for a trace's states: by model ID for the live recording, else by path
         
-        # Walk up the parent chain from current state
-        node = current
-        while node:
-            if node == target:
-                return True
-            node = node.parent_node if hasattr(node, 'parent_node') else None
+        Model IDs are only meaningful for this session's simulator, so loaded
+        traces are always matched by their state paths.
+        """
+        items = (getattr(self, 'simulator_items', None) or {}) if live else {}
+        by_path = None
+        result = []
+        for state_id, path in zip(trace.state_ids, trace.state_paths):
+            item = items.get(state_id)
+            if item is None:
+                if by_path is None:
+                    by_path = {self.get_state_path(node): node for node in self.nodes
+                               if node.node_type in ("State", "StateMachine")}
+                item = by_path.get(path)
+            result.append(item)
+        return result
+    
+    def show_trace_configuration(self, configuration):
+        """Highlight a {StateMachine node: leaf node} configuration in place of the current one"""
+        if not self.simulator_mode:
+            return
+        self.current_states = {statemachine: state for statemachine, state in configuration.items()
+                               if statemachine is not None and state is not None}
+        self.schedule_highlights()
+    
+    def run_tick(self):
+        """Run the Run actions of all active states once"""
+        if not self.simulator_mode or self.action_runner is None:
+            self.statusBar().showMessage("Turn on Simulator mode to run actions", 2000)
+            return
+        errors_before = self.action_runner.error_count
+        count = self.action_runner.tick()
+        self.schedule_clock()
+        failed = self.action_runner.error_count - errors_before
+        if failed:
+            last = self.action_runner.errors[-1]
+            self.statusBar().showMessage(
+                f"Ran {count} Run action(s), {failed} failed - last: {last.node.title}: {last.message}", 5000)
+        else:
+            self.statusBar().showMessage(f"Ran {count} Run action(s)", 2000)
+    
+    def set_real_time_clock(self, enabled):
+        """Let the simulation clock follow the wall clock (or stop it, keeping its time)"""
+        clock = self.simulation_clock
+        if clock is None:
+            return
+        if enabled:
+            self._clock_origin = time.monotonic() - clock.now / 1000.0
+            clock.time_source = lambda: (time.monotonic() - self._clock_origin) * 1000.0
+        else:
+            clock.run_until(clock.current_time())
+            clock.time_source = None
+        self.schedule_clock()
+    
+    def schedule_clock(self):
+        """Arm the real-time QTimer for the clock's next deadline"""
+        clock = self.simulation_clock
+        if clock is None or clock.time_source is None:
+            self._clock_timer.stop()
+            return
+        deadline = clock.next_deadline()
+        if deadline is None:
+            self._clock_timer.stop()
+            return
+        delay = max(0.0, deadline - clock.current_time())
+        self._clock_timer.start(int(math.ceil(delay)))
+    
+    def _on_clock_timer(self):
+        clock = self.simulation_clock
+        if clock is None or clock.time_source is None:
+            return
+        clock.run_until(clock.time_source())
+        self.schedule_clock()
+    
+    def advance_clock(self, duration=None):
+        """Advance simulation time (virtual time: jumps from deadline to deadline)"""
+        clock = self.simulation_clock
+        if not self.simulator_mode or clock is None:
+            self.statusBar().showMessage("Turn on Simulator mode to advance the clock", 2000)
+            return
+        if duration is None:
+            duration, ok = QInputDialog.getDouble(
+                self, "Advance Clock", "Milliseconds:", 1000.0, 0.0, 1e12, 1)
+            if not ok:
+                return
+        started = time.perf_counter()
+        fired = clock.run_until(clock.current_time() + duration)
+        seconds = time.perf_counter() - started
+        if clock.time_source is not None:
+            # Real-time mode continues from the new simulation time
+            self._clock_origin = time.monotonic() - clock.now / 1000.0
+        self.schedule_clock()
+        self.statusBar().showMessage(
+            f"t = {clock.now / 1000.0:,.3f} s: {fired} timed event(s) in {seconds * 1000:.1f} ms, "
+            f"{clock.pending()} timer(s) armed", 4000)
+    
+    def advance_to_next_timer(self):
+        """Jump to the next timer deadline and fire what is due"""
+        clock = self.simulation_clock
+        if not self.simulator_mode or clock is None:
+            self.statusBar().showMessage("Turn on Simulator mode to advance the clock", 2000)
+            return
+        deadline = clock.next_deadline()
+        if deadline is None:
+            self.statusBar().showMessage("No timers armed", 2000)
+            return
+        self.advance_clock(max(0.0, deadline - clock.current_time()))
+    
+    def schedule_coverage_refresh(self):
+        if self.coverage_action.isChecked() and not self._coverage_timer.isActive():
+            self._coverage_timer.start()
+    
+    def refresh_coverage_overlay(self):
+        """Show (or remove) the coverage heat-map on States, StateMachines and transitions"""
+        coverage = self.simulator.coverage if self.simulator is not None else None
+        if coverage is None or not self.coverage_action.isChecked():
+            for node in self.nodes:
+                if node.coverage_color is not None:
+                    node.set_coverage_heat(None)
+            for edge in self._design_edges():
+                if edge.coverage_pen is not None:
+                    edge.set_coverage_heat(None)
+            return
         
-        return False
+        compiled = coverage.compiled
+        for state, heat in zip(compiled.states, coverage.state_heat()):
+            item = self.simulator_items.get(state.id)
+            if item is not None:
+                item.set_coverage_heat(heat)
+        transition_heat = coverage.transition_heat()
+        for edge, index in self.simulator_edge_index.items():
+            edge.set_coverage_heat(transition_heat[index] if compiled.target[index] >= 0 else None)
+    
+    def export_coverage(self):
+        """Write the simulation coverage counts to a JSON file"""
+        if self.simulator is None or self.simulator.coverage is None:
+            self.statusBar().showMessage("Turn on Simulator mode to measure coverage", 2000)
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Export Coverage",
+            "",
+            "JSON Files (*.json);;All Files (*)"
+        )
+        if not file_path:
+            return
+        if not file_path.endswith('.json'):
+            file_path += '.json'
+        coverage = self.simulator.coverage
+        try:
+            coverage.save(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export coverage: {str(e)}")
+            return
+        summary = coverage.summary()
+        self.statusBar().showMessage(
+            f"Coverage: {summary['states_covered']}/{summary['states']} states, "
+            f"{summary['transitions_covered']}/{summary['transitions']} transitions - saved to {file_path}", 5000)
+    
+    def reset_coverage(self):
+        """Zero the coverage counters (the current configuration stays active)"""
+        if self.simulator is not None and self.simulator.coverage is not None:
+            self.simulator.coverage.reset()
+            self.refresh_coverage_overlay()
+    
+    def save_trace(self):
+        """Save the trace shown in the Trace panel"""
+        trace = self.trace_panel.trace
+        if trace is None:
+            self.statusBar().showMessage("No trace recorded - turn on Simulator mode first", 2000)
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Trace",
+            "",
+            "Simulation Traces (*.smtrace);;All Files (*)"
+        )
+        if not file_path:
+            return
+        if not file_path.endswith('.smtrace'):
+            file_path += '.smtrace'
+        try:
+            trace.save(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to save trace: {str(e)}")
+            return
+        self.statusBar().showMessage(f"Saved {len(trace):,} step(s) to {file_path}", 3000)
+    
+    def open_trace(self):
+        """Load a saved trace into the Trace panel for scrubbing"""
+        if not self.simulator_mode:
+            self.statusBar().showMessage("Turn on Simulator mode to open a trace", 2000)
+            return
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Open Trace",
+            "",
+            "Simulation Traces (*.smtrace);;All Files (*)"
+        )
+        if not file_path:
+            return
+        try:
+            trace = Trace.load(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to open trace: {str(e)}")
+            return
+        self.trace_panel.set_trace(trace, live=False)
+        self.trace_panel.show()
+        missing = sum(1 for item in self.trace_panel.items if item is None)
+        message = f"Opened {len(trace):,} step(s) from {file_path}"
+        if missing:
+            message += f" ({missing} state(s) not found in this design)"
+        self.statusBar().showMessage(message, 5000)
     
     def handle_transition_click(self, edge):
         """Handle clicking on an edge control point to trigger a transition"""
-        if not self.simulator_mode:
+        if not self.simulator_mode or self.simulator is None:
             return
         
-        # Get source and target nodes from the edge
         from edge import Edge
-        if not isinstance(edge, Edge):
+        if not isinstance(edge, Edge) or edge not in self.simulator_edge_index:
             return
         
-        # Get the title of the clicked edge
+        # The edge title is the event; an untitled edge only triggers itself
         edge_title = edge.title_item.toPlainText() if hasattr(edge, 'title_item') else ""
-        
-        # Find all edges with the same title
-        edges_to_trigger = []
-        edges_list = self.scene.edges if hasattr(self.scene, 'edges') else self.edges
-        
-        for e in edges_list:
-            if isinstance(e, Edge) and hasattr(e, 'title_item'):
-                e_title = e.title_item.toPlainText()
-                if e_title and e_title == edge_title:
-                    edges_to_trigger.append(e)
-        
-        # If no title, just trigger the clicked edge
-        if not edge_title:
-            edges_to_trigger = [edge]
-        
-        # First pass: Validate all edges and collect valid transitions
-        # This ensures we evaluate all transitions based on the CURRENT state,
-        # not after other transitions have executed
-        valid_transitions = []
-        
-        for e in edges_to_trigger:
-            source_node = e._start_node
-            target_node = e._end_node
-            
-            if not source_node or not target_node:
-                continue
-            
-            # Check if target is a State or StateMachine
-            if target_node.node_type not in ["State", "StateMachine"]:
-                continue
-            
-            # Validate that the transition is valid from current state
-            if self.is_transition_valid(source_node):
-                valid_transitions.append((target_node, source_node))
-        
-        # Second pass: Execute all valid transitions
-        triggered_count = len(valid_transitions)
-        for target_node, source_node in valid_transitions:
-            self.transition_to_state(target_node)
+        if edge_title:
+            triggered_count = self.simulator.dispatch(edge_title)
+        else:
+            transition = self.simulator.model.transitions[self.simulator_edge_index[edge]]
+            triggered_count = self.simulator.fire([transition])
         
         # Update status message
         if triggered_count == 0:
@@ -2383,34 +3107,6 @@ class NodeEditorWindow(QMainWindow):
         elif triggered_count > 1:
             self.statusBar().showMessage(f"Triggered {triggered_count} transitions with title '{edge_title}'", 2000)
     
-    def is_transition_valid(self, source_node):
-        """Check if a transition from source_node is valid given current state"""
-        if not hasattr(self, 'current_states') or not source_node:
-            return False
-        
-        # Find which StateMachine the source belongs to
-        statemachine = self.find_parent_statemachine(source_node)
-        if statemachine is None:
-            return False
-        
-        # Get current state for this StateMachine
-        current_state = self.current_states.get(statemachine)
-        if not current_state:
-            return False
-        
-        # The transition is valid if:
-        # 1. We are exactly in the source state, OR
-        # 2. We are in a descendant of the source state (child, grandchild, etc.)
-        
-        # Check if current state is the source or a descendant of source
-        node = current_state
-        while node:
-            if node == source_node:
-                return True
-            node = node.parent_node if hasattr(node, 'parent_node') else None
-        
-        return False
-    
     def record_node_movement(self, node, old_pos, new_pos):
         """Record a node movement for undo functionality"""
         # Add to undo stack
@@ -2624,6 +3320,44 @@ class NodeEditorWindow(QMainWindow):
         if hasattr(self, 'redo_stack'):
             self.redo_stack.clear()
     
+    @contextmanager
+    def batched_scene_update(self, description):
+        """Group every action recorded inside the block into a single undo step.
+        
+        View repaints are suspended until the block finishes so that bulk edits
+        over large selections are drawn once instead of once per item.
+        """
+        outer_stack = self.undo_stack
+        outer_limit = self.max_undo_stack_size
+        # Collect sub-steps on a private stack; the limit applies to the batch as a whole
+        self.undo_stack = []
+        self.max_undo_stack_size = float('inf')
+        self.view.setUpdatesEnabled(False)
+        try:
+            yield
+        finally:
+            sub_actions = self.undo_stack
+            self.undo_stack = outer_stack
+            self.max_undo_stack_size = outer_limit
+            self.view.setUpdatesEnabled(True)
+            self.view.viewport().update()
+            
+            if len(sub_actions) == 1:
+                self.undo_stack.append(sub_actions[0])
+            elif sub_actions:
+                self.undo_stack.append({
+                    'type': 'batch',
+                    'description': description,
+                    'actions': sub_actions
+                })
+            
+            if sub_actions:
+                # Limit stack size
+                if len(self.undo_stack) > self.max_undo_stack_size:
+                    self.undo_stack.pop(0)
+                if hasattr(self, 'redo_stack'):
+                    self.redo_stack.clear()
+    
     def undo_action_method(self):
         """Undo the last action"""
         if not self.undo_stack:
@@ -2640,9 +3374,41 @@ class NodeEditorWindow(QMainWindow):
         
         # Get the last action from the stack
         action = self.undo_stack.pop()
+        if not self._undo_action(action):
+            return
+        
+        # After successful undo, push this action onto the redo stack
+        if hasattr(self, 'redo_stack'):
+            self.redo_stack.append(action)
+            if len(self.redo_stack) > self.max_undo_stack_size:
+                self.redo_stack.pop(0)
+
+        # Signal the undo action
+        if hasattr(self, 'action_monitor'):
+            # Add undo action type if not already present
+            if 'undo' not in self.action_monitor.actions:
+                self.action_monitor.add_action_type('undo', QColor("#9B59B6"), 300)  # Purple
+            self.action_monitor.signal_action('undo')
+
+    def _undo_action(self, action):
+        """Revert a single recorded action. Returns True if it was undone."""
         action_type = action['type']
         
-        if action_type == 'node_move':
+        if action_type == 'batch':
+            # Undo the grouped steps in reverse order so that restored nodes exist
+            # again before the edges that were recorded against them
+            self._replaying_batches.append(action)
+            self.view.setUpdatesEnabled(False)
+            try:
+                for sub_action in reversed(action['actions']):
+                    if self.validate_undo_action(sub_action):
+                        self._undo_action(sub_action)
+            finally:
+                self._replaying_batches.pop()
+                self.view.setUpdatesEnabled(True)
+            self.statusBar().showMessage(f"Undone: {action['description']}", 2000)
+        
+        elif action_type == 'node_move':
             node = action['node']
             old_pos = action['old_pos']
             
@@ -2664,7 +3430,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage(f"Undone: Node moved back to previous position", 2000)
             else:
                 self.statusBar().showMessage("Cannot undo: Node no longer exists", 2000)
-                return
+                return False
         
         elif action_type == 'node_create':
             # Undo node creation by deleting the node
@@ -2681,9 +3447,7 @@ class NodeEditorWindow(QMainWindow):
                 # Remove all edges connected to this node
                 edges_to_remove = []
                 if hasattr(self.scene, 'edges') and self.scene.edges:
-                    for edge in self.scene.edges[:]:
-                        if edge._start_node == node or edge._end_node == node:
-                            edges_to_remove.append(edge)
+                    edges_to_remove = self.scene.edges.edges_of(node)
                 
                 for edge in edges_to_remove:
                     # Remove from scene's edges list
@@ -2708,7 +3472,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage(f"Undone: Node '{node.title}' creation deleted", 2000)
             else:
                 self.statusBar().showMessage("Cannot undo: Node already deleted", 2000)
-                return
+                return False
         
         elif action_type == 'node_delete':
             # Undo node deletion by recreating the node
@@ -2822,7 +3586,7 @@ class NodeEditorWindow(QMainWindow):
                         
                         # Add to edges list
                         if not hasattr(self.scene, 'edges'):
-                            self.scene.edges = []
+                            self.scene.edges = SceneEdgeIndex()
                         self.scene.edges.append(edge)
             
             self.statusBar().showMessage(f"Undone: Node '{node_data['title']}' and {len(action.get('connected_edges', []))} edge(s) restored", 2000)
@@ -2840,11 +3604,12 @@ class NodeEditorWindow(QMainWindow):
                 # Restore the original title (set_node_type may have changed it)
                 node.title = old_title
                 node.title_item.setPlainText(old_title)
+                node._notify_search_index()
                 type_name = old_type if old_type else "None"
                 self.statusBar().showMessage(f"Undone: Node type restored to {type_name}", 2000)
             else:
                 self.statusBar().showMessage("Cannot undo: Node no longer exists", 2000)
-                return
+                return False
         
         elif action_type == 'node_resize':
             # Undo node resize
@@ -2856,15 +3621,11 @@ class NodeEditorWindow(QMainWindow):
                 # print(f"[DEBUG] UNDO node resize: '{node.title}' from size ({new_rect.width():.2f}, {new_rect.height():.2f}) back to ({old_rect.width():.2f}, {old_rect.height():.2f}) at position ({node.pos().x():.2f}, {node.pos().y():.2f})")
                 
                 # Restore the old rect
-                node.prepareGeometryChange()
-                node.rect = old_rect
-                if hasattr(node, 'update_handles'):
-                    node.update_handles()
-                node.update()
+                node.set_rect(old_rect)
                 self.statusBar().showMessage(f"Undone: Node '{node.title}' resized back", 2000)
             else:
                 self.statusBar().showMessage("Cannot undo: Node no longer exists", 2000)
-                return
+                return False
         
         elif action_type == 'node_initial_change':
             node = action['node']
@@ -2875,7 +3636,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage(f"Undone: Node marked as {state_text}", 2000)
             else:
                 self.statusBar().showMessage("Cannot undo: Node no longer exists", 2000)
-                return
+                return False
 
         
         elif action_type == 'edge_create':
@@ -2902,7 +3663,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage(f"Undone: Edge creation deleted", 2000)
             else:
                 self.statusBar().showMessage("Cannot undo: Edge already deleted", 2000)
-                return
+                return False
         
         elif action_type == 'edge_delete':
             # Undo edge deletion by recreating the edge
@@ -2956,14 +3717,14 @@ class NodeEditorWindow(QMainWindow):
                 
                 # Add to edges list
                 if not hasattr(self.scene, 'edges'):
-                    self.scene.edges = []
+                    self.scene.edges = SceneEdgeIndex()
                 self.scene.edges.append(edge)
                 
                 self.statusBar().showMessage(f"Undone: Edge '{edge_data['title']}' restored", 2000)
                 action['restored_edge'] = edge
             else:
                 self.statusBar().showMessage("Cannot undo: Connected nodes no longer exist", 2000)
-                return
+                return False
         
         elif action_type == 'edge_connection_change':
             # Undo edge connection point change
@@ -2987,7 +3748,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage(f"Undone: Edge {point_name} connection point restored", 2000)
             else:
                 self.statusBar().showMessage("Cannot undo: Edge no longer exists", 2000)
-                return
+                return False
         
         elif action_type == 'edge_waypoint_change':
             # Undo edge waypoint adjustment
@@ -3004,7 +3765,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage(f"Undone: Edge waypoint adjusted back", 2000)
             else:
                 self.statusBar().showMessage("Cannot undo: Edge no longer exists", 2000)
-                return
+                return False
         
         elif action_type == 'node_title_change':
             # Undo node title change
@@ -3016,10 +3777,11 @@ class NodeEditorWindow(QMainWindow):
                 node.title = old_title
                 node.title_item.setPlainText(old_title)
                 node.update()
+                node._notify_search_index()
                 self.statusBar().showMessage(f"Undone: Node title restored to '{old_title}'", 2000)
             else:
                 self.statusBar().showMessage("Cannot undo: Node no longer exists", 2000)
-                return
+                return False
         
         elif action_type == 'edge_title_change':
             # Undo edge title change
@@ -3032,7 +3794,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage(f"Undone: Edge title restored to '{old_title}'", 2000)
             else:
                 self.statusBar().showMessage("Cannot undo: Edge no longer exists", 2000)
-                return
+                return False
         
         elif action_type == 'node_reparent':
             # Undo node reparenting
@@ -3081,20 +3843,9 @@ class NodeEditorWindow(QMainWindow):
                     node._checking_parent = False
             else:
                 self.statusBar().showMessage("Cannot undo: Node no longer exists", 2000)
-                return
+                return False
         
-        # After successful undo, push this action onto the redo stack
-        if hasattr(self, 'redo_stack'):
-            self.redo_stack.append(action)
-            if len(self.redo_stack) > self.max_undo_stack_size:
-                self.redo_stack.pop(0)
-
-        # Signal the undo action
-        if hasattr(self, 'action_monitor'):
-            # Add undo action type if not already present
-            if 'undo' not in self.action_monitor.actions:
-                self.action_monitor.add_action_type('undo', QColor("#9B59B6"), 300)  # Purple
-            self.action_monitor.signal_action('undo')
+        return True
 
     def redo_action_method(self):
         """Redo the last undone action"""
@@ -3103,9 +3854,37 @@ class NodeEditorWindow(QMainWindow):
             return
 
         action = self.redo_stack.pop()
+        if not self._redo_action(action):
+            return
+
+        # After successful redo, push this action back onto the undo stack
+        if hasattr(self, 'undo_stack'):
+            self.undo_stack.append(action)
+            if len(self.undo_stack) > self.max_undo_stack_size:
+                self.undo_stack.pop(0)
+
+        if hasattr(self, 'action_monitor'):
+            if 'redo' not in self.action_monitor.actions:
+                self.action_monitor.add_action_type('redo', QColor("#1ABC9C"), 300)
+            self.action_monitor.signal_action('redo')
+
+    def _redo_action(self, action):
+        """Re-apply a single undone action. Returns True if it was redone."""
         action_type = action['type']
 
-        if action_type == 'node_move':
+        if action_type == 'batch':
+            # Replay the grouped steps in their original order
+            self._replaying_batches.append(action)
+            self.view.setUpdatesEnabled(False)
+            try:
+                for sub_action in action['actions']:
+                    self._redo_action(sub_action)
+            finally:
+                self._replaying_batches.pop()
+                self.view.setUpdatesEnabled(True)
+            self.statusBar().showMessage(f"Redone: {action['description']}", 2000)
+
+        elif action_type == 'node_move':
             node = action['node']
             old_pos = action['old_pos']
             new_pos = action['new_pos']
@@ -3126,7 +3905,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage("Redone: Node moved to new position", 2000)
             else:
                 self.statusBar().showMessage("Cannot redo: Node no longer exists", 2000)
-                return
+                return False
 
         elif action_type == 'node_create':
             node = action['node']
@@ -3135,7 +3914,7 @@ class NodeEditorWindow(QMainWindow):
 
             if node.scene() == self.scene:
                 self.statusBar().showMessage("Cannot redo: Node already exists", 2000)
-                return
+                return False
 
             if parent:
                 parent.add_child_node(node, pos=position)
@@ -3155,7 +3934,7 @@ class NodeEditorWindow(QMainWindow):
 
             if not node or node.scene() != self.scene:
                 self.statusBar().showMessage("Cannot redo: Node no longer exists", 2000)
-                return
+                return False
 
             title = getattr(node, 'title', node_data.get('title', ""))
             # print(f"[DEBUG] REDO node delete: Deleting node '{title}' at position ({node.pos().x():.2f}, {node.pos().y():.2f})")
@@ -3172,7 +3951,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage(f"Redone: Node type changed to {type_name}", 2000)
             else:
                 self.statusBar().showMessage("Cannot redo: Node no longer exists", 2000)
-                return
+                return False
 
         elif action_type == 'node_resize':
             node = action['node']
@@ -3182,15 +3961,11 @@ class NodeEditorWindow(QMainWindow):
                 old_rect = action['old_rect']
                 # print(f"[DEBUG] REDO node resize: '{node.title}' from size ({old_rect.width():.2f}, {old_rect.height():.2f}) to ({new_rect.width():.2f}, {new_rect.height():.2f}) at position ({node.pos().x():.2f}, {node.pos().y():.2f})")
                 
-                node.prepareGeometryChange()
-                node.rect = new_rect
-                if hasattr(node, 'update_handles'):
-                    node.update_handles()
-                node.update()
+                node.set_rect(new_rect)
                 self.statusBar().showMessage(f"Redone: Node '{node.title}' resized", 2000)
             else:
                 self.statusBar().showMessage("Cannot redo: Node no longer exists", 2000)
-                return
+                return False
 
         elif action_type == 'node_initial_change':
             node = action['node']
@@ -3201,7 +3976,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage(f"Redone: Node marked as {state_text}", 2000)
             else:
                 self.statusBar().showMessage("Cannot redo: Node no longer exists", 2000)
-                return
+                return False
 
         elif action_type == 'edge_create':
             from edge import Edge
@@ -3211,11 +3986,11 @@ class NodeEditorWindow(QMainWindow):
 
             if not start_node or not end_node:
                 self.statusBar().showMessage("Cannot redo: Connected nodes no longer exist", 2000)
-                return
+                return False
 
             if start_node.scene() != self.scene or end_node.scene() != self.scene:
                 self.statusBar().showMessage("Cannot redo: Connected nodes no longer exist", 2000)
-                return
+                return False
 
             if edge.scene() != self.scene:
                 edge.set_start_node(start_node)
@@ -3223,7 +3998,7 @@ class NodeEditorWindow(QMainWindow):
                 self.scene.addItem(edge)
                 edge.create_control_points(self.scene)
                 if not hasattr(self.scene, 'edges'):
-                    self.scene.edges = []
+                    self.scene.edges = SceneEdgeIndex()
                 if edge not in self.scene.edges:
                     self.scene.edges.append(edge)
 
@@ -3235,7 +4010,7 @@ class NodeEditorWindow(QMainWindow):
 
             if not edge or edge.scene() != self.scene:
                 self.statusBar().showMessage("Cannot redo: Edge no longer exists", 2000)
-                return
+                return False
 
             title = edge.title_item.toPlainText() if edge.title_item else edge_data.get('title', "")
             edge.delete_edge(record_for_undo=False)
@@ -3259,7 +4034,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage(f"Redone: Edge {point_name} connection point changed", 2000)
             else:
                 self.statusBar().showMessage("Cannot redo: Edge no longer exists", 2000)
-                return
+                return False
 
         elif action_type == 'edge_waypoint_change':
             edge = action['edge']
@@ -3271,7 +4046,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage("Redone: Edge waypoint adjusted", 2000)
             else:
                 self.statusBar().showMessage("Cannot redo: Edge no longer exists", 2000)
-                return
+                return False
 
         elif action_type == 'node_title_change':
             node = action['node']
@@ -3281,10 +4056,11 @@ class NodeEditorWindow(QMainWindow):
                 node.title = new_title
                 node.title_item.setPlainText(new_title)
                 node.update()
+                node._notify_search_index()
                 self.statusBar().showMessage(f"Redone: Node title changed to '{new_title}'", 2000)
             else:
                 self.statusBar().showMessage("Cannot redo: Node no longer exists", 2000)
-                return
+                return False
 
         elif action_type == 'edge_title_change':
             edge = action['edge']
@@ -3295,7 +4071,7 @@ class NodeEditorWindow(QMainWindow):
                 self.statusBar().showMessage(f"Redone: Edge title changed to '{new_title}'", 2000)
             else:
                 self.statusBar().showMessage("Cannot redo: Edge no longer exists", 2000)
-                return
+                return False
         
         elif action_type == 'node_reparent':
             # Redo node reparenting
@@ -3344,22 +4120,13 @@ class NodeEditorWindow(QMainWindow):
                     node._checking_parent = False
             else:
                 self.statusBar().showMessage("Cannot redo: Node no longer exists", 2000)
-                return
+                return False
 
         else:
             self.statusBar().showMessage("Cannot redo: Unknown action type", 2000)
-            return
-
-        # After successful redo, push this action back onto the undo stack
-        if hasattr(self, 'undo_stack'):
-            self.undo_stack.append(action)
-            if len(self.undo_stack) > self.max_undo_stack_size:
-                self.undo_stack.pop(0)
+            return False
 
-        if hasattr(self, 'action_monitor'):
-            if 'redo' not in self.action_monitor.actions:
-                self.action_monitor.add_action_type('redo', QColor("#1ABC9C"), 300)
-            self.action_monitor.signal_action('redo')
+        return True
     
     def delete_selected_items(self):
         """Delete all selected items (nodes and edges)"""
@@ -3371,12 +4138,217 @@ class NodeEditorWindow(QMainWindow):
         from edge import Edge
         
         selected_items = self.scene.selectedItems()
+        nodes = [item for item in selected_items if isinstance(item, Node)]
+        edges = [item for item in selected_items if isinstance(item, Edge)]
+        
+        if not nodes and not edges:
+            return
+        
+        with self.batched_scene_update(f"Deleted {len(nodes)} node(s) and {len(edges)} edge(s)"):
+            self.delete_items(nodes, edges)
+    
+    def _topmost_nodes(self, nodes):
+        """Return the given nodes without those whose ancestor is also in the set."""
+        node_set = set(nodes)
+        topmost = []
+        for node in dict.fromkeys(nodes):
+            parent = node.parent_node
+            while parent is not None and parent not in node_set:
+                parent = parent.parent_node
+            if parent is None:
+                topmost.append(node)
+        return topmost
+    
+    def delete_items(self, nodes, edges=(), record_for_undo=True):
+        """Delete many nodes and edges in a single pass.
+        
+        Affected edges are collected once from the scene's adjacency index rather
+        than by scanning every edge in the scene per node, and the nodes list is
+        rebuilt once at the end instead of removing entries one at a time.
+        """
+        roots = self._topmost_nodes(nodes)
+        
+        # Every node that disappears: the roots plus all of their descendants
+        removed_nodes = set()
+        pending = list(roots)
+        while pending:
+            node = pending.pop()
+            removed_nodes.add(node)
+            pending.extend(node.child_nodes)
+        
+        # Edges recorded for undo are the selected ones and those touching a root;
+        # edges of nested children go away silently, as with a single delete_node()
+        edge_index = self.scene.edges
+        recorded_edges = dict.fromkeys(edges)
+        for root in roots:
+            recorded_edges.update(dict.fromkeys(edge_index.edges_of(root)))
+        silent_edges = dict.fromkeys(
+            edge for node in removed_nodes for edge in edge_index.edges_of(node)
+            if edge not in recorded_edges
+        )
+        
+        # Delete edges first so undo restores the nodes before their edges
+        for edge in list(recorded_edges):
+            edge.delete_edge(record_for_undo=record_for_undo)
+        for edge in list(silent_edges):
+            edge.delete_edge(record_for_undo=False)
+        
+        for root in roots:
+            if record_for_undo:
+                self.record_node_deletion(root)
+            if root.parent_node and root in root.parent_node.child_nodes:
+                root.parent_node.child_nodes.remove(root)
+            # Removing the root also takes its child items out of the scene
+            if root.scene() is not None:
+                self.scene.removeItem(root)
+        
+        if removed_nodes:
+            self.nodes[:] = [node for node in self.nodes if node not in removed_nodes]
+        
+        return True
+    
+    def move_selected_items(self, dx, dy):
+        """Move all selected nodes by (dx, dy) as a single undo step"""
+        if self.simulator_mode:
+            self.statusBar().showMessage("Cannot move nodes in Simulator mode", 2000)
+            return
+        
+        nodes = [item for item in self.scene.selectedItems() if isinstance(item, Node)]
+        if not nodes:
+            return
+        
+        self.move_items_by(nodes, dx, dy)
+    
+    def move_items_by(self, nodes, dx, dy):
+        """Move nodes by a delta; children follow their moved ancestors."""
+        # Entry, Exit, and Run nodes are pinned to their parent's corners
+        roots = [node for node in self._topmost_nodes(nodes)
+                 if node.node_type not in ["Entry", "Exit", "Run"]]
+        if not roots:
+            return
+        
+        delta = QPointF(dx, dy)
+        with self.batched_scene_update(f"Moved {len(roots)} node(s)"):
+            for node in roots:
+                old_pos = QPointF(node.pos())
+                node.position_before_move = None
+                node.setPos(old_pos + delta)
+                # Programmatic move - don't let the next mouse release treat it as a drag
+                node.is_being_moved = False
+                self.record_node_movement(node, old_pos, node.pos())
+        
+        self.statusBar().showMessage(f"Moved {len(roots)} node(s)", 2000)
+    
+    def _on_scene_changed(self, _regions):
+        if not self._scene_bounds_timer.isActive():
+            self._scene_bounds_timer.start()
+        if self.analysis_panel.isVisible() and not self._analysis_timer.isActive():
+            self._analysis_timer.start()
+    
+    def _on_analysis_visibility(self, visible):
+        if visible:
+            self.analysis_panel.refresh()
+        else:
+            self._analysis_timer.stop()
+            self.analysis_panel.show_conflicts({})
+    
+    def update_scene_bounds(self):
+        """Grow the scene rect so it covers all items plus a margin (it never shrinks while editing)"""
+        content = self.scene.itemsBoundingRect()
+        if content.isNull():
+            return
+        margin = self.SCENE_MARGIN
+        wanted = self.scene.sceneRect().united(content.adjusted(-margin, -margin, margin, margin))
+        if wanted != self.scene.sceneRect():
+            self.scene.setSceneRect(wanted)
+    
+    def reset_scene_bounds(self):
+        """Shrink the scene rect back to the default, then fit it to the current content"""
+        self.scene.setSceneRect(self.DEFAULT_SCENE_RECT)
+        self.update_scene_bounds()
+    
+    def update_search_entry(self, item):
+        """Index (or re-index) a node or edge for the Find panel"""
+        if isinstance(item, Node):
+            parent = item.parentItem()
+            text_box = getattr(item, 'text_box', None)
+            self.search_index.set_entry(
+                id(item), 'node', item.title, item.node_type,
+                text_box.toPlainText() if text_box else "",
+                id(parent) if isinstance(parent, Node) else None,
+                item)
+        elif isinstance(item, Edge):
+            start_node = item._start_node
+            self.search_index.set_entry(
+                id(item), 'edge', item.title_item.toPlainText() if item.title_item else "",
+                None, "", id(start_node) if start_node is not None else None, item)
+    
+    def search_design(self, query, limit=50):
+        """Search the design, dropping index entries for items no longer in the scene"""
+        while True:
+            results = self.search_index.search(query, limit)
+            stale = [result.key for result in results
+                     if result.item is None or result.item.scene() is not self.scene]
+            if not stale:
+                return results
+            for key in stale:
+                self.search_index.remove(key)
+    
+    def jump_to_item(self, item):
+        """Center the view on a node or edge and select it"""
+        if item.scene() is not self.scene:
+            return
+        self.scene.clearSelection()
+        item.setSelected(True)
+        self.view.centerOn(item)
+        title = item.title if isinstance(item, Node) else item.title_item.toPlainText()
+        self.statusBar().showMessage(f"Found '{title}'", 2000)
+    
+    def auto_layout_selected(self):
+        """Auto-layout the selected containers, or the whole design if none are selected"""
+        if self.simulator_mode:
+            self.statusBar().showMessage("Cannot change the layout in Simulator mode", 2000)
+            return
         
-        for item in selected_items:
-            if isinstance(item, Edge):
-                item.delete_edge()
-            elif isinstance(item, Node):
-                self.delete_node(item)
+        selected = [item for item in self.scene.selectedItems() if isinstance(item, Node) and item.child_nodes]
+        self.auto_layout(self._topmost_nodes(selected) or None)
+    
+    def auto_layout(self, containers=None):
+        """Lay out the children of containers (all when None) as one undoable step"""
+        design_data = self.serialize_design()
+        container_ids = [id(node) for node in containers] if containers else None
+        placements = compute_layout(design_data['nodes'], design_data['edges'], container_ids)
+        if not placements:
+            self.statusBar().showMessage("Nothing to lay out", 2000)
+            return
+        
+        nodes_by_id = self._nodes_by_id()
+        
+        changed = 0
+        with self.batched_scene_update("Auto layout"):
+            # Placements are ordered children-first, so containers grow around laid-out content
+            for node_id, placement in placements.items():
+                node = nodes_by_id.get(node_id)
+                if node is None:
+                    continue
+                new_rect = QRectF(node.rect.x(), node.rect.y(), placement.width, placement.height)
+                if new_rect != node.rect:
+                    old_rect = QRectF(node.rect)
+                    node.set_rect(new_rect)
+                    self.record_node_resize(node, old_rect, new_rect)
+                    changed += 1
+                # Entry/Exit/Run follow their container's corners
+                if node.node_type in ["Entry", "Exit", "Run"]:
+                    continue
+                new_pos = QPointF(placement.x, placement.y)
+                if new_pos != node.pos():
+                    old_pos = node.pos()
+                    node.setPos(new_pos)
+                    node.is_being_moved = False
+                    self.record_node_movement(node, old_pos, new_pos)
+                    changed += 1
+        
+        self.statusBar().showMessage(f"Auto layout: {changed} change(s) to {len(placements)} node(s)", 2000)
     
     def new_design(self):
         """Clear the current design and start fresh"""
@@ -3395,6 +4367,7 @@ class NodeEditorWindow(QMainWindow):
         
         # Clear the scene
         self.scene.clear()
+        self.search_index.clear()
         
         # Clear nodes list
         self.nodes.clear()
@@ -3403,7 +4376,7 @@ class NodeEditorWindow(QMainWindow):
         if hasattr(self.scene, 'edges'):
             self.scene.edges.clear()
         else:
-            self.scene.edges = []
+            self.scene.edges = SceneEdgeIndex()
         
         if hasattr(self, 'edges'):
             self.edges.clear()
@@ -3417,10 +4390,104 @@ class NodeEditorWindow(QMainWindow):
         # Clear current file and update window title
         self.current_file = None
         self.update_window_title()
+        self.reset_scene_bounds()
         
         # Update status bar
         self.statusBar().showMessage("New design created")
     
+    def _nodes_by_id(self):
+        """Map id(node) (the saved node ID) to every node in the design"""
+        nodes_by_id = {}
+        pending = list(self.nodes)
+        while pending:
+            node = pending.pop()
+            nodes_by_id[id(node)] = node
+            pending.extend(node.child_nodes)
+        return nodes_by_id
+    
+    def _design_edges(self):
+        """The edges that make up the design, in saved order"""
+        if hasattr(self.scene, 'edges') and self.scene.edges:
+            return self.scene.edges
+        if hasattr(self, 'edges') and self.edges:
+            return self.edges
+        return []
+    
+    def serialize_design(self):
+        """Return the current design as a JSON-serializable dict (the saved file format)"""
+        # Collect all nodes recursively (including children)
+        def collect_all_nodes(node_list):
+            all_nodes = []
+            for node in node_list:
+                all_nodes.append(node)
+                # Recursively collect child nodes
+                if hasattr(node, 'child_nodes') and node.child_nodes:
+                    all_nodes.extend(collect_all_nodes(node.child_nodes))
+            return all_nodes
+        
+        all_nodes = collect_all_nodes(self.nodes)
+        
+        # Serialize nodes
+        nodes_data = []
+        for node in all_nodes:
+            # For child nodes, pos() is already in parent's local coordinates
+            # For top-level nodes, pos() is in scene coordinates
+            node_data = {
+                'title': node.title,
+                'pos': {'x': node.pos().x(), 'y': node.pos().y()},
+                'rect': {
+                    'x': node.rect.x(),
+                    'y': node.rect.y(),
+                    'width': node.rect.width(),
+                    'height': node.rect.height()
+                },
+                'node_type': getattr(node, 'node_type', None),
+                'is_container': node.is_container,
+                'is_initial': getattr(node, 'is_initial', False),
+                'parent_id': id(node.parent_node) if hasattr(node, 'parent_node') and node.parent_node else None,
+                'id': id(node),  # Use object id as unique identifier
+                'user_text': getattr(node, 'text_box', None).toPlainText() if hasattr(node, 'text_box') and node.text_box else ""
+            }
+            nodes_data.append(node_data)
+        
+        # Serialize edges (check both self.edges and self.scene.edges)
+        edges_data = []
+        edges_list = self._design_edges()
+        
+        if edges_list:
+            for edge in edges_list:
+                # Save control point offsets for accurate positioning
+                start_offset = None
+                end_offset = None
+                
+                if hasattr(edge, 'start_offset') and edge.start_offset:
+                    start_offset = {'x': edge.start_offset.x(), 'y': edge.start_offset.y()}
+                elif hasattr(edge, 'start_control') and edge.start_control and hasattr(edge.start_control, 'offset'):
+                    start_offset = {'x': edge.start_control.offset.x(), 'y': edge.start_control.offset.y()}
+                
+                if hasattr(edge, 'end_offset') and edge.end_offset:
+                    end_offset = {'x': edge.end_offset.x(), 'y': edge.end_offset.y()}
+                elif hasattr(edge, 'end_control') and edge.end_control and hasattr(edge.end_control, 'offset'):
+                    end_offset = {'x': edge.end_control.offset.x(), 'y': edge.end_control.offset.y()}
+                
+                edge_data = {
+                    'start_node_id': id(edge._start_node) if edge._start_node else None,
+                    'end_node_id': id(edge._end_node) if edge._end_node else None,
+                    'title': edge.title_item.toPlainText() if hasattr(edge, 'title_item') else "",
+                    'waypoint_ratio': edge.waypoint_ratio if hasattr(edge, 'waypoint_ratio') else 0.5,
+                    'start_offset': start_offset,
+                    'end_offset': end_offset
+                }
+                edges_data.append(edge_data)
+        
+        # Create the design data structure with metadata
+        return {
+            'product': 'modeller',
+            'version': 'v1.1.0',
+            'nodes': nodes_data,
+            'edges': edges_data
+        }
+
     def save_design(self):
         """Save the current design to a JSON file"""
         file_path, _ = QFileDialog.getSaveFileName(
@@ -3434,82 +4501,7 @@ class NodeEditorWindow(QMainWindow):
             return
         
         try:
-            # Collect all nodes recursively (including children)
-            def collect_all_nodes(node_list):
-                all_nodes = []
-                for node in node_list:
-                    all_nodes.append(node)
-                    # Recursively collect child nodes
-                    if hasattr(node, 'child_nodes') and node.child_nodes:
-                        all_nodes.extend(collect_all_nodes(node.child_nodes))
-                return all_nodes
-            
-            all_nodes = collect_all_nodes(self.nodes)
-            
-            # Serialize nodes
-            nodes_data = []
-            for node in all_nodes:
-                # For child nodes, pos() is already in parent's local coordinates
-                # For top-level nodes, pos() is in scene coordinates
-                node_data = {
-                    'title': node.title,
-                    'pos': {'x': node.pos().x(), 'y': node.pos().y()},
-                    'rect': {
-                        'x': node.rect.x(),
-                        'y': node.rect.y(),
-                        'width': node.rect.width(),
-                        'height': node.rect.height()
-                    },
-                    'node_type': getattr(node, 'node_type', None),
-                    'is_container': node.is_container,
-                    'is_initial': getattr(node, 'is_initial', False),
-                    'parent_id': id(node.parent_node) if hasattr(node, 'parent_node') and node.parent_node else None,
-                    'id': id(node),  # Use object id as unique identifier
-                    'user_text': getattr(node, 'text_box', None).toPlainText() if hasattr(node, 'text_box') and node.text_box else ""
-                }
-                nodes_data.append(node_data)
-            
-            # Serialize edges (check both self.edges and self.scene.edges)
-            edges_data = []
-            edges_list = None
-            if hasattr(self.scene, 'edges') and self.scene.edges:
-                edges_list = self.scene.edges
-            elif hasattr(self, 'edges') and self.edges:
-                edges_list = self.edges
-            
-            if edges_list:
-                for edge in edges_list:
-                    # Save control point offsets for accurate positioning
-                    start_offset = None
-                    end_offset = None
-                    
-                    if hasattr(edge, 'start_offset') and edge.start_offset:
-                        start_offset = {'x': edge.start_offset.x(), 'y': edge.start_offset.y()}
-                    elif hasattr(edge, 'start_control') and edge.start_control and hasattr(edge.start_control, 'offset'):
-                        start_offset = {'x': edge.start_control.offset.x(), 'y': edge.start_control.offset.y()}
-                    
-                    if hasattr(edge, 'end_offset') and edge.end_offset:
-                        end_offset = {'x': edge.end_offset.x(), 'y': edge.end_offset.y()}
-                    elif hasattr(edge, 'end_control') and edge.end_control and hasattr(edge.end_control, 'offset'):
-                        end_offset = {'x': edge.end_control.offset.x(), 'y': edge.end_control.offset.y()}
-                    
-                    edge_data = {
-                        'start_node_id': id(edge._start_node) if edge._start_node else None,
-                        'end_node_id': id(edge._end_node) if edge._end_node else None,
-                        'title': edge.title_item.toPlainText() if hasattr(edge, 'title_item') else "",
-                        'waypoint_ratio': edge.waypoint_ratio if hasattr(edge, 'waypoint_ratio') else 0.5,
-                        'start_offset': start_offset,
-                        'end_offset': end_offset
-                    }
-                    edges_data.append(edge_data)
-            
-            # Create the design data structure with metadata
-            design_data = {
-                'product': 'modeller',
-                'version': 'v1.1.0',
-                'nodes': nodes_data,
-                'edges': edges_data
-            }
+            design_data = self.serialize_design()
             
             # Write to file (mode 'w' truncates existing file first)
             # Explicitly truncate and write to ensure clean save
@@ -3548,13 +4540,14 @@ class NodeEditorWindow(QMainWindow):
             
             # Clear existing design
             self.scene.clear()
+            self.search_index.clear()
             self.nodes.clear()
             
             # Clear edges from both locations
             if hasattr(self.scene, 'edges'):
                 self.scene.edges.clear()
             else:
-                self.scene.edges = []
+                self.scene.edges = SceneEdgeIndex()
             
             if hasattr(self, 'edges'):
                 self.edges.clear()
@@ -3693,7 +4686,7 @@ class NodeEditorWindow(QMainWindow):
                     
                     # Add to edges list
                     if not hasattr(self.scene, 'edges'):
-                        self.scene.edges = []
+                        self.scene.edges = SceneEdgeIndex()
                     self.scene.edges.append(edge)
             
             # Clear undo/redo stacks for the new design
@@ -3705,6 +4698,7 @@ class NodeEditorWindow(QMainWindow):
             # Update current file and window title
             self.current_file = file_path
             self.update_window_title()
+            self.reset_scene_bounds()
             
             self.statusBar().showMessage(f"Design loaded from {file_path}")
             QMessageBox.information(self, "Success", "Design loaded successfully!")
@@ -3762,6 +4756,91 @@ class NodeEditorWindow(QMainWindow):
         reset_zoom_action.setShortcut("Ctrl+0")
         reset_zoom_action.triggered.connect(self.resetZoom)
 
+        view_menu.addSeparator()
+
+        # Find action
+        find_action = view_menu.addAction("Find...")
+        find_action.setShortcut("Ctrl+F")
+        find_action.triggered.connect(self.search_panel.focus_query)
+
+        # Auto layout action
+        layout_action = view_menu.addAction("Auto Layout")
+        layout_action.setShortcut("Ctrl+L")
+        layout_action.setToolTip("Lay out the selected containers (or the whole design) from their transitions")
+        layout_action.triggered.connect(self.auto_layout_selected)
+
+        # Overview (minimap) toggle
+        overview_action = self.minimap_dock.toggleViewAction()
+        overview_action.setText("Overview")
+        overview_action.setShortcut("Ctrl+M")
+        view_menu.addAction(overview_action)
+
+        # Design analysis panel toggle
+        analysis_action = self.analysis_panel.toggleViewAction()
+        analysis_action.setText("Analysis")
+        analysis_action.setShortcut("Ctrl+Shift+A")
+        analysis_action.setToolTip("Unreachable and sink states, initial-state problems and event conflicts")
+        view_menu.addAction(analysis_action)
+
+        # Simulator menu
+        simulator_menu = menubar.addMenu("&Simulator")
+
+        # Run event trace action
+        run_trace_action = simulator_menu.addAction("Run Event Trace...")
+        run_trace_action.setToolTip("Dispatch all events of a trace file in Simulator mode")
+        run_trace_action.triggered.connect(self.run_event_trace)
+
+        # Tick action: run the Run texts of the active states
+        tick_action = simulator_menu.addAction("Tick")
+        tick_action.setShortcut("F5")
+        tick_action.setToolTip("Run the Run actions of all active states once")
+        tick_action.triggered.connect(self.run_tick)
+
+        simulator_menu.addSeparator()
+
+        # Simulation clock: virtual time steps or real time
+        next_timer_action = simulator_menu.addAction("Advance to Next Timer")
+        next_timer_action.setShortcut("F6")
+        next_timer_action.triggered.connect(self.advance_to_next_timer)
+
+        advance_clock_action = simulator_menu.addAction("Advance Clock...")
+        advance_clock_action.setToolTip("Advance virtual time, firing timed events as their deadlines pass")
+        advance_clock_action.triggered.connect(lambda: self.advance_clock())
+
+        self.real_time_action = simulator_menu.addAction("Real-Time Clock")
+        self.real_time_action.setCheckable(True)
+        self.real_time_action.setToolTip("Fire timed events and Run ticks as wall-clock time passes")
+        self.real_time_action.toggled.connect(self.set_real_time_clock)
+
+        simulator_menu.addSeparator()
+
+        # Trace scrubber toggle and trace files
+        trace_panel_action = self.trace_panel.toggleViewAction()
+        trace_panel_action.setText("Trace")
+        trace_panel_action.setShortcut("Ctrl+T")
+        simulator_menu.addAction(trace_panel_action)
+
+        open_trace_action = simulator_menu.addAction("Open Trace...")
+        open_trace_action.triggered.connect(self.open_trace)
+
+        save_trace_action = simulator_menu.addAction("Save Trace...")
+        save_trace_action.triggered.connect(self.save_trace)
+
+        simulator_menu.addSeparator()
+
+        # Coverage heat-map and export
+        self.coverage_action = simulator_menu.addAction("Coverage Heat-Map")
+        self.coverage_action.setCheckable(True)
+        self.coverage_action.setShortcut("Ctrl+H")
+        self.coverage_action.setToolTip("Colour States and transitions by how often the simulation used them")
+        self.coverage_action.toggled.connect(lambda _checked: self.refresh_coverage_overlay())
+
+        export_coverage_action = simulator_menu.addAction("Export Coverage...")
+        export_coverage_action.triggered.connect(self.export_coverage)
+
+        reset_coverage_action = simulator_menu.addAction("Reset Coverage")
+        reset_coverage_action.triggered.connect(self.reset_coverage)
+
     def make_red_cross_circle_icon(self, size=24, cross_width=3, circle_width=2,
                                    cross_color=QColor("#ff3b30"), circle_color=QColor("#ff3b30")) -> QIcon:
         """Create a red cross inside a circle icon for toolbar buttons."""
@@ -4192,11 +5271,10 @@ class NodeEditorWindow(QMainWindow):
         if not node:
             return False
 
-        # Collect edges connected to this node
+        # Collect edges connected to this node from the scene's adjacency index
         connected_edges = []
         if hasattr(self.scene, 'edges') and self.scene.edges:
-            connected_edges = [edge for edge in self.scene.edges
-                               if edge._start_node == node or edge._end_node == node]
+            connected_edges = self.scene.edges.edges_of(node)
 
         # Delete connected edges first so undo can restore them individually
         for edge in connected_edges:
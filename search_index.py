@@ -0,0 +1,252 @@
+"""
+Search Index
+Incremental index over node titles, edge titles, node types and Entry/Exit/Run
+text used by the editor's Find panel. It has no Qt dependency so it can also be
+used on designs loaded outside the editor.
+"""
+
+import re
+from bisect import bisect_left, insort
+from typing import Dict, List, NamedTuple, Optional, Set
+
+# Separator used for hierarchy paths (matches the simulator status bar)
+PATH_SEPARATOR = " → "
+
+# Words inside titles and action text ("State12St" -> "state12st", "ev_3" -> "ev", "3")
+_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+
+
+class SearchEntry:
+    """A single indexed node or edge."""
+
+    __slots__ = ('key', 'kind', 'title', 'node_type', 'text', 'parent_key', 'item', 'terms')
+
+    def __init__(self, key, kind, title, node_type, text, parent_key, item):
+        self.key = key
+        self.kind = kind
+        self.title = title
+        self.node_type = node_type
+        self.text = text
+        self.parent_key = parent_key
+        self.item = item
+        self.terms = ()
+
+
+class SearchResult(NamedTuple):
+    """A search hit with its cached hierarchy path."""
+    key: int
+    kind: str
+    title: str
+    node_type: Optional[str]
+    path: str
+    score: int
+    item: object
+
+
+class DesignSearchIndex:
+    """Prefix and fuzzy search over the items of a design.
+
+    Entries are keyed by a stable ID (the editor uses ``id(item)``). Each entry
+    contributes lowercase terms to a sorted list, so prefix lookups are a binary
+    search. Hierarchy paths are memoized per entry and only the subtree below a
+    renamed or moved entry is invalidated.
+    """
+
+    def __init__(self):
+        self._entries: Dict[int, SearchEntry] = {}
+        self._children: Dict[int, Set[int]] = {}
+        self._path_cache: Dict[int, str] = {}
+        self._terms: List[tuple] = []  # sorted (term, key) pairs
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def clear(self):
+        """Remove every entry."""
+        self._entries.clear()
+        self._children.clear()
+        self._path_cache.clear()
+        self._terms.clear()
+
+    def set_entry(self, key, kind, title, node_type=None, text="", parent_key=None, item=None):
+        """Insert or update an entry.
+
+        Only the terms of this entry are re-indexed; cached paths are dropped for
+        the entry and its descendants when its title or parent changes.
+        """
+        title = title or ""
+        text = text or ""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = SearchEntry(key, kind, title, node_type, text, parent_key, item)
+            self._entries[key] = entry
+            if parent_key is not None:
+                self._children.setdefault(parent_key, set()).add(key)
+            self._invalidate_paths(key)
+        else:
+            if entry.parent_key != parent_key:
+                self._unlink_child(entry)
+                entry.parent_key = parent_key
+                if parent_key is not None:
+                    self._children.setdefault(parent_key, set()).add(key)
+                self._invalidate_paths(key)
+            elif entry.title != title:
+                self._invalidate_paths(key)
+            entry.kind = kind
+            entry.title = title
+            entry.node_type = node_type
+            entry.text = text
+            entry.item = item
+
+        terms = self._make_terms(entry)
+        if terms != entry.terms:
+            self._remove_terms(entry)
+            entry.terms = terms
+            for term in terms:
+                insort(self._terms, (term, key))
+
+    def remove(self, key):
+        """Remove an entry; its descendants stay indexed until removed themselves."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._remove_terms(entry)
+        self._unlink_child(entry)
+        self._invalidate_paths(key)
+
+    def get(self, key) -> Optional[SearchEntry]:
+        return self._entries.get(key)
+
+    def path(self, key) -> Optional[str]:
+        """Hierarchy path of an entry (root title first), cached until invalidated."""
+        cached = self._path_cache.get(key)
+        if cached is not None:
+            return cached
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        # Walk up to the nearest ancestor with a cached path, then fill in downwards
+        chain = []
+        current = entry
+        prefix = None
+        while current is not None:
+            cached = self._path_cache.get(current.key)
+            if cached is not None:
+                prefix = cached
+                break
+            chain.append(current)
+            if current.parent_key is None:
+                break
+            current = self._entries.get(current.parent_key)
+
+        for node in reversed(chain):
+            prefix = node.title if prefix is None else prefix + PATH_SEPARATOR + node.title
+            self._path_cache[node.key] = prefix
+        return prefix
+
+    def search(self, query, limit=50, fuzzy=True) -> List[SearchResult]:
+        """Find entries matching ``query``.
+
+        Exact title matches rank first, then prefix matches on titles, words,
+        types and action text, then (optionally) fuzzy subsequence matches on
+        titles. Results are capped at ``limit``.
+        """
+        query = (query or "").strip().lower()
+        if not query:
+            return []
+
+        scores: Dict[int, int] = {}
+        terms = self._terms
+        position = bisect_left(terms, (query,))
+        while position < len(terms) and terms[position][0].startswith(query):
+            term, key = terms[position]
+            position += 1
+            entry = self._entries[key]
+            title = entry.title.lower()
+            if title == query:
+                score = 0
+            elif title.startswith(query):
+                score = 1
+            else:
+                score = 2
+            if score < scores.get(key, 3):
+                scores[key] = score
+
+        if fuzzy and len(scores) < limit:
+            fuzzy_hits = []
+            for key, entry in self._entries.items():
+                if key in scores:
+                    continue
+                penalty = _fuzzy_penalty(query, entry.title.lower())
+                if penalty is not None:
+                    fuzzy_hits.append((penalty, key))
+            fuzzy_hits.sort()
+            for penalty, key in fuzzy_hits[:limit - len(scores)]:
+                scores[key] = 3 + penalty
+
+        ranked = sorted(scores.items(), key=lambda kv: (kv[1], self._entries[kv[0]].title.lower()))
+        results = []
+        for key, score in ranked[:limit]:
+            entry = self._entries[key]
+            results.append(SearchResult(key, entry.kind, entry.title, entry.node_type,
+                                        self.path(key), score, entry.item))
+        return results
+
+    def _make_terms(self, entry):
+        terms = set()
+        title = entry.title.lower()
+        if title:
+            terms.add(title)
+            terms.update(word.lower() for word in _WORD_RE.findall(entry.title))
+        if entry.node_type:
+            terms.add(entry.node_type.lower())
+        if entry.text:
+            terms.update(word.lower() for word in _WORD_RE.findall(entry.text))
+        return tuple(sorted(terms))
+
+    def _remove_terms(self, entry):
+        for term in entry.terms:
+            position = bisect_left(self._terms, (term, entry.key))
+            if position < len(self._terms) and self._terms[position] == (term, entry.key):
+                del self._terms[position]
+        entry.terms = ()
+
+    def _unlink_child(self, entry):
+        if entry.parent_key is None:
+            return
+        siblings = self._children.get(entry.parent_key)
+        if siblings is not None:
+            siblings.discard(entry.key)
+            if not siblings:
+                del self._children[entry.parent_key]
+
+    def _invalidate_paths(self, key):
+        pending = [key]
+        while pending:
+            current = pending.pop()
+            if self._path_cache.pop(current, None) is None and current != key:
+                # Descendants of an uncached entry cannot be cached either
+                continue
+            pending.extend(self._children.get(current, ()))
+
+
+def _fuzzy_penalty(query, text):
+    """Return a penalty if ``query`` is a subsequence of ``text``, else None.
+
+    The penalty counts the characters skipped between matches, so tight matches
+    such as "st12" in "state12st" rank above scattered ones.
+    """
+    position = -1
+    gaps = 0
+    for char in query:
+        found = text.find(char, position + 1)
+        if found < 0:
+            return None
+        if position >= 0:
+            gaps += found - position - 1
+        position = found
+    return gaps
@@ -0,0 +1,160 @@
+"""
+Simulation Actions
+Runs the user_text of Entry, Exit and Run nodes while simulating. Each text
+is compiled once into a Python code object, cached by a hash of the text,
+and executed against a context dict that belongs to one simulator instance,
+so variables set by one action are visible to the next:
+
+- Entry children of a State run when the State is entered
+- Exit children run when it is exited
+- Run children run on every tick() while the State is active, from the
+  active leaf up to its StateMachine
+
+Actions can raise events with raise_event("EV_3"); they are processed after
+the current event, before any further external event. A text that does not
+compile (such as a prose description) is skipped; it and any exception an
+action raises are recorded in ActionRunner.errors.
+"""
+
+import builtins
+import hashlib
+from collections import OrderedDict
+from types import CodeType
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sm_model import StateNode, ACTION_TYPES
+from sm_simulator import Simulator, SimulatorObserver
+
+# Number of compiled texts kept by compile_action()
+CACHE_SIZE = 4096
+
+# Errors kept in ActionRunner.errors (all of them are counted in error_count)
+MAX_ERRORS = 100
+
+_cache: "OrderedDict[str, object]" = OrderedDict()  # Text hash -> code object or SyntaxError
+
+
+class ActionError(NamedTuple):
+    node: StateNode  # The Entry/Exit/Run node whose text failed
+    message: str
+
+
+def compile_action(text: str) -> CodeType:
+    """Compile an action text, reusing the code object of an identical text.
+
+    Raises SyntaxError (also cached) if the text is not valid Python.
+    """
+    key = hashlib.sha1(text.encode('utf-8')).hexdigest()
+    compiled = _cache.get(key)
+    if compiled is None:
+        try:
+            compiled = compile(text, "<action>", "exec")
+        except SyntaxError as e:
+            compiled = e
+        _cache[key] = compiled
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    if isinstance(compiled, SyntaxError):
+        raise compiled
+    return compiled
+
+
+class ActionRunner(SimulatorObserver):
+    """Executes the Entry/Exit/Run actions of the states a simulator enters, exits and ticks."""
+
+    def __init__(self, simulator: Simulator, context: Optional[dict] = None):
+        self.simulator = simulator
+        self.context = context if context is not None else {}
+        self.context.setdefault('__builtins__', builtins)
+        self.context['raise_event'] = self.raise_event
+        self.context['post'] = simulator.post
+        self.errors: List[ActionError] = []
+        self.error_count = 0
+        self.current_state: Optional[StateNode] = None  # State whose actions are running
+        self._ticking = False
+        self._tick_events: List[str] = []
+
+        # Compiled state index -> ((node, code), ...) per action type, in child order
+        compiled = simulator.compiled
+        self._index = compiled.index
+        self.actions: Dict[str, Dict[int, Tuple[Tuple[StateNode, CodeType], ...]]] = {
+            node_type: {} for node_type in ACTION_TYPES}
+        for index, state in enumerate(compiled.states):
+            for child in state.children:
+                if child.node_type not in ACTION_TYPES or not child.user_text.strip():
+                    continue
+                try:
+                    code = compile_action(child.user_text)
+                except SyntaxError as e:
+                    self._record_error(child, f"SyntaxError: {e.msg} (line {e.lineno})")
+                    continue
+                table = self.actions[child.node_type]
+                table[index] = table.get(index, ()) + ((child, code),)
+        self._entry = self.actions["Entry"]
+        self._exit = self.actions["Exit"]
+        self._run = self.actions["Run"]
+        simulator.add_observer(self)
+
+    def raise_event(self, event: str):
+        """Raise an internal event from an action."""
+        if self._ticking:
+            self._tick_events.append(event)
+        else:
+            self.simulator.raise_event(event)
+
+    def _execute(self, state, actions):
+        context = self.context
+        context['state'] = state.title
+        self.current_state = state
+        for node, code in actions:
+            try:
+                exec(code, context)
+            except Exception as e:
+                self._record_error(node, f"{type(e).__name__}: {e}")
+        self.current_state = None
+
+    def _record_error(self, node, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(ActionError(node, message))
+
+    def state_entered(self, state):
+        actions = self._entry.get(self._index[state])
+        if actions:
+            self._execute(state, actions)
+
+    def state_exited(self, state):
+        actions = self._exit.get(self._index[state])
+        if actions:
+            self._execute(state, actions)
+
+    def tick(self) -> int:
+        """Run the Run actions of every active state; returns how many ran.
+
+        Per StateMachine the active leaf runs first, then each parent up to
+        the StateMachine (inside-out). Events raised by Run actions are
+        dispatched (run to completion) once every action of the tick has run.
+        """
+        run = self._run
+        compiled = self.simulator.compiled
+        states = compiled.states
+        parent = compiled.parent
+        count = 0
+        self._ticking = True
+        try:
+            for leaf in self.simulator.active_leaves().values():
+                state = compiled.index[leaf]
+                while state >= 0:
+                    actions = run.get(state)
+                    if actions:
+                        self._execute(states[state], actions)
+                        count += len(actions)
+                    state = parent[state]
+        finally:
+            self._ticking = False
+        if self._tick_events:
+            events, self._tick_events = self._tick_events, []
+            self.simulator.dispatch_many(events)
+        return count
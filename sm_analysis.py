@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Design Analysis
+Static checks over the state hierarchy and its transitions, using the
+simulator's rules:
+
+- unreachable: a State that no sequence of events can enter from the
+  initial configuration (the first StateMachine of each Process, descending
+  through initial or first State children)
+- sink: a leaf State with no outgoing transition from itself or any
+  enclosing state, so its StateMachine can never leave it
+- missing_initial: a container with State children none of which is marked
+  initial (the simulator falls back to the first one)
+- duplicate_initial: a container with more than one initial State child
+- conflicts: two transitions with the same event whose sources are the same
+  State or one encloses the other within a StateMachine; the event fires
+  both, one after the other in design order
+
+Conflicts are found through an index of transition sources per event:
+each transition looks up its source's enclosing states in the index of its
+event, so the cost is the number of transitions times the nesting depth.
+
+Reachability is a single worklist pass over states and transitions: a
+reachable state makes its ancestors, its initial descent and the targets of
+its outgoing transitions reachable, so every state and transition is
+visited once.
+
+DesignAnalyzer caches results per group of StateMachines (StateMachines
+linked by transitions are analysed together) under a hash of the group's
+nodes and transitions, so re-running after an edit only re-analyses the
+group that changed.
+
+    python sm_analysis.py design.json
+"""
+
+import hashlib
+import sys
+from typing import Dict, List, NamedTuple, Tuple
+
+from sm_model import DesignModel, StateNode, Transition, STATE_TYPES
+
+# Finding kinds, in report order
+FINDING_KINDS = ("unreachable", "sink", "missing_initial", "duplicate_initial")
+
+
+class Finding(NamedTuple):
+    kind: str  # One of FINDING_KINDS
+    node: StateNode
+    message: str
+
+
+class Conflict(NamedTuple):
+    event: str
+    first: Transition  # Its source is the State of second or encloses it
+    second: Transition
+    message: str
+
+
+class AnalysisReport(NamedTuple):
+    findings: List[Finding]
+    conflicts: List[Conflict]
+    groups: int  # StateMachine groups in the design
+    analyzed: int  # Groups analysed in this run (the rest came from the cache)
+
+    def of_kind(self, kind: str) -> List[Finding]:
+        return [finding for finding in self.findings if finding.kind == kind]
+
+
+def _statemachine_of(model: DesignModel) -> Dict[StateNode, StateNode]:
+    """The enclosing StateMachine of every node inside one, each node's chain walked once."""
+    result: Dict[StateNode, StateNode] = {}
+    for node in model.nodes.values():
+        chain = []
+        current = node
+        while current is not None and current not in result:
+            if current.node_type == "StateMachine":
+                result[current] = current
+                break
+            chain.append(current)
+            current = current.parent
+        statemachine = result.get(current) if current is not None else None
+        if statemachine is not None:
+            for item in chain:
+                result[item] = statemachine
+    return result
+
+
+def _statemachine_groups(model: DesignModel,
+                         statemachine_of: Dict[StateNode, StateNode]) -> List[List[StateNode]]:
+    """StateMachines partitioned into groups linked by transitions, in design order."""
+    statemachines = [node for node in model.nodes.values() if node.node_type == "StateMachine"]
+    group = {statemachine: statemachine for statemachine in statemachines}
+
+    def find(statemachine):
+        while group[statemachine] is not statemachine:
+            group[statemachine] = group[group[statemachine]]
+            statemachine = group[statemachine]
+        return statemachine
+
+    for transition in model.transitions:
+        source = statemachine_of.get(transition.source)
+        target = statemachine_of.get(transition.target)
+        if source is not None and target is not None and source is not target:
+            a, b = find(source), find(target)
+            if a is not b:
+                group[b] = a
+
+    groups: Dict[StateNode, List[StateNode]] = {}
+    for statemachine in statemachines:
+        groups.setdefault(find(statemachine), []).append(statemachine)
+    return list(groups.values())
+
+
+def _group_states(statemachines: List[StateNode]) -> List[StateNode]:
+    """States and StateMachines of a group, in depth-first child order."""
+    states = []
+    pending = list(reversed(statemachines))
+    while pending:
+        node = pending.pop()
+        states.append(node)
+        pending.extend(child for child in reversed(node.children) if child.node_type == "State")
+    return states
+
+
+def _group_hash(states: List[StateNode], started: set, transitions) -> str:
+    """Hash of everything a group's findings depend on."""
+    items = []
+    for node in states:
+        # A StateMachine's path covers the titles of the nodes above the group
+        title = node.path() if node.node_type == "StateMachine" else node.title
+        parent_id = node.parent.id if node.parent is not None else None
+        items.append((node.id, node.node_type, node.is_initial, parent_id, title, node in started))
+    items.extend((transition.source.id, transition.target.id, transition.title)
+                 for transition in transitions)
+    return hashlib.sha1(repr(items).encode()).hexdigest()
+
+
+def _analyze_group(statemachines: List[StateNode], states: List[StateNode], started: set,
+                   outgoing: Dict[StateNode, List[StateNode]]) -> List[Tuple[str, object, str]]:
+    """Findings of one group as (kind, node ID, message)."""
+    findings = []
+
+    # Container checks
+    for node in states:
+        initial = [child for child in node.children if child.node_type == "State" and child.is_initial]
+        has_states = any(child.node_type == "State" for child in node.children)
+        if has_states and not initial:
+            first = DesignModel.initial_child(node)
+            findings.append(("missing_initial", node.id,
+                             f"{node.title} has no initial State (the simulator starts in {first.title})"))
+        elif len(initial) > 1:
+            titles = ", ".join(child.title for child in initial)
+            findings.append(("duplicate_initial", node.id,
+                             f"{node.title} has {len(initial)} initial States ({titles}); "
+                             f"the simulator uses {initial[0].title}"))
+
+    # Reachability: worklist over entered states. A state can be active as an
+    # ancestor before it is the target of a transition, so the states whose
+    # initial descent has been followed are tracked separately.
+    reachable = set()
+    descended = set()
+    pending = []
+
+    def enter(node):
+        # The node, its not yet entered ancestors, and its initial descent
+        chain = []
+        current = node
+        while current is not None and current not in reachable and current.node_type in STATE_TYPES:
+            chain.append(current)
+            if current.node_type == "StateMachine":
+                break
+            current = current.parent
+        current = node
+        while current is not None and current not in descended:
+            descended.add(current)
+            chain.append(current)
+            current = DesignModel.initial_child(current)
+        for state in chain:
+            if state not in reachable:
+                reachable.add(state)
+                pending.append(state)
+
+    for statemachine in statemachines:
+        if statemachine in started:
+            enter(statemachine)
+    while pending:
+        state = pending.pop()
+        for target in outgoing.get(state, ()):
+            if target not in descended:
+                enter(target)
+
+    for node in states:
+        if node.node_type == "State" and node not in reachable:
+            findings.append(("unreachable", node.id, f"{node.path()} can never be entered"))
+
+    # Sinks: leaf States with no way out through themselves or an enclosing state
+    for node in states:
+        if node.node_type != "State" or DesignModel.initial_child(node) is not None:
+            continue
+        current = node
+        has_exit = False
+        while current is not None and current.node_type in STATE_TYPES:
+            if outgoing.get(current):
+                has_exit = True
+                break
+            if current.node_type == "StateMachine":
+                break
+            current = current.parent
+        if not has_exit:
+            findings.append(("sink", node.id, f"{node.path()} has no outgoing transitions"))
+    return findings
+
+
+def _find_conflicts(transitions: List[Transition]) -> List[Tuple[int, int]]:
+    """Pairs of positions in transitions whose events are equal and whose sources overlap."""
+    # Event -> source State -> positions of its transitions, in design order
+    index: Dict[str, Dict[StateNode, List[int]]] = {}
+    for position, transition in enumerate(transitions):
+        if transition.title:
+            index.setdefault(transition.title, {}).setdefault(transition.source, []).append(position)
+
+    pairs = []
+    for position, transition in enumerate(transitions):
+        if not transition.title:
+            continue
+        sources = index[transition.title]
+        if len(sources) == 1 and len(sources[transition.source]) == 1:
+            continue
+        # Earlier transitions from the same State
+        for other in sources[transition.source]:
+            if other >= position:
+                break
+            pairs.append((other, position))
+        # Transitions from the enclosing states, up to the StateMachine
+        node = transition.source
+        while node.node_type != "StateMachine" and node.parent is not None:
+            node = node.parent
+            for other in sources.get(node, ()):
+                pairs.append((other, position))
+    return pairs
+
+
+class DesignAnalyzer:
+    """Runs the checks, reusing the findings of StateMachine groups that did not change."""
+
+    def __init__(self):
+        # Group hash -> (findings as (kind, node ID, message), conflicts as transition positions)
+        self._cache: Dict[str, Tuple[List[Tuple[str, object, str]], List[Tuple[int, int]]]] = {}
+
+    def analyze(self, model: DesignModel) -> AnalysisReport:
+        started = set(model.statemachines())
+        outgoing: Dict[StateNode, List[StateNode]] = {}
+        transitions_by_group: Dict[StateNode, list] = {}
+        statemachine_of = _statemachine_of(model)
+        groups = _statemachine_groups(model, statemachine_of)
+        group_of = {}
+        for statemachines in groups:
+            for statemachine in statemachines:
+                group_of[statemachine] = statemachines[0]
+        for transition in model.transitions:
+            source, target = transition.source, transition.target
+            if (source is None or target is None
+                    or source.node_type not in STATE_TYPES or target.node_type not in STATE_TYPES):
+                continue
+            source_statemachine = statemachine_of.get(source)
+            if source_statemachine is None or target not in statemachine_of:
+                continue
+            outgoing.setdefault(source, []).append(target)
+            transitions_by_group.setdefault(group_of[source_statemachine], []).append(transition)
+
+        cache = {}
+        findings = []
+        conflicts = []
+        analyzed = 0
+        for statemachines in groups:
+            states = _group_states(statemachines)
+            transitions = transitions_by_group.get(statemachines[0], [])
+            key = _group_hash(states, started, transitions)
+            result = self._cache.get(key)
+            if result is None:
+                result = (_analyze_group(statemachines, states, started, outgoing),
+                          _find_conflicts(transitions))
+                analyzed += 1
+            cache[key] = result
+            group_findings, group_conflicts = result
+            findings.extend(Finding(kind, model.nodes[node_id], message)
+                            for kind, node_id, message in group_findings)
+            for first, second in group_conflicts:
+                first, second = transitions[first], transitions[second]
+                conflicts.append(Conflict(
+                    second.title, first, second,
+                    f"{second.title} fires both {first.source.title} → {first.target.title} "
+                    f"and {second.source.title} → {second.target.title}"))
+        # Keep only the groups of the latest design
+        self._cache = cache
+        order = {kind: i for i, kind in enumerate(FINDING_KINDS)}
+        findings.sort(key=lambda finding: order[finding.kind])
+        conflicts.sort(key=lambda conflict: (conflict.first.index, conflict.second.index))
+        return AnalysisReport(findings, conflicts, len(groups), analyzed)
+
+
+def analyze(model: DesignModel) -> AnalysisReport:
+    """One-off analysis of a design."""
+    return DesignAnalyzer().analyze(model)
+
+
+def main(argv=None):
+    """Analyse a design file and print the findings."""
+    argv = sys.argv if argv is None else argv
+    if len(argv) < 2:
+        print("Usage: python sm_analysis.py <design.json>")
+        sys.exit(1)
+
+    try:
+        model = DesignModel.from_file(argv[1])
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    report = analyze(model)
+    if not report.findings and not report.conflicts:
+        print(f"✅ No findings in {report.groups} StateMachine group(s)")
+        return
+    for kind in FINDING_KINDS:
+        findings = report.of_kind(kind)
+        if findings:
+            print(f"{kind} ({len(findings)}):")
+            for finding in findings:
+                print(f"  {finding.message}")
+    if report.conflicts:
+        print(f"conflicts ({len(report.conflicts)}):")
+        for conflict in report.conflicts:
+            print(f"  {conflict.message}")
+    sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
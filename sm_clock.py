@@ -0,0 +1,152 @@
+"""
+Simulation Clock
+Timed events for the simulator. Timers live in a heap ordered by deadline
+(milliseconds of simulation time). A timer armed while a state's actions run,
+e.g. an Entry text of State3St doing
+
+    after(500, "EV_7")
+
+belongs to that state and is cancelled when the state is exited; cancelled
+timers are dropped lazily when they reach the top of the heap. Optionally the
+clock also ticks the Run actions every tick_interval milliseconds.
+
+The clock only moves when told to:
+
+- virtual time: run_until()/run_for() jump from deadline to deadline, so
+  hours of simulated behaviour take as long as the events they fire
+- real time: set time_source to a wall-clock function (milliseconds) and call
+  run_until(time_source()) when next_deadline() is due; the editor does this
+  with a QTimer
+"""
+
+import heapq
+import itertools
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+from sm_actions import ActionRunner
+from sm_model import StateNode
+from sm_simulator import Simulator, SimulatorObserver
+
+# Heap entry event that means "tick the Run actions"
+_TICK = None
+
+
+class Timer(NamedTuple):
+    deadline: float
+    sequence: int  # Arming order; breaks ties between equal deadlines
+    event: Optional[str]
+    owner: Optional[StateNode]  # Cancelled when this state is exited
+
+
+class SimulationClock(SimulatorObserver):
+    """Discrete-event clock driving timed events (and optionally Run ticks) of a simulator."""
+
+    def __init__(self, simulator: Simulator, runner: Optional[ActionRunner] = None,
+                 tick_interval: Optional[float] = None,
+                 time_source: Optional[Callable[[], float]] = None):
+        if tick_interval and runner is None:
+            raise ValueError("tick_interval needs an ActionRunner to run the Run actions")
+        self.simulator = simulator
+        self.runner = runner
+        self.tick_interval = tick_interval
+        self.time_source = time_source
+        self.now = 0.0
+        self.fired = 0  # Timer events dispatched so far
+        self._heap: List[Timer] = []
+        self._live: Set[int] = set()  # Sequences of armed, not cancelled timers
+        self._owned: Dict[StateNode, List[int]] = {}
+        self._sequence = itertools.count()
+        simulator.add_observer(self)
+        if runner is not None:
+            runner.context['after'] = self.after
+            runner.context['cancel'] = self.cancel
+            runner.context['now'] = self.current_time
+        if tick_interval:
+            self._push(self.now + tick_interval, _TICK, None)
+
+    def current_time(self) -> float:
+        """Simulation time in ms; in real-time mode at least the time source's time."""
+        if self.time_source is not None:
+            return max(self.now, self.time_source())
+        return self.now
+
+    def _push(self, deadline, event, owner) -> int:
+        sequence = next(self._sequence)
+        heapq.heappush(self._heap, Timer(deadline, sequence, event, owner))
+        self._live.add(sequence)
+        if owner is not None:
+            self._owned.setdefault(owner, []).append(sequence)
+        return sequence
+
+    def after(self, delay: float, event: str, owner: Optional[StateNode] = None) -> int:
+        """Fire event delay ms from now; returns a timer ID for cancel().
+
+        Called from an action, the timer belongs to the state running the
+        action (unless owner is given) and is cancelled when that state exits.
+        """
+        if owner is None and self.runner is not None:
+            owner = self.runner.current_state
+        return self._push(self.current_time() + max(0.0, delay), event, owner)
+
+    def cancel(self, timer_id: int):
+        self._live.discard(timer_id)
+
+    def state_exited(self, state):
+        owned = self._owned.pop(state, None)
+        if owned:
+            self._live.difference_update(owned)
+
+    def pending(self) -> int:
+        """Number of armed timers (ticks excluded)."""
+        return len(self._live) - (1 if self.tick_interval else 0)
+
+    def next_deadline(self) -> Optional[float]:
+        """Time of the earliest armed timer or tick, or None."""
+        heap = self._heap
+        while heap and heap[0].sequence not in self._live:
+            heapq.heappop(heap)
+        return heap[0].deadline if heap else None
+
+    def run_until(self, time: float, max_events: Optional[int] = None) -> int:
+        """Fire every timer due at or before time, in deadline order; returns how many fired.
+
+        Each timer event is dispatched to completion before the next one, so
+        timers armed meanwhile fire in the same call if they are due.
+        """
+        heap = self._heap
+        live = self._live
+        fired = 0
+        while heap and heap[0].deadline <= time:
+            if max_events is not None and fired >= max_events:
+                return fired
+            timer = heapq.heappop(heap)
+            if timer.sequence not in live:
+                continue
+            live.discard(timer.sequence)
+            if timer.owner is not None:
+                owned = self._owned.get(timer.owner)
+                if owned:
+                    owned.remove(timer.sequence)
+            self.now = timer.deadline
+            if timer.event is _TICK:
+                self._push(timer.deadline + self.tick_interval, _TICK, None)
+                self.runner.tick()
+            else:
+                self.simulator.dispatch(timer.event)
+                self.fired += 1
+                fired += 1
+        self.now = max(self.now, time)
+        return fired
+
+    def run_for(self, duration: float, max_events: Optional[int] = None) -> int:
+        """Advance virtual time by duration ms; returns how many timer events fired."""
+        return self.run_until(self.now + duration, max_events)
+
+    def reset(self):
+        """Drop every timer and return to time 0 (ticks restart from there)."""
+        self.now = 0.0
+        self._heap.clear()
+        self._live.clear()
+        self._owned.clear()
+        if self.tick_interval:
+            self._push(self.tick_interval, _TICK, None)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Code Generation Driver
+Runs the code generators (sm_codegen_c, sm_codegen_py) for every
+StateMachine of a design, regenerating only what changed:
+
+- each StateMachine gets a content hash over its canonical subtree (path,
+  states and action texts in child order, transitions within it in design
+  order, by position rather than by node ID), the generator, its options and
+  the design-unique output name the generator gives it
+- sm_codegen_manifest.json in the output directory records the hash and
+  files of every output; outputs whose hash is unchanged are skipped
+- files are only written when their content differs, so unchanged files
+  keep their mtimes and downstream builds stay incremental
+- files of StateMachines no longer in the design, and old files of outputs
+  that were renamed (e.g. when a second StateMachine takes the same title),
+  are removed
+- two outputs claiming the same manifest key (StateMachines with the same
+  path) or the same file are an error
+
+    python sm_codegen.py design.json output_dir [--lang c,py] [--jobs N]
+                         [--actions comment|code] [--force]
+
+--jobs N generates in N worker processes.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import sm_codegen_c
+import sm_codegen_py
+from sm_compiler import StateMachineTables, compile_design
+from sm_model import DesignModel, StateNode, ACTION_TYPES, STATE_TYPES
+
+MANIFEST_NAME = "sm_codegen_manifest.json"
+MANIFEST_VERSION = 1
+
+# Language -> generator module (generate_<language>(tables, name=..., **options), output_names() and GENERATOR_VERSION)
+GENERATORS = {
+    'c': sm_codegen_c,
+    'py': sm_codegen_py,
+}
+
+
+class Output(NamedTuple):
+    language: str
+    statemachine: StateNode
+    key: str  # Manifest key: language and StateMachine path
+    hash: str
+    name: str  # Design-unique name of the generated files (see output_names in the generator)
+
+
+def statemachine_hash(statemachine: StateNode, transitions) -> str:
+    """Hash of the canonical subtree of a StateMachine and the transitions within it.
+
+    Nodes are numbered in depth-first child order, so the hash does not
+    depend on node IDs (which change every time the editor saves).
+    """
+    local: Dict[StateNode, int] = {}
+    items = [statemachine.path()]
+    pending = [(statemachine, -1)]
+    while pending:
+        node, parent = pending.pop()
+        local[node] = len(local)
+        if node.node_type in STATE_TYPES:
+            items.append((node.node_type, node.title, node.is_initial, parent))
+            pending.extend((child, local[node]) for child in reversed(node.children)
+                           if child.node_type in STATE_TYPES or child.node_type in ACTION_TYPES)
+        else:
+            items.append((node.node_type, node.user_text, parent))
+    for transition in transitions:
+        if (transition.source in local and transition.target in local
+                and transition.target.node_type in STATE_TYPES):
+            items.append((transition.title, local[transition.source], local[transition.target]))
+    return hashlib.sha1(repr(items).encode('utf-8')).hexdigest()
+
+
+def _options_key(language: str, options: dict) -> str:
+    generator = GENERATORS[language]
+    return repr((language, generator.GENERATOR_VERSION, sorted(options.items())))
+
+
+def plan_outputs(model: DesignModel, languages: List[str], options: Dict[str, dict]) -> List[Output]:
+    """Every (language, StateMachine) output of the design with its content hash."""
+    outputs = []
+    transitions: Dict[StateNode, list] = {}
+    for transition in model.transitions:
+        statemachine = DesignModel.find_statemachine(transition.source)
+        if statemachine is not None:
+            transitions.setdefault(statemachine, []).append(transition)
+    statemachines = [node for node in model.nodes.values() if node.node_type == "StateMachine"]
+    names = {language: GENERATORS[language].output_names(statemachines) for language in languages}
+    for number, statemachine in enumerate(statemachines):
+        content = statemachine_hash(statemachine, transitions.get(statemachine, ()))
+        for language in languages:
+            key = f"{language}:{statemachine.path()}"
+            name = names[language][number]
+            options_key = _options_key(language, options[language])
+            digest = hashlib.sha1(f"{content}{options_key}{name!r}".encode()).hexdigest()
+            outputs.append(Output(language, statemachine, key, digest, name))
+    return outputs
+
+
+def load_manifest(output_dir: str) -> Dict[str, dict]:
+    """Manifest entries by key; empty if there is no (readable) manifest."""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('outputs', {})
+
+
+def write_if_changed(file_path: str, text: str) -> bool:
+    """Write text unless the file already holds it; returns True if written."""
+    data = text.encode('utf-8')
+    try:
+        with open(file_path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    with open(file_path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+# Worker state: the design, loaded once per worker process
+_worker_model: Optional[DesignModel] = None
+
+
+def _init_worker(design_data: dict):
+    global _worker_model
+    _worker_model = DesignModel(design_data)
+
+
+def _generate(model: DesignModel, language: str, statemachine_id, name: str, options: dict) -> Dict[str, str]:
+    tables = StateMachineTables(compile_design(model), model.nodes[statemachine_id])
+    generate = getattr(GENERATORS[language], f"generate_{language}")
+    return generate(tables, name=name, **options)
+
+
+def _generate_in_worker(task: Tuple[str, object, str, dict]) -> Dict[str, str]:
+    language, statemachine_id, name, options = task
+    return _generate(_worker_model, language, statemachine_id, name, options)
+
+
+class GenerationResult(NamedTuple):
+    generated: List[str]  # Keys of the outputs regenerated
+    skipped: List[str]  # Keys whose hash was unchanged
+    written: List[str]  # Files whose content changed
+    removed: List[str]  # Files of outputs no longer in the design
+
+
+def generate(design_data: dict, output_dir: str, languages=('c', 'py'), jobs: int = 1,
+             force: bool = False, options: Optional[Dict[str, dict]] = None) -> GenerationResult:
+    """Bring output_dir up to date with the design; see the module docstring."""
+    options = {language: dict((options or {}).get(language, {})) for language in languages}
+    for language in languages:
+        if language not in GENERATORS:
+            raise ValueError(f"Unknown language '{language}' (available: {', '.join(GENERATORS)})")
+
+    model = DesignModel(design_data)
+    outputs = plan_outputs(model, list(languages), options)
+    keys = {}
+    for output in outputs:
+        other = keys.setdefault(output.key, output)
+        if other is not output:
+            raise ValueError(f"Two StateMachines have the path '{output.statemachine.path()}'; "
+                             f"rename one so their {output.language} outputs can be told apart")
+    manifest = load_manifest(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    stale = []
+    entries = {}
+    for output in outputs:
+        entry = manifest.get(output.key)
+        if (not force and entry is not None and entry.get('hash') == output.hash
+                and all(os.path.exists(os.path.join(output_dir, name)) for name in entry['files'])):
+            entries[output.key] = entry
+        else:
+            stale.append(output)
+
+    tasks = [(output.language, output.statemachine.id, output.name, options[output.language]) for output in stale]
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks)), initializer=_init_worker,
+                                 initargs=(design_data,)) as pool:
+            results = list(pool.map(_generate_in_worker, tasks))
+    else:
+        results = [_generate(model, *task) for task in tasks]
+
+    # Every file must belong to one output, or outputs would overwrite each other
+    owners = {name: key for key, entry in entries.items() for name in entry['files']}
+    for output, files in zip(stale, results):
+        for name in files:
+            owner = owners.setdefault(name, output.key)
+            if owner != output.key:
+                raise ValueError(f"{output.key} and {owner} both generate {name}")
+
+    written = []
+    for output, files in zip(stale, results):
+        for name, text in files.items():
+            if write_if_changed(os.path.join(output_dir, name), text):
+                written.append(name)
+        entries[output.key] = {'hash': output.hash, 'files': sorted(files)}
+
+    # Files that belonged to outputs no longer in the design, or that an output no longer
+    # generates under that name, unless another output generates them now
+    current = {name for entry in entries.values() for name in entry['files']}
+    removed = []
+    for key, entry in manifest.items():
+        for name in entry.get('files', ()):
+            file_path = os.path.join(output_dir, name)
+            if name not in current and os.path.exists(file_path):
+                os.remove(file_path)
+                removed.append(name)
+
+    manifest_data = {'version': MANIFEST_VERSION,
+                     'outputs': {key: entries[key] for key in sorted(entries)}}
+    write_if_changed(os.path.join(output_dir, MANIFEST_NAME),
+                     json.dumps(manifest_data, indent=2, ensure_ascii=False) + "\n")
+    return GenerationResult([output.key for output in stale],
+                            [key for key in entries if key not in {output.key for output in stale}],
+                            written, removed)
+
+
+def main(argv=None):
+    """Generate code for a design file into an output directory."""
+    argv = list(sys.argv if argv is None else argv)
+    usage = ("Usage: python sm_codegen.py <design.json> <output_dir> [--lang c,py] [--jobs N] "
+             "[--actions comment|code] [--force]")
+    flags = {'--lang': "c,py", '--jobs': "1", '--actions': "comment"}
+    for flag in flags:
+        if flag in argv:
+            position = argv.index(flag)
+            if position + 1 >= len(argv):
+                print(usage)
+                sys.exit(1)
+            flags[flag] = argv[position + 1]
+            del argv[position:position + 2]
+    force = "--force" in argv
+    if force:
+        argv.remove("--force")
+    if len(argv) < 3 or not flags['--jobs'].isdigit() or flags['--actions'] not in sm_codegen_c.ACTION_MODES:
+        print(usage)
+        sys.exit(1)
+
+    design_file, output_dir = argv[1], argv[2]
+    languages = [language for language in flags['--lang'].split(',') if language]
+    try:
+        with open(design_file, 'r') as f:
+            design_data = json.load(f)
+        result = generate(design_data, output_dir, languages, int(flags['--jobs']) or 1, force,
+                          {'c': {'actions': flags['--actions']}})
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    for key in result.generated:
+        print(f"  generated {key}")
+    for name in result.removed:
+        print(f"  removed {name}")
+    print(f"✅ {len(result.generated)} output(s) regenerated, {len(result.skipped)} unchanged, "
+          f"{len(result.written)} file(s) written to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
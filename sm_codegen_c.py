@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+C Code Generator
+Generates a C99 module per StateMachine from a design file: the flattened
+state/event tables (see sm_compiler.StateMachineTables) as const arrays and
+a small dispatch loop. An event costs one table lookup plus one call per
+Entry/Exit action it runs; instances are plain structs with a fixed-size
+event queue, so the generated code never allocates.
+
+    python sm_codegen_c.py design.json [output_dir] [--actions comment|code]
+
+writes <name>.h and <name>.c for every StateMachine, where name is the
+StateMachine title in lower case (qualified with the Process title, and
+numbered if still needed, when titles repeat in the design). Entry/Exit/Run texts become action
+functions: with --actions code the text is the function body (write the
+texts in C); with the default --actions comment it is kept as a comment,
+since texts are often prose descriptions.
+
+Usage from C (for a StateMachine titled Statemachine1Sm):
+
+    statemachine1sm_t sm;
+    statemachine1sm_start(&sm, NULL);
+    statemachine1sm_dispatch(&sm, STATEMACHINE1SM_EV_1);
+    statemachine1sm_tick(&sm);   (runs the Run actions, leaf first)
+"""
+
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from sm_compiler import StateMachineTables, compile_design
+from sm_model import DesignModel, StateNode
+
+# Bump when the generated code changes, so sm_codegen regenerates existing outputs
+GENERATOR_VERSION = 1
+
+# Action text modes
+ACTION_MODES = ("comment", "code")
+
+# Events an instance can queue while dispatching (raise_event from actions)
+QUEUE_SIZE = 16
+
+
+def c_identifier(text: str) -> str:
+    """A C identifier from a title: letters, digits and underscores, not starting with a digit."""
+    identifier = re.sub(r'\W', '_', text, flags=re.ASCII).strip('_') or "unnamed"
+    return f"_{identifier}" if identifier[0].isdigit() else identifier
+
+
+def unique_names(titles: List[str]) -> List[str]:
+    """Identifiers for titles, with _2, _3, ... appended to repeats."""
+    names = []
+    seen: Dict[str, int] = {}
+    for title in titles:
+        name = c_identifier(title).upper()
+        count = seen.get(name, 0) + 1
+        seen[name] = count
+        names.append(name if count == 1 else f"{name}_{count}")
+    return names
+
+
+def statemachine_names(statemachines: List[StateNode], reserved: Iterable[str] = ()) -> List[str]:
+    """Design-unique lower-case identifiers for StateMachines, used as file names and prefixes.
+
+    A StateMachine whose title repeats is qualified with its Process title;
+    names that still repeat or are reserved get a number (see unique_names).
+    """
+    reserved = sorted({c_identifier(name).lower() for name in reserved})
+    titles = [c_identifier(statemachine.title).lower() for statemachine in statemachines]
+    qualified = []
+    for statemachine, title in zip(statemachines, titles):
+        if titles.count(title) > 1 and statemachine.parent is not None:
+            qualified.append(f"{statemachine.parent.title}_{statemachine.title}")
+        else:
+            qualified.append(statemachine.title)
+    return [name.lower() for name in unique_names(reserved + qualified)[len(reserved):]]
+
+
+def output_names(statemachines: List[StateNode]) -> List[str]:
+    """Base names of the generated files per StateMachine (see statemachine_names)."""
+    return statemachine_names(statemachines)
+
+
+def c_uint(largest: int) -> str:
+    """Smallest unsigned fixed-width type holding 0..largest."""
+    for bits in (8, 16, 32):
+        if largest < 1 << bits:
+            return f"uint{bits}_t"
+    return "uint64_t"
+
+
+def _comment(text: str, indent: str = "    ") -> List[str]:
+    lines = text.replace("*/", "* /").splitlines() or [""]
+    return [f"{indent}/*"] + [f"{indent} * {line}".rstrip() for line in lines] + [f"{indent} */"]
+
+
+def _rows(values, per_line: int = 16, indent: str = "    ") -> List[str]:
+    values = [str(value) for value in values]
+    return [indent + ", ".join(values[i:i + per_line]) + ","
+            for i in range(0, len(values), per_line)] or [indent + "0,"]
+
+
+def generate_c(tables: StateMachineTables, actions: str = "comment", name: Optional[str] = None) -> Dict[str, str]:
+    """Header and source for one StateMachine, as {file name: text}.
+
+    name is the file name and symbol prefix; defaults to the StateMachine
+    title, which is only unique if no other StateMachine shares it.
+    """
+    if actions not in ACTION_MODES:
+        raise ValueError(f"actions must be one of {ACTION_MODES}, not {actions!r}")
+    prefix = name or c_identifier(tables.statemachine.title).lower()
+    upper = prefix.upper()
+    states = tables.states
+    # One namespace for the constants, so a State titled like an event still gets its own name
+    reserved = ["STATE_COUNT", "EVENT_COUNT", "QUEUE_SIZE", "NO_EVENT", "H"]
+    names = unique_names(reserved + [state.title for state in states] + tables.events)
+    state_names = names[len(reserved):len(reserved) + len(states)]
+    event_names = names[len(reserved) + len(states):]
+    state_type = c_uint(len(states))
+    step_type = c_uint(len(tables.steps))
+    event_type = c_uint(len(tables.events))
+
+    # Action functions, one per (type, state) with action texts
+    functions: Dict[tuple, str] = {}
+    for node_type in ("Entry", "Exit", "Run"):
+        for i in tables.actions[node_type]:
+            functions[(node_type, i)] = f"{prefix}_{node_type.lower()}_{state_names[i].lower()}"
+
+    # Ops: the action functions of every step, steps stored as ranges of ops
+    ops: List[str] = []
+    step_rows = []
+    for step in [tables.start] + tables.steps[1:]:
+        step_rows.append(f"    {{{len(ops)}u, {len(step.actions)}u, {step.leaf}u, {step.fired}u}},")
+        ops.extend(functions[action] for action in step.actions)
+    op_type = c_uint(len(ops))
+    fired_type = c_uint(max(step.fired for step in tables.steps))
+
+    # Bodies of the functions some step or tick calls (an unreachable state's Entry is never called)
+    used = set(ops) | {name for (node_type, _), name in functions.items() if node_type == "Run"}
+    action_lines: List[str] = []
+    for i, state in enumerate(states):
+        for node_type in ("Entry", "Exit", "Run"):
+            name = functions.get((node_type, i))
+            if name not in used:
+                continue
+            action_lines.append(f"/* {node_type} of {state.path()} */")
+            action_lines.append(f"static void {name}({prefix}_t *sm)")
+            action_lines.append("{")
+            action_lines.append("    (void)sm;")
+            for node in tables.actions[node_type][i]:
+                if actions == "code":
+                    action_lines.extend(f"    {line}".rstrip() for line in node.user_text.splitlines())
+                else:
+                    action_lines.extend(_comment(node.user_text))
+            action_lines.append("}")
+            action_lines.append("")
+
+    guard = f"{upper}_H"
+    header = [
+        f"/* Generated by sm_codegen_c.py from {tables.statemachine.path()}; do not edit. */",
+        f"#ifndef {guard}",
+        f"#define {guard}",
+        "",
+        "#include <stdint.h>",
+        "",
+        "#ifdef __cplusplus",
+        'extern "C" {',
+        "#endif",
+        "",
+        f"#define {upper}_STATE_COUNT {len(states)}",
+        f"#define {upper}_EVENT_COUNT {len(tables.events)}",
+        f"#define {upper}_QUEUE_SIZE {QUEUE_SIZE}",
+        "",
+        "typedef enum {",
+    ]
+    header += [f"    {upper}_{name} = {i}," for i, name in enumerate(state_names)]
+    header += [f"}} {prefix}_state_t;", "", "typedef enum {"]
+    header += [f"    {upper}_{name} = {i}," for i, name in enumerate(event_names)]
+    header += [f"    {upper}_NO_EVENT = {len(event_names)}", f"}} {prefix}_event_t;", ""]
+    header += [
+        "typedef struct {",
+        f"    {state_type} state;  /* Active leaf */",
+        "    uint8_t busy;  /* Dispatching: raised events are queued */",
+        "    uint8_t queue_head;",
+        "    uint8_t queue_count;",
+        f"    {event_type} queue[{upper}_QUEUE_SIZE];",
+        "    void *user;  /* Free for the action code */",
+        f"}} {prefix}_t;",
+        "",
+        f"extern const char *const {prefix}_state_names[{upper}_STATE_COUNT];",
+        f"extern const char *const {prefix}_event_names[{upper}_EVENT_COUNT + 1];",
+        "",
+        "/* Enter the initial configuration (runs the Entry actions). */",
+        f"void {prefix}_start({prefix}_t *sm, void *user);",
+        "/* Process an event and then every event raised meanwhile; returns the transitions fired. */",
+        f"unsigned {prefix}_dispatch({prefix}_t *sm, {prefix}_event_t event);",
+        "/* Queue an event (from an action); returns 0 if the queue is full. */",
+        f"int {prefix}_raise({prefix}_t *sm, {prefix}_event_t event);",
+        "/* Run the Run actions of the active leaf and its enclosing states, leaf first. */",
+        f"void {prefix}_tick({prefix}_t *sm);",
+        "",
+        "#ifdef __cplusplus",
+        "}",
+        "#endif",
+        "",
+        f"#endif /* {guard} */",
+        "",
+    ]
+
+    source = [
+        f"/* Generated by sm_codegen_c.py from {tables.statemachine.path()}; do not edit. */",
+        f'#include "{prefix}.h"',
+        "",
+        "#include <stddef.h>",
+        "",
+        "typedef struct {",
+        f"    {op_type} first;",
+        f"    {op_type} count;",
+        f"    {state_type} leaf;",
+        f"    {fired_type} fired;",
+        f"}} {prefix}_step_t;",
+        "",
+        f"typedef void (*{prefix}_action_t)({prefix}_t *sm);",
+        "",
+        f"const char *const {prefix}_state_names[{upper}_STATE_COUNT] = {{",
+    ]
+    source += [f'    "{_c_string(state.title)}",' for state in states]
+    source += ["};", "", f"const char *const {prefix}_event_names[{upper}_EVENT_COUNT + 1] = {{"]
+    source += [f'    "{_c_string(event)}",' for event in tables.events] + ["    NULL,", "};", ""]
+    source += action_lines
+
+    source += [f"static const {state_type} {prefix}_parent[{upper}_STATE_COUNT] = {{"]
+    source += _rows([parent if parent >= 0 else len(states) for parent in tables.parent])
+    source += ["};", ""]
+    source += [f"static const {prefix}_action_t {prefix}_run[{upper}_STATE_COUNT] = {{"]
+    source += _rows([functions.get(("Run", i), "NULL") for i in range(len(states))], 4)
+    source += ["};", ""]
+    source += [f"static const {prefix}_action_t {prefix}_ops[{max(1, len(ops))}] = {{"]
+    source += _rows(ops or ["NULL"], 4)
+    source += ["};", ""]
+    source += ["/* Step 0 is the start; in the table it means \"no transition\" */",
+               f"static const {prefix}_step_t {prefix}_steps[{len(step_rows)}] = {{"]
+    source += step_rows + ["};", ""]
+    if tables.events:
+        source += [f"static const {step_type} {prefix}_next[{upper}_STATE_COUNT][{upper}_EVENT_COUNT] = {{"]
+        for i, row in enumerate(tables.step_table):
+            source.append("    {" + ", ".join(str(value) for value in row) + "},")
+        source += ["};", ""]
+
+    source += [
+        f"static void {prefix}_run_step({prefix}_t *sm, const {prefix}_step_t *step)",
+        "{",
+        f"    const {prefix}_action_t *op = {prefix}_ops + step->first;",
+        f"    const {prefix}_action_t *end = op + step->count;",
+        "    sm->state = step->leaf;",
+        "    for (; op != end; ++op) {",
+        "        (*op)(sm);",
+        "    }",
+        "}",
+        "",
+        f"void {prefix}_start({prefix}_t *sm, void *user)",
+        "{",
+        "    sm->busy = 1;",
+        "    sm->queue_head = 0;",
+        "    sm->queue_count = 0;",
+        "    sm->user = user;",
+        f"    {prefix}_run_step(sm, &{prefix}_steps[0]);",
+        "    sm->busy = 0;",
+        "}",
+        "",
+        f"static unsigned {prefix}_step({prefix}_t *sm, {prefix}_event_t event)",
+        "{",
+    ]
+    if tables.events:
+        source += [
+            f"    const {prefix}_step_t *step;",
+            f"    {step_type} index;",
+            f"    if ((unsigned)event >= {upper}_EVENT_COUNT) {{",
+            "        return 0;",
+            "    }",
+            f"    index = {prefix}_next[sm->state][event];",
+            "    if (index == 0) {",
+            "        return 0;",
+            "    }",
+            f"    step = &{prefix}_steps[index];",
+            f"    {prefix}_run_step(sm, step);",
+            "    return step->fired;",
+        ]
+    else:
+        source += ["    (void)sm;", "    (void)event;", "    return 0;"]
+    source += [
+        "}",
+        "",
+        f"int {prefix}_raise({prefix}_t *sm, {prefix}_event_t event)",
+        "{",
+        f"    if (sm->queue_count == {upper}_QUEUE_SIZE) {{",
+        "        return 0;",
+        "    }",
+        f"    sm->queue[(sm->queue_head + sm->queue_count) % {upper}_QUEUE_SIZE] = ({event_type})event;",
+        "    sm->queue_count++;",
+        "    return 1;",
+        "}",
+        "",
+        f"unsigned {prefix}_dispatch({prefix}_t *sm, {prefix}_event_t event)",
+        "{",
+        "    unsigned fired;",
+        "    if (sm->busy) {",
+        f"        {prefix}_raise(sm, event);",
+        "        return 0;",
+        "    }",
+        "    sm->busy = 1;",
+        f"    fired = {prefix}_step(sm, event);",
+        "    while (sm->queue_count) {",
+        f"        {prefix}_event_t queued = ({prefix}_event_t)sm->queue[sm->queue_head];",
+        f"        sm->queue_head = (uint8_t)((sm->queue_head + 1) % {upper}_QUEUE_SIZE);",
+        "        sm->queue_count--;",
+        f"        fired += {prefix}_step(sm, queued);",
+        "    }",
+        "    sm->busy = 0;",
+        "    return fired;",
+        "}",
+        "",
+        f"void {prefix}_tick({prefix}_t *sm)",
+        "{",
+        f"    {state_type} state = sm->state;",
+        f"    while (state < {upper}_STATE_COUNT) {{",
+        f"        if ({prefix}_run[state] != NULL) {{",
+        f"            {prefix}_run[state](sm);",
+        "        }",
+        f"        state = {prefix}_parent[state];",
+        "    }",
+        "    if (sm->queue_count) {",
+        f"        {prefix}_dispatch(sm, {upper}_NO_EVENT);",
+        "    }",
+        "}",
+        "",
+    ]
+    return {f"{prefix}.h": "\n".join(header), f"{prefix}.c": "\n".join(source)}
+
+
+def _c_string(text: str) -> str:
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def generate_design(model: DesignModel, actions: str = "comment") -> Dict[StateNode, Dict[str, str]]:
+    """Generated files of every StateMachine in the design, by StateMachine."""
+    compiled = compile_design(model)
+    statemachines = [node for node in model.nodes.values() if node.node_type == "StateMachine"]
+    return {statemachine: generate_c(StateMachineTables(compiled, statemachine), actions, name)
+            for statemachine, name in zip(statemachines, output_names(statemachines))}
+
+
+def main(argv=None):
+    """Generate C for every StateMachine of a design file."""
+    argv = list(sys.argv if argv is None else argv)
+    actions = "comment"
+    if "--actions" in argv:
+        position = argv.index("--actions")
+        actions = argv[position + 1] if position + 1 < len(argv) else ""
+        del argv[position:position + 2]
+    if len(argv) < 2 or actions not in ACTION_MODES:
+        print("Usage: python sm_codegen_c.py <design.json> [output_dir] [--actions comment|code]")
+        sys.exit(1)
+
+    design_file = argv[1]
+    output_dir = argv[2] if len(argv) >= 3 else os.path.splitext(design_file)[0] + "_c"
+    try:
+        model = DesignModel.from_file(design_file)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    os.makedirs(output_dir, exist_ok=True)
+    for statemachine, files in generate_design(model, actions).items():
+        for name, text in files.items():
+            with open(os.path.join(output_dir, name), 'w') as f:
+                f.write(text)
+        print(f"  {statemachine.path()}: {', '.join(files)}")
+    print(f"✅ C code written to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
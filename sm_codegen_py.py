@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Python Code Generator
+Generates a dependency-free Python module per StateMachine from a design
+file, so services can run a modelled StateMachine without the design JSON,
+the editor or this package:
+
+- integer constants for the states, the StateMachine being 0
+- TRANSITIONS: a dict keyed by (state, event) whose value is the complete
+  effect of the event from that active leaf (see
+  sm_compiler.StateMachineTables): the Entry/Exit actions to run, the new
+  leaf and the number of transitions fired
+- a class with __slots__ whose instances hold the active leaf, the action
+  namespace and the queue of raised events
+
+Entry/Exit/Run texts run exactly as in the simulator (sm_actions): compiled
+once when the module is imported, executed in one namespace per instance
+with raise_event() and post(); texts that are not valid Python are left
+out as comments. Unlike in the simulator, an exception raised by an action
+propagates to the caller.
+
+    python sm_codegen_py.py design.json [output_dir]
+
+writes <name>.py for every StateMachine, where name is the StateMachine
+title in lower case (qualified with the Process title when titles repeat,
+and numbered if it would still repeat or shadow a keyword or a standard
+library module):
+
+    from statemachine1sm import Statemachine1Sm, STATE_NAMES
+    sm = Statemachine1Sm()
+    sm.start()
+    sm.dispatch("EV_1")
+    STATE_NAMES[sm.state]
+"""
+
+import keyword
+import os
+import sys
+from typing import Dict, List, Optional
+
+from sm_codegen_c import c_identifier, statemachine_names, unique_names
+from sm_compiler import StateMachineTables, compile_design
+from sm_model import DesignModel, StateNode
+
+# Bump when the generated code changes, so sm_codegen regenerates existing outputs
+GENERATOR_VERSION = 2
+
+# Module names a generated module must not take: importing it would be impossible or shadow the standard library
+RESERVED_MODULES = sorted(set(keyword.kwlist) | set(getattr(sys, 'stdlib_module_names', ())))
+
+
+def _class_name(title: str, taken: List[str]) -> str:
+    """Class name from a title; names taken by module constants get a Machine suffix.
+
+    Constants are upper case (see unique_names), so a suffix with lower-case
+    letters cannot be taken as well.
+    """
+    name = c_identifier(title)
+    name = name[0].upper() + name[1:]
+    if name in taken:
+        return f"{name}Machine"
+    return f"{name}_" if keyword.iskeyword(name) else name
+
+
+def output_names(statemachines: List[StateNode]) -> List[str]:
+    """Module names per StateMachine: design-unique, no keyword or standard library module."""
+    return statemachine_names(statemachines, RESERVED_MODULES)
+
+
+def _compiles(text: str) -> bool:
+    try:
+        compile(text, "<action>", "exec")
+    except SyntaxError:
+        return False
+    return True
+
+
+def generate_py(tables: StateMachineTables, name: Optional[str] = None) -> Dict[str, str]:
+    """Module source for one StateMachine, as {file name: text}.
+
+    name is the module name; defaults to the one output_names() gives the
+    StateMachine on its own, which can collide with another StateMachine's.
+    """
+    statemachine = tables.statemachine
+    module = name or output_names([statemachine])[0]
+    states = tables.states
+    reserved = ["STATE_NAMES", "EVENTS", "PARENT", "ENTRY", "EXIT", "RUN", "TRANSITIONS", "START"]
+    state_names = unique_names(reserved + [state.title for state in states])[len(reserved):]
+    class_name = _class_name(statemachine.title, reserved + state_names)
+
+    lines = [
+        f'"""Generated by sm_codegen_py.py from {statemachine.path()}; do not edit."""',
+        "",
+        "from collections import deque as _deque",
+        "",
+        "# States",
+    ]
+    lines += [f"{name} = {i}" for i, name in enumerate(state_names)]
+    lines += [
+        "",
+        f"STATE_NAMES = {tuple(state.title for state in states)!r}",
+        f"EVENTS = {tuple(tables.events)!r}",
+        "# Enclosing state of each state (-1 above the StateMachine)",
+        f"PARENT = {tuple(tables.parent)!r}",
+        "",
+    ]
+
+    # Action code per (type, state): the valid texts of its action nodes, joined in child order
+    action_names: Dict[tuple, str] = {}
+    comments: List[str] = []
+    for node_type in ("Entry", "Exit", "Run"):
+        code_lines = []
+        for i, nodes in sorted(tables.actions[node_type].items()):
+            texts = [node.user_text for node in nodes if _compiles(node.user_text)]
+            skipped = [node.user_text for node in nodes if not _compiles(node.user_text)]
+            for text in skipped:
+                comments.append(f"# {node_type} of {states[i].path()} (not valid Python):")
+                comments += [f"#   {line}".rstrip() for line in text.splitlines()]
+            if texts:
+                name = f"{node_type.upper()}[{state_names[i]}]"
+                action_names[(node_type, i)] = name
+                source = "\n".join(texts)
+                code_lines.append(f"    {state_names[i]}: compile({source!r}, "
+                                  f"{f'<{node_type} of {states[i].title}>'!r}, 'exec'),")
+        lines.append(f"# {node_type} action code by state")
+        lines.append(f"{node_type.upper()} = {{")
+        lines += code_lines
+        lines += ["}", ""]
+    if comments:
+        lines += comments + [""]
+
+    def step_literal(step):
+        actions = tuple((state, node_type) for node_type, state in step.actions
+                        if (node_type, state) in action_names)
+        parts = ", ".join(f"({state_names[state]}, {node_type.upper()}[{state_names[state]}])"
+                          for state, node_type in actions)
+        return f"(({parts}{',' if len(actions) == 1 else ''}), {state_names[step.leaf]}, {step.fired})"
+
+    lines += [
+        "# (active leaf, event) -> ((state, action code), ...), new leaf, transitions fired",
+        f"START = {step_literal(tables.start)}",
+        "TRANSITIONS = {",
+    ]
+    for leaf, row in enumerate(tables.step_table):
+        for event, step_id in enumerate(row):
+            if step_id:
+                lines.append(f"    ({state_names[leaf]}, {tables.events[event]!r}): "
+                             f"{step_literal(tables.steps[step_id])},")
+    lines += ["}", ""]
+
+    lines += f'''
+class {class_name}:
+    """One running instance of {statemachine.title}; state is the active leaf."""
+
+    __slots__ = ('state', 'context', '_queue', '_busy')
+
+    def __init__(self, context=None):
+        self.state = -1
+        self.context = context if context is not None else {{}}
+        self.context['raise_event'] = self.raise_event
+        self.context['post'] = self.raise_event
+        self._queue = _deque()
+        self._busy = False
+
+    def start(self):
+        """Enter the initial configuration."""
+        self._queue.clear()
+        self._busy = True
+        try:
+            self._run_step(START)
+        finally:
+            self._busy = False
+        self._drain()
+
+    def dispatch(self, event):
+        """Process an event, then every event raised meanwhile; returns the transitions fired."""
+        if self._busy:
+            self._queue.append(event)
+            return 0
+        step = TRANSITIONS.get((self.state, event))
+        fired = 0
+        if step is not None:
+            self._busy = True
+            try:
+                fired = self._run_step(step)
+            finally:
+                self._busy = False
+        if self._queue:
+            fired += self._drain()
+        return fired
+
+    def raise_event(self, event):
+        """Queue an event; it is processed after the current one."""
+        self._queue.append(event)
+
+    def tick(self):
+        """Run the Run actions of the active leaf and its enclosing states, leaf first."""
+        context = self.context
+        state = self.state
+        self._busy = True
+        try:
+            while state >= 0:
+                code = RUN.get(state)
+                if code is not None:
+                    context['state'] = STATE_NAMES[state]
+                    exec(code, context)
+                state = PARENT[state]
+        finally:
+            self._busy = False
+        self._drain()
+
+    def _run_step(self, step):
+        actions, self.state, fired = step
+        if actions:
+            context = self.context
+            for state, code in actions:
+                context['state'] = STATE_NAMES[state]
+                exec(code, context)
+        return fired
+
+    def _drain(self):
+        queue = self._queue
+        fired = 0
+        self._busy = True
+        try:
+            while queue:
+                step = TRANSITIONS.get((self.state, queue.popleft()))
+                if step is not None:
+                    fired += self._run_step(step)
+        finally:
+            self._busy = False
+        return fired
+'''.splitlines()[1:]
+    return {f"{module}.py": "\n".join(lines) + "\n"}
+
+
+def generate_design(model: DesignModel) -> Dict[StateNode, Dict[str, str]]:
+    """Generated files of every StateMachine in the design, by StateMachine."""
+    compiled = compile_design(model)
+    statemachines = [node for node in model.nodes.values() if node.node_type == "StateMachine"]
+    return {statemachine: generate_py(StateMachineTables(compiled, statemachine), name)
+            for statemachine, name in zip(statemachines, output_names(statemachines))}
+
+
+def main(argv=None):
+    """Generate Python modules for every StateMachine of a design file."""
+    argv = sys.argv if argv is None else argv
+    if len(argv) < 2:
+        print("Usage: python sm_codegen_py.py <design.json> [output_dir]")
+        sys.exit(1)
+
+    design_file = argv[1]
+    output_dir = argv[2] if len(argv) >= 3 else os.path.splitext(design_file)[0] + "_py"
+    try:
+        model = DesignModel.from_file(design_file)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    os.makedirs(output_dir, exist_ok=True)
+    for statemachine, files in generate_design(model).items():
+        for name, text in files.items():
+            with open(os.path.join(output_dir, name), 'w') as f:
+                f.write(text)
+        print(f"  {statemachine.path()}: {', '.join(files)}")
+    print(f"✅ Python code written to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
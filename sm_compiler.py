@@ -0,0 +1,322 @@
+"""
+State Machine Compiler
+Turns a DesignModel into integer tables for the simulator:
+
+- states: State/StateMachine nodes, indexed 0..n-1, with parent (-1 above a
+  StateMachine), depth and owning StateMachine arrays
+- interned event IDs (transition titles)
+- enabled[event][leaf]: the transitions an event fires when ``leaf`` is the
+  active leaf of its StateMachine (transitions from the leaf or any ancestor)
+- descent[state]: the initial-child chain entered below a state
+- transition plans: exit and entry sequences between an active leaf and a
+  target, computed once through the lowest common ancestor, memoized and
+  numbered in the order they were first needed
+
+Compiled designs are cached by a fingerprint of the model structure, so the
+tables are rebuilt only when the design changes.
+
+StateMachineTables flattens one StateMachine of a compiled design for the
+code generators: a (state, event) -> step table where each step is the
+complete effect of an event, i.e. every transition it fires, with the
+Entry/Exit actions to run and the new active leaf.
+"""
+
+import copy
+import hashlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sm_model import DesignModel, StateNode, Transition, ACTION_TYPES, STATE_TYPES
+
+# Number of compiled designs kept by compile_design()
+CACHE_SIZE = 8
+
+_cache: "OrderedDict[str, CompiledDesign]" = OrderedDict()
+
+
+class CompiledDesign:
+    """Integer tables for dispatching events on one design."""
+
+    def __init__(self, model: DesignModel):
+        self.model = model
+
+        # State index
+        self.states: List[StateNode] = []
+        self.index: Dict[StateNode, int] = {}
+        for node in model.nodes.values():
+            if node.node_type in STATE_TYPES and DesignModel.find_statemachine(node) is not None:
+                self.index[node] = len(self.states)
+                self.states.append(node)
+        count = len(self.states)
+
+        # Parent / depth / StateMachine arrays; a StateMachine is the root of its own tree
+        self.parent = array('i', [-1]) * count
+        self.depth = array('i', [0]) * count
+        self.statemachine = array('i', [-1]) * count
+        self.children: List[List[int]] = [[] for _ in range(count)]
+        for i, node in enumerate(self.states):
+            if node.node_type != "StateMachine":
+                parent_index = self.index.get(node.parent, -1)
+                self.parent[i] = parent_index
+                if parent_index >= 0:
+                    self.children[parent_index].append(i)
+        for i, node in enumerate(self.states):
+            self.statemachine[i] = self.index[DesignModel.find_statemachine(node)]
+            chain = []
+            current = i
+            while current >= 0 and self.depth[current] == 0 and self.parent[current] >= 0:
+                chain.append(current)
+                current = self.parent[current]
+            depth = self.depth[current] if current >= 0 else -1
+            for item in reversed(chain):
+                depth += 1
+                self.depth[item] = depth
+
+        # Initial descent below every state (initial State child, else first State child)
+        initial = array('i', [-1]) * count
+        for i, node in enumerate(self.states):
+            child = DesignModel.initial_child(node)
+            if child is not None and child in self.index:
+                initial[i] = self.index[child]
+        self.initial = initial
+        self.descent: List[Tuple[int, ...]] = []
+        for i in range(count):
+            chain = []
+            node = initial[i]
+            while node >= 0:
+                chain.append(node)
+                node = initial[node]
+            self.descent.append(tuple(chain))
+
+        # Transitions and interned events
+        self.transitions: List[Transition] = model.transitions
+        self.target = array('i', [-1]) * len(self.transitions)
+        self.event_ids: Dict[str, int] = {}
+        self.event_names: List[str] = []
+        self.enabled: List[Dict[int, Tuple[int, ...]]] = []
+        leaves_below: Dict[int, Tuple[int, ...]] = {}
+        rows: List[Dict[int, List[int]]] = []
+        for transition in self.transitions:
+            source = self.index.get(transition.source, -1)
+            target = self.index.get(transition.target, -1)
+            if source < 0 or target < 0:
+                continue
+            self.target[transition.index] = target
+            event = self.event_ids.get(transition.title)
+            if event is None:
+                event = len(self.event_names)
+                self.event_ids[transition.title] = event
+                self.event_names.append(transition.title)
+                rows.append({})
+            row = rows[event]
+            leaves = leaves_below.get(source)
+            if leaves is None:
+                leaves = leaves_below[source] = self._leaves_below(source)
+            for leaf in leaves:
+                row.setdefault(leaf, []).append(transition.index)
+        self.enabled = [{leaf: tuple(ids) for leaf, ids in row.items()} for row in rows]
+
+        self._plans: Dict[Tuple[int, int], Optional[tuple]] = {}
+        self.plans: List[tuple] = []  # Memoized plans by number
+
+    def bound_to(self, model: DesignModel) -> 'CompiledDesign':
+        """The same tables for an equivalent model (same IDs and order), bound to its objects.
+
+        The integer tables and the plan memo are shared with this instance;
+        this instance itself is left untouched, so simulators built on it
+        keep working.
+        """
+        compiled = copy.copy(self)
+        compiled.model = model
+        compiled.states = [model.nodes[node.id] for node in self.states]
+        compiled.index = {node: i for i, node in enumerate(compiled.states)}
+        compiled.transitions = model.transitions
+        return compiled
+
+    def _leaves_below(self, state):
+        """States under state (itself included) that can be an active leaf."""
+        leaves = []
+        pending = [state]
+        while pending:
+            node = pending.pop()
+            if self.initial[node] < 0:
+                leaves.append(node)
+            pending.extend(self.children[node])
+        return tuple(leaves)
+
+    def is_inside(self, state, ancestor):
+        """True if state is ancestor or one of its descendants (within a StateMachine)."""
+        depth = self.depth[ancestor]
+        while state >= 0 and self.depth[state] > depth:
+            state = self.parent[state]
+        return state == ancestor
+
+    def plan(self, leaf, target):
+        """Exit/entry sequence for moving from active leaf (-1 if not started) to target.
+
+        Returns (exits, entries, new_leaf, number) with state indices, exits
+        innermost first and entries outermost first, and the plan's index in
+        plans; None if target is already active.
+        """
+        key = (leaf, target)
+        try:
+            return self._plans[key]
+        except KeyError:
+            pass
+
+        if leaf < 0:
+            # Not running yet: enter from the StateMachine down
+            exits = ()
+            entries = []
+            node = target
+            while node >= 0:
+                entries.append(node)
+                node = self.parent[node]
+            entries.reverse()
+        elif self.is_inside(leaf, target):
+            self._plans[key] = None
+            return None
+        else:
+            # Lowest common ancestor of the leaf and the target
+            a, b = leaf, target
+            exits = []
+            entries = []
+            while self.depth[a] > self.depth[b]:
+                exits.append(a)
+                a = self.parent[a]
+            while self.depth[b] > self.depth[a]:
+                entries.append(b)
+                b = self.parent[b]
+            while a != b and a >= 0 and b >= 0:
+                exits.append(a)
+                entries.append(b)
+                a = self.parent[a]
+                b = self.parent[b]
+            exits = tuple(exits)
+            entries.reverse()
+
+        descent = self.descent[target]
+        entries.extend(descent)
+        new_leaf = descent[-1] if descent else target
+        result = (exits, tuple(entries), new_leaf, len(self.plans))
+        self._plans[key] = result
+        self.plans.append(result)
+        return result
+
+
+class Step(NamedTuple):
+    """Effect of an event on one active leaf (or of starting the StateMachine)."""
+    actions: Tuple[Tuple[str, int], ...]  # ("Exit" | "Entry", state) for states with that action, in order
+    leaf: int  # The new active leaf
+    fired: int  # Transitions the event enabled, including suppressed ones
+
+
+class StateMachineTables:
+    """Flat tables of one StateMachine, with states numbered locally (the StateMachine is 0).
+
+    step_table[state][event] is an index into steps, 0 (no transition) for
+    events that fire nothing from that leaf and for every non-leaf row.
+    Transitions into another StateMachine and untitled transitions are left
+    out: the former belong to the other StateMachine's instance, the latter
+    cannot be dispatched by event.
+    """
+
+    def __init__(self, compiled: CompiledDesign, statemachine: StateNode):
+        self.statemachine = statemachine
+        root = compiled.index[statemachine]
+
+        # Local numbering: depth-first in child order from the StateMachine
+        order = []
+        pending = [root]
+        while pending:
+            state = pending.pop()
+            order.append(state)
+            pending.extend(reversed(compiled.children[state]))
+        local = {state: i for i, state in enumerate(order)}
+        self.states: List[StateNode] = [compiled.states[state] for state in order]
+        self.parent: List[int] = [local.get(compiled.parent[state], -1) for state in order]
+
+        # Actions: state -> action nodes with text, per action type
+        self.actions: Dict[str, Dict[int, List[StateNode]]] = {node_type: {} for node_type in ACTION_TYPES}
+        for i, state in enumerate(self.states):
+            for child in state.children:
+                if child.node_type in ACTION_TYPES and child.user_text.strip():
+                    self.actions[child.node_type].setdefault(i, []).append(child)
+
+        # Events fired by transitions within this StateMachine, in design order
+        self.events: List[str] = []
+        event_ids = []  # Local event -> compiled event ID
+        for transition in compiled.transitions:
+            target = compiled.target[transition.index]
+            if (target < 0 or not transition.title or transition.source not in compiled.index
+                    or compiled.index[transition.source] not in local or target not in local):
+                continue
+            if transition.title not in self.events:
+                self.events.append(transition.title)
+                event_ids.append(compiled.event_ids[transition.title])
+
+        self.steps: List[Step] = [Step((), -1, 0)]
+        self.step_table: List[List[int]] = [[0] * len(self.events) for _ in order]
+        step_ids: Dict[Step, int] = {}
+        leaves = [i for i, state in enumerate(order) if compiled.initial[state] < 0]
+        for leaf in leaves:
+            row = self.step_table[leaf]
+            for event, event_id in enumerate(event_ids):
+                enabled = [index for index in compiled.enabled[event_id].get(order[leaf], ())
+                           if compiled.target[index] in local]
+                if not enabled:
+                    continue
+                step = self._step(compiled, local, order[leaf], enabled)
+                step_id = step_ids.get(step)
+                if step_id is None:
+                    step_id = step_ids[step] = len(self.steps)
+                    self.steps.append(step)
+                row[event] = step_id
+        self.start: Step = self._step(compiled, local, -1, None, root)
+
+    def _step(self, compiled, local, leaf, enabled, start=None) -> Step:
+        """Compose the plans of the enabled transitions fired from leaf in order, as the simulator does."""
+        targets = [start] if enabled is None else [compiled.target[index] for index in enabled]
+        actions = []
+        for target in targets:
+            plan = compiled.plan(leaf, target)
+            if plan is None:
+                continue
+            exits, entries, leaf, _ = plan
+            actions.extend(("Exit", local[state]) for state in exits if local[state] in self.actions["Exit"])
+            actions.extend(("Entry", local[state]) for state in entries if local[state] in self.actions["Entry"])
+        return Step(tuple(actions), local[leaf], len(targets) if enabled is not None else 0)
+
+
+def design_fingerprint(model: DesignModel) -> str:
+    """Hash of everything the compiled tables depend on (hierarchy, types, initial flags, transitions)."""
+    digest = hashlib.sha1()
+    for node in model.nodes.values():
+        parent_id = node.parent.id if node.parent is not None else None
+        digest.update(repr((node.id, node.node_type, node.is_initial, parent_id)).encode())
+    for transition in model.transitions:
+        source_id = transition.source.id if transition.source is not None else None
+        target_id = transition.target.id if transition.target is not None else None
+        digest.update(repr((transition.title, source_id, target_id)).encode())
+    return digest.hexdigest()
+
+
+def compile_design(model: DesignModel) -> CompiledDesign:
+    """Compile a model, reusing the cached tables when an identical design was compiled before.
+
+    On a cache hit for another model the tables are shared through a new
+    CompiledDesign bound to that model's nodes and transitions, which are
+    equal by structure to the ones the tables were built from.
+    """
+    fingerprint = design_fingerprint(model)
+    compiled = _cache.get(fingerprint)
+    if compiled is not None:
+        _cache.move_to_end(fingerprint)
+        return compiled if compiled.model is model else compiled.bound_to(model)
+
+    compiled = CompiledDesign(model)
+    _cache[fingerprint] = compiled
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return compiled
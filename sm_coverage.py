@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Simulation Coverage
+Per-state and per-transition hit counters for simulator runs. The simulator
+bumps one array counter per taken plan and one per fired transition (see
+Simulator.enable_coverage); state entry counts are derived from the plans'
+entry sequences, like everything else, when the counts are read.
+
+    python sm_coverage.py design.json events.txt [coverage.json]
+
+runs an event trace from the initial configuration and writes the counts as
+JSON, listing the States and transitions that were never exercised.
+"""
+
+import json
+import math
+import os
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from sm_compiler import CompiledDesign
+
+# Heat of the least-used covered item, so any hit stands out from zero
+MIN_COVERED_HEAT = 0.2
+
+
+def heat_rgb(heat: Optional[float]) -> Tuple[int, int, int]:
+    """Heat-map colour: red for never hit (0.0), through amber to green for the most hits (1.0)."""
+    if heat is None or heat <= 0:
+        return (231, 76, 60)
+    heat = min(heat, 1.0)
+    if heat < 0.6:
+        t = max(0.0, (heat - MIN_COVERED_HEAT) / (0.6 - MIN_COVERED_HEAT))
+        return (243, int(156 + (196 - 156) * t), 18)
+    t = (heat - 0.6) / 0.4
+    return (int(243 - (243 - 46) * t), int(196 + (204 - 196) * t), int(18 + (113 - 18) * t))
+
+
+class Coverage:
+    """Hit counts for the states and transitions of a compiled design.
+
+    plan_hits[i] counts the times compiled plan i was taken (including by
+    start()); transition_hits[i] counts firings of design edge i. state_hits
+    is derived from them on access.
+    """
+
+    def __init__(self, compiled: CompiledDesign):
+        self.compiled = compiled
+        self.plan_hits = array('q', [0]) * len(compiled.plans)
+        self.transition_hits = array('q', [0]) * len(compiled.transitions)
+
+    def reset(self):
+        for counters in (self.plan_hits, self.transition_hits):
+            counters[:] = array('q', [0]) * len(counters)
+
+    def count_new_plan(self, number):
+        """Count a plan memoized after the counters were sized."""
+        self.plan_hits.extend(array('q', [0]) * (len(self.compiled.plans) - len(self.plan_hits)))
+        self.plan_hits[number] += 1
+
+    @property
+    def state_hits(self) -> array:
+        """Entries per compiled state index: the entries of every taken plan, times its hits."""
+        counts = array('q', [0]) * len(self.compiled.states)
+        plans = self.compiled.plans
+        for number, hits in enumerate(self.plan_hits):
+            if hits:
+                for state in plans[number][1]:
+                    counts[state] += hits
+        return counts
+
+    def state_count(self, state) -> int:
+        index = self.compiled.index.get(state)
+        if index is None:
+            return 0
+        plans = self.compiled.plans
+        return sum(hits for number, hits in enumerate(self.plan_hits) if hits and index in plans[number][1])
+
+    def transition_count(self, transition) -> int:
+        return self.transition_hits[transition.index]
+
+    def _simulated_transitions(self) -> List[int]:
+        """Indices of the transitions the simulator can fire (both ends are states)."""
+        return [i for i, target in enumerate(self.compiled.target) if target >= 0]
+
+    def uncovered_states(self):
+        """States never entered (StateMachines excluded: start() always enters them)."""
+        state_hits = self.state_hits
+        return [state for i, state in enumerate(self.compiled.states)
+                if state_hits[i] == 0 and state.node_type == "State"]
+
+    def uncovered_transitions(self):
+        """Simulated transitions that never fired."""
+        transitions = self.compiled.transitions
+        return [transitions[i] for i in self._simulated_transitions() if self.transition_hits[i] == 0]
+
+    def summary(self) -> Dict[str, object]:
+        states = [i for i, state in enumerate(self.compiled.states) if state.node_type == "State"]
+        transitions = self._simulated_transitions()
+        state_hits = self.state_hits
+        states_hit = sum(1 for i in states if state_hits[i])
+        transitions_hit = sum(1 for i in transitions if self.transition_hits[i])
+        return {
+            'states': len(states),
+            'states_covered': states_hit,
+            'state_coverage': states_hit / len(states) if states else 1.0,
+            'transitions': len(transitions),
+            'transitions_covered': transitions_hit,
+            'transition_coverage': transitions_hit / len(transitions) if transitions else 1.0,
+        }
+
+    @staticmethod
+    def _heat(counts) -> List[float]:
+        """0.0 for no hits, else MIN_COVERED_HEAT..1.0 on a log scale up to the largest count."""
+        top = max(counts, default=0)
+        if top <= 0:
+            return [0.0] * len(counts)
+        scale = (1.0 - MIN_COVERED_HEAT) / math.log1p(top)
+        return [MIN_COVERED_HEAT + math.log1p(count) * scale if count else 0.0 for count in counts]
+
+    def state_heat(self) -> List[float]:
+        """Heat per compiled state index (see heat_rgb)."""
+        return self._heat(self.state_hits)
+
+    def transition_heat(self) -> List[float]:
+        """Heat per transition index; transitions the simulator cannot fire get 0.0."""
+        return self._heat(self.transition_hits)
+
+    def to_json(self) -> dict:
+        compiled = self.compiled
+        state_hits = self.state_hits
+        states = [{'id': state.id, 'path': state.path(), 'node_type': state.node_type,
+                   'hits': state_hits[i]}
+                  for i, state in enumerate(compiled.states)]
+        transitions = []
+        for i in self._simulated_transitions():
+            transition = compiled.transitions[i]
+            transitions.append({'index': i, 'title': transition.title,
+                                'source': transition.source.path(), 'target': transition.target.path(),
+                                'hits': self.transition_hits[i]})
+        return {'summary': self.summary(), 'states': states, 'transitions': transitions}
+
+    def save(self, file_path: str):
+        with open(file_path, 'w') as f:
+            json.dump(self.to_json(), f, indent=2, ensure_ascii=False)
+
+
+def main(argv=None):
+    """Run an event trace and write its coverage."""
+    from sm_model import DesignModel
+    from sm_simulator import Simulator, read_event_trace
+
+    argv = sys.argv if argv is None else argv
+    if len(argv) < 3:
+        print("Usage: python sm_coverage.py <design.json> <events.txt|events.json> [coverage.json]")
+        sys.exit(1)
+
+    design_file, events_file = argv[1], argv[2]
+    if len(argv) >= 4:
+        output_file = argv[3]
+    else:
+        output_file = f"{os.path.splitext(events_file)[0]}_coverage.json"
+
+    try:
+        model = DesignModel.from_file(design_file)
+        events = read_event_trace(events_file)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    simulator = Simulator(model)
+    coverage = simulator.enable_coverage()
+    simulator.start()
+    simulator.dispatch_many(events)
+    coverage.save(output_file)
+
+    summary = coverage.summary()
+    print(f"States:      {summary['states_covered']}/{summary['states']} "
+          f"({summary['state_coverage']:.0%})")
+    print(f"Transitions: {summary['transitions_covered']}/{summary['transitions']} "
+          f"({summary['transition_coverage']:.0%})")
+    for state in coverage.uncovered_states():
+        print(f"  never entered: {state.path()}")
+    for transition in coverage.uncovered_transitions():
+        print(f"  never fired:   {transition.title} ({transition.source.title} -> {transition.target.title})")
+    print(f"✅ Coverage written to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
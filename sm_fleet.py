@@ -0,0 +1,147 @@
+"""
+Fleet Simulator
+Vectorized simulation of many instances of one StateMachine. The compiled
+tables (sm_compiler) are folded into a dense ``next_leaf[event, state]``
+NumPy array, so advancing every instance is a single array gather.
+
+Each instance behaves like a Simulator running only that StateMachine:
+transitions whose target lies in another StateMachine are ignored, and
+entry/exit callbacks are not reported.
+"""
+
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from sm_compiler import CompiledDesign, compile_design
+from sm_model import DesignModel, StateNode
+
+
+class Fleet:
+    """Many instances of one StateMachine, advanced with array operations."""
+
+    def __init__(self, model: DesignModel, count: int,
+                 statemachine: Optional[Union[StateNode, str]] = None,
+                 compiled: Optional[CompiledDesign] = None):
+        self.model = model
+        self.compiled = compiled if compiled is not None else compile_design(model)
+        self.statemachine = self._resolve_statemachine(statemachine)
+
+        compiled = self.compiled
+        sm_index = compiled.index[self.statemachine]
+        if compiled.initial[sm_index] < 0:
+            raise ValueError(f"StateMachine '{self.statemachine.title}' has no State to start in")
+
+        # Local numbering of this StateMachine's states
+        self.state_indices = np.array(
+            [i for i in range(len(compiled.states)) if compiled.statemachine[i] == sm_index], dtype=np.int32)
+        local = {int(state): i for i, state in enumerate(self.state_indices)}
+        self.states = [compiled.states[i] for i in self.state_indices]
+        self.event_names = list(compiled.event_names)
+        self.event_ids = dict(compiled.event_ids)
+        self.noop_event = len(self.event_names)  # Row used for unknown events
+
+        # next_leaf[event, state]: leaf after an event fires its enabled transitions in order
+        state_count = len(self.states)
+        table = np.tile(np.arange(state_count, dtype=np.int32), (len(self.event_names) + 1, 1))
+        for event, row in enumerate(compiled.enabled):
+            for leaf, transitions in row.items():
+                if compiled.statemachine[leaf] != sm_index:
+                    continue
+                current = leaf
+                for transition in transitions:
+                    target = compiled.target[transition]
+                    if compiled.statemachine[target] != sm_index:
+                        continue
+                    plan = compiled.plan(current, target)
+                    if plan is not None:
+                        current = plan[2]
+                table[event, local[leaf]] = local[current]
+        self.next_leaf = table
+
+        self.initial_state = local[compiled.plan(-1, sm_index)[2]]
+        self.active = np.full(count, self.initial_state, dtype=np.int32)
+        self._scratch = np.empty_like(self.active)
+
+    def _resolve_statemachine(self, statemachine):
+        if isinstance(statemachine, StateNode):
+            return statemachine
+        candidates = self.model.statemachines()
+        if statemachine is None:
+            if not candidates:
+                raise ValueError("Design has no StateMachine to simulate")
+            return candidates[0]
+        for candidate in candidates:
+            if candidate.title == statemachine:
+                return candidate
+        raise ValueError(f"No StateMachine titled '{statemachine}'")
+
+    @property
+    def count(self) -> int:
+        return len(self.active)
+
+    def reset(self):
+        """Put every instance back in the initial configuration."""
+        self.active.fill(self.initial_state)
+
+    def encode_events(self, events: Iterable[str]) -> np.ndarray:
+        """Event titles to event IDs (unknown titles map to a no-op event)."""
+        event_ids = self.event_ids
+        noop = self.noop_event
+        return np.fromiter((event_ids.get(event, noop) for event in events), dtype=np.int32)
+
+    def step(self, event: Union[str, int]):
+        """Deliver the same event to every instance."""
+        if isinstance(event, str):
+            event = self.event_ids.get(event, self.noop_event)
+        np.take(self.next_leaf[event], self.active, out=self._scratch)
+        self.active, self._scratch = self._scratch, self.active
+
+    def dispatch(self, instances, events):
+        """Deliver a batch of (instance, event) pairs; pairs for one instance apply in batch order.
+
+        ``events`` may hold titles or IDs from encode_events(). Instances that
+        appear several times are advanced in rounds, one occurrence per round.
+        """
+        instances = np.asarray(instances, dtype=np.intp)
+        events = np.asarray(events)
+        if events.dtype.kind not in 'iu':
+            events = self.encode_events(events.tolist())
+        if len(instances) != len(events):
+            raise ValueError("instances and events must have the same length")
+        if len(instances) == 0:
+            return
+
+        occurrences = np.bincount(instances, minlength=self.count)
+        if occurrences.max() <= 1:
+            active = self.active
+            active[instances] = self.next_leaf[events, active[instances]]
+            return
+
+        # Group the pairs by instance (keeping batch order), then apply the
+        # r-th pair of every group that has one in round r
+        order = np.argsort(instances, kind='stable')
+        sorted_instances = instances[order]
+        group_start = np.flatnonzero(np.r_[True, sorted_instances[1:] != sorted_instances[:-1]])
+        group_size = np.diff(np.r_[group_start, len(sorted_instances)])
+
+        active = self.active
+        next_leaf = self.next_leaf
+        for round_number in range(int(group_size.max())):
+            if round_number:
+                remaining = group_size > round_number
+                group_start = group_start[remaining]
+                group_size = group_size[remaining]
+            pairs = order[group_start + round_number]
+            round_instances = instances[pairs]
+            active[round_instances] = next_leaf[events[pairs], active[round_instances]]
+
+    def active_states(self, instances=None):
+        """Active leaf StateNode of each instance (or of the given instances)."""
+        active = self.active if instances is None else self.active[np.asarray(instances, dtype=np.intp)]
+        return [self.states[state] for state in active.tolist()]
+
+    def state_counts(self):
+        """Number of instances in each leaf state, as {StateNode: count} for occupied states."""
+        counts = np.bincount(self.active, minlength=len(self.states))
+        return {self.states[i]: int(counts[i]) for i in np.flatnonzero(counts)}
@@ -2,12 +2,48 @@
 """
 Statechart Diagram Generator
 Generates an HTML/CSS page with nested statechart diagrams from a JSON design file.
+The page is written to the output file fragment by fragment as it is generated.
+With --target canvas the page draws the design on a canvas from embedded
+JSON instead, for designs too large for one SVG element per node and edge.
+
+Given a directory or glob pattern of designs, exports them all in parallel
+processes into an output directory, with the stylesheet and script written
+once under assets/ and an index.html linking the pages:
+
+    python sm_json_to_html.py "models/**/*.json" docs/statecharts [--jobs N] [--target canvas]
+
+--trace run.smtrace embeds a recorded simulator trace (sm_trace) in the page
+with a player that highlights the active states step by step.
 """
 
+import base64
+import contextlib
+import glob
+import html
+import io
 import json
 import sys
 import os
-from typing import Dict, List, Tuple, Optional
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+# Whole-number coordinates below this add up exactly in floating point in any order
+EXACT_LIMIT = 2 ** 40
+
+# Export targets: one SVG element per node and edge, or a canvas drawn from embedded JSON
+EXPORT_TARGETS = ("svg", "canvas")
+
+# Rows per fragment when streaming the canvas page's JSON
+JSON_CHUNK_ROWS = 1000
+
+# Trace columns embedded for the page's player, in order (see encode_trace). The event,
+# source and target of a step follow from its transition and states, so they are left out.
+TRACE_COLUMNS = ('transitions', 'exit_counts', 'entry_counts', 'states')
+
+# Batch export: directory of the shared stylesheets and scripts, and the index page, in the output directory
+ASSET_DIR = "assets"
+INDEX_PAGE = "index.html"
 
 
 class StatechartGenerator:
@@ -19,6 +55,10 @@ class StatechartGenerator:
         self.nodes = []
         self.edges = []
         self.node_map = {}  # Map node IDs to node data
+        # Built once per design (see _build_indexes)
+        self._hierarchy = None
+        self._edge_index = None
+        self._positions = {}  # Node ID -> (x, y, exact) absolute position
         self.load_design()
         
     def load_design(self):
@@ -41,7 +81,12 @@ class StatechartGenerator:
             sys.exit(1)
             
     def get_node_hierarchy(self) -> Dict:
-        """Build a hierarchy of nodes based on parent-child relationships."""
+        """Hierarchy of nodes based on parent-child relationships (built once)."""
+        if self._hierarchy is None:
+            self._hierarchy = self._build_hierarchy()
+        return self._hierarchy
+    
+    def _build_hierarchy(self) -> Dict:
         hierarchy = {
             'root': [],
             'children': {}
@@ -61,20 +106,53 @@ class StatechartGenerator:
         return hierarchy
     
     def get_node_edges(self, node_id: int) -> Tuple[List, List]:
-        """Get incoming and outgoing edges for a node."""
-        incoming = []
-        outgoing = []
-        
-        for edge in self.edges:
-            if edge['start_node_id'] == node_id:
-                outgoing.append(edge)
-            if edge['end_node_id'] == node_id:
-                incoming.append(edge)
-                
-        return incoming, outgoing
+        """Get incoming and outgoing edges for a node (from an index built on first use)."""
+        if self._edge_index is None:
+            self._edge_index = {}
+            for edge in self.edges:
+                self._edge_index.setdefault(edge['start_node_id'], ([], []))[1].append(edge)
+                self._edge_index.setdefault(edge['end_node_id'], ([], []))[0].append(edge)
+        incoming, outgoing = self._edge_index.get(node_id, ([], []))
+        return list(incoming), list(outgoing)
     
     def calculate_absolute_position(self, node: Dict) -> Tuple[float, float]:
-        """Calculate the absolute position of a node considering parent positions."""
+        """Calculate the absolute position of a node considering parent positions.
+        
+        Positions are memoized and built from the parent's position, so every
+        node costs O(1). That only gives the same floats as adding up the
+        chain from the node outwards when the coordinates are whole numbers
+        (as the editor's grid snapping produces); other nodes take the walk.
+        """
+        cached = self._positions.get(node['id'])
+        if cached is None:
+            cached = self._memoize_position(node)
+        return cached[0], cached[1]
+    
+    def _memoize_position(self, node: Dict) -> Tuple[float, float, bool]:
+        # Unmemoized ancestors first, outermost last, so the loop below finds each parent cached
+        chain = [node]
+        parent_id = node.get('parent_id')
+        while parent_id is not None and parent_id not in self._positions:
+            parent = self.node_map.get(parent_id)
+            if parent is None:
+                break
+            chain.append(parent)
+            parent_id = parent.get('parent_id')
+        for current in reversed(chain):
+            x = current['pos']['x']
+            y = current['pos']['y']
+            exact = (float(x).is_integer() and float(y).is_integer()
+                     and abs(x) < EXACT_LIMIT and abs(y) < EXACT_LIMIT)
+            parent = self._positions.get(current.get('parent_id'))
+            if parent is None:
+                self._positions[current['id']] = self._walk_position(current) + (exact,)
+            elif exact and parent[2]:
+                self._positions[current['id']] = (x + parent[0], y + parent[1] + 30, True)
+            else:
+                self._positions[current['id']] = self._walk_position(current) + (False,)
+        return self._positions[node['id']]
+    
+    def _walk_position(self, node: Dict) -> Tuple[float, float]:
         x = node['pos']['x']
         y = node['pos']['y']
         
@@ -94,11 +172,34 @@ class StatechartGenerator:
     
     def generate_svg_arrow(self, edge: Dict) -> str:
         """Generate SVG path for an edge with arrow using orthogonal routing."""
+        geometry = self._edge_geometry(edge)
+        if geometry is None:
+            return ""
+        points, label_x, label_y, text_anchor = geometry
+        path = ' '.join([f'M {points[0][0]},{points[0][1]}'] +
+                        [f'L {x},{y}' for x, y in points[1:]])
+        
+        # Generate unique ID for this edge
+        edge_id = f"edge_{edge['start_node_id']}_{edge['end_node_id']}"
+        
+        svg = f'''
+        <g class="edge" id="{edge_id}" style="pointer-events: all;">
+            <path d="{path}" class="edge-path" fill="none" stroke="#aaddff" stroke-width="2" marker-end="url(#arrowhead)" style="opacity: 1;"/>
+            <text class="edge-label" x="{label_x}" y="{label_y}" text-anchor="{text_anchor}" fill="#ddd" font-size="12" style="pointer-events: none;">
+                {edge.get('title', '')}
+            </text>
+        </g>
+        '''
+        
+        return svg
+    
+    def _edge_geometry(self, edge: Dict) -> Optional[Tuple[List[Tuple[float, float]], float, float, str]]:
+        """Orthogonal route of an edge: (points, label x, label y, text anchor), or None if a node is missing."""
         start_node = self.node_map.get(edge['start_node_id'])
         end_node = self.node_map.get(edge['end_node_id'])
         
         if not start_node or not end_node:
-            return ""
+            return None
         
         # Calculate absolute positions of nodes
         start_node_x, start_node_y = self.calculate_absolute_position(start_node)
@@ -158,27 +259,24 @@ class StatechartGenerator:
         norm_y = abs(rel_y) / (end_node_height / 2) if end_node_height > 0 else 0
         
         # Create orthogonal path
-        path_parts = []
-        path_parts.append(f'M {start_x},{start_y}')  # Move to start
+        points = [(start_x, start_y)]  # Move to start
         
         # Determine if we should approach horizontally or vertically based on which border we're connecting to
         if norm_x > norm_y:
             # Connecting to left or right side - approach horizontally
             # Path: start -> horizontal to waypoint_x -> vertical to end_y -> horizontal to end_x
-            path_parts.append(f'L {waypoint_x},{start_y}')  # Horizontal to waypoint
-            path_parts.append(f'L {waypoint_x},{end_y}')    # Vertical to end Y level
-            path_parts.append(f'L {end_x},{end_y}')         # Horizontal to end (arrow points horizontally)
+            points.append((waypoint_x, start_y))  # Horizontal to waypoint
+            points.append((waypoint_x, end_y))    # Vertical to end Y level
+            points.append((end_x, end_y))         # Horizontal to end (arrow points horizontally)
         else:
             # Connecting to top or bottom side - approach vertically
             # Path: start -> horizontal to waypoint_x -> vertical to end_y
-            path_parts.append(f'L {waypoint_x},{start_y}')  # Horizontal to waypoint
-            path_parts.append(f'L {waypoint_x},{end_y}')    # Vertical to end (arrow points vertically)
+            points.append((waypoint_x, start_y))  # Horizontal to waypoint
+            points.append((waypoint_x, end_y))    # Vertical to end (arrow points vertically)
             # If we need to adjust horizontally to reach end_x, do it before the final vertical segment
             if abs(end_x - waypoint_x) > 1:
                 # Need to adjust path to end at correct X position
-                path_parts.append(f'L {end_x},{end_y}')
-        
-        path = ' '.join(path_parts)
+                points.append((end_x, end_y))
         
         # Calculate label position based on the longest segment
         # Find the longest segment to place the label on
@@ -210,22 +308,33 @@ class StatechartGenerator:
                 label_y = (start_y + end_y) / 2
                 text_anchor = "start"
         
-        # Generate unique ID for this edge
-        edge_id = f"edge_{edge['start_node_id']}_{edge['end_node_id']}"
-        
-        svg = f'''
-        <g class="edge" id="{edge_id}" style="pointer-events: all;">
-            <path d="{path}" class="edge-path" fill="none" stroke="#aaddff" stroke-width="2" marker-end="url(#arrowhead)" style="opacity: 1;"/>
-            <text class="edge-label" x="{label_x}" y="{label_y}" text-anchor="{text_anchor}" fill="#ddd" font-size="12" style="pointer-events: none;">
-                {edge.get('title', '')}
-            </text>
-        </g>
-        '''
-        
-        return svg
+        return points, label_x, label_y, text_anchor
     
     def generate_node_svg(self, node: Dict, depth: int = 0) -> str:
         """Generate SVG for a single node and its children."""
+        return ''.join(self.iter_node_svg(node, depth))
+    
+    def iter_node_svg(self, node: Dict, depth: int = 0) -> Iterator[str]:
+        """Yield the SVG of a node and its children in document order.
+        
+        Uses an explicit stack, so deeply nested designs neither recurse
+        nor build each container's markup as one string.
+        """
+        children = self.get_node_hierarchy()['children']
+        stack = [(node, depth)]
+        while stack:
+            current, current_depth = stack.pop()
+            if current is None:
+                yield '</g>\n'
+                continue
+            yield self._node_svg_open(current, current_depth)
+            stack.append((None, current_depth))
+            if current.get('is_container', False):
+                stack.extend((child, current_depth + 1)
+                             for child in reversed(children.get(current['id'], [])))
+    
+    def _node_svg_open(self, node: Dict, depth: int) -> str:
+        """SVG of a node up to (not including) its children and closing tag."""
         node_id = node['id']
         title = node['title']
         pos_x, pos_y = self.calculate_absolute_position(node)
@@ -279,23 +388,10 @@ class StatechartGenerator:
             {initial_marker}
         '''
         
-        # Add children if this is a container
-        if is_container:
-            hierarchy = self.get_node_hierarchy()
-            children = hierarchy['children'].get(node_id, [])
-            for child in children:
-                svg += self.generate_node_svg(child, depth + 1)
-        
-        svg += '</g>\n'
-        
         return svg
     
-    def generate_html(self, output_file: str):
-        """Generate the complete HTML file with embedded CSS and SVG."""
-        hierarchy = self.get_node_hierarchy()
-        root_nodes = hierarchy['root']
-        
-        # Calculate SVG dimensions
+    def _diagram_bounds(self) -> Tuple[float, float, float, float]:
+        """Padded bounding box (min x, min y, max x, max y) of all nodes."""
         min_x, min_y = float('inf'), float('inf')
         max_x, max_y = float('-inf'), float('-inf')
         
@@ -315,281 +411,1391 @@ class StatechartGenerator:
         max_x += padding
         max_y += padding
         
+        return min_x, min_y, max_x, max_y
+    
+    def iter_html(self, assets: Optional[str] = None, trace=None) -> Iterator[str]:
+        """Yield the complete HTML document with embedded CSS and SVG, fragment by fragment.
+        
+        With assets (the URL of a directory holding the files of
+        shared_assets()), the page links the stylesheet and script instead
+        of embedding them. With a trace (an sm_trace.Trace recorded on this
+        design), the page embeds it with a player (see _iter_trace_player).
+        """
+        hierarchy = self.get_node_hierarchy()
+        root_nodes = hierarchy['root']
+        
+        min_x, min_y, max_x, max_y = self._diagram_bounds()
         svg_width = max_x - min_x
         svg_height = max_y - min_y
         
-        # Generate SVG content
-        svg_nodes = ''
-        for root_node in root_nodes:
-            svg_nodes += self.generate_node_svg(root_node)
-        
-        svg_edges = ''
-        for edge in self.edges:
-            svg_edges += self.generate_svg_arrow(edge)
-        
-        html_content = f'''<!DOCTYPE html>
+        yield f'''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Statechart Diagram - {os.path.basename(self.json_file)}</title>
+{_style_element(SVG_STYLE, assets, 'statechart.css')}</head>
+<body>
+    <div class="container">
+        <h1>🔄 Statechart Diagram</h1>
+        
+        <div class="diagram-container">
+            <svg width="{svg_width}" height="{svg_height}" viewBox="{min_x} {min_y} {svg_width} {svg_height}">
+                <defs>
+                    <!-- Arrow marker for edges -->
+                    <marker id="arrowhead" markerWidth="10" markerHeight="10" refX="9" refY="3" orient="auto" markerUnits="strokeWidth">
+                        <polygon points="0 0, 10 3, 0 6" fill="#aaddff"/>
+                    </marker>
+                    <!-- Arrow marker for initial state -->
+                    <marker id="arrowhead-initial" markerWidth="10" markerHeight="10" refX="9" refY="3" orient="auto">
+                        <polygon points="0 0, 10 3, 0 6" fill="#44aa44"/>
+                    </marker>
+                </defs>
+                
+                <!-- Nodes (drawn first) -->
+                '''
+        for root_node in root_nodes:
+            yield from self.iter_node_svg(root_node)
+        
+        yield '''
+                
+                <!-- Edges (drawn last so they appear on top) -->
+                '''
+        for edge in self.edges:
+            yield self.generate_svg_arrow(edge)
+        
+        yield f'''
+            </svg>
+        </div>
+        
+        <div class="legend">
+            <div class="legend-item">
+                <div class="legend-box legend-statemachine"></div>
+                <span>State Machine</span>
+            </div>
+            <div class="legend-item">
+                <div class="legend-box legend-state"></div>
+                <span>State</span>
+            </div>
+            <div class="legend-item">
+                <div class="legend-box legend-initial"></div>
+                <span>Initial State</span>
+            </div>
+        </div>
+        
+        <div class="info-panel">
+            <h2>📊 Diagram Statistics</h2>
+            <ul>
+                <li><strong>Total Nodes:</strong> {len(self.nodes)}</li>
+                <li><strong>Total Transitions:</strong> {len(self.edges)}</li>
+                <li><strong>State Machines:</strong> {sum(1 for n in self.nodes if n.get('node_type') == 'StateMachine')}</li>
+                <li><strong>States:</strong> {sum(1 for n in self.nodes if n.get('node_type') == 'State')}</li>
+                <li><strong>Container States:</strong> {sum(1 for n in self.nodes if n.get('is_container'))}</li>
+                <li><strong>Initial States:</strong> {sum(1 for n in self.nodes if n.get('is_initial'))}</li>
+            </ul>
+        </div>
+    </div>
+    
+{_script_element(SVG_SCRIPT, assets, 'statechart.js')}'''
+        if trace is not None:
+            yield from self._iter_trace_player(trace)
+        yield '''</body>
+</html>'''
+    
+    def _iter_trace_player(self, trace) -> Iterator[str]:
+        """Embedded trace and a player that steps through it.
+        
+        The player looks up the element of every trace state and transition
+        once, and moving to another step only toggles the trace-active and
+        trace-fired classes of the elements whose state changed. Seeking
+        replays the steps in between in typed arrays first, so scrubbing
+        across a long trace touches the page once.
+        """
+        skipped = [index for index, edge in enumerate(self.edges)
+                   if edge['start_node_id'] not in self.node_map or edge['end_node_id'] not in self.node_map]
+        header = {'steps': len(trace), 'states': self.check_trace(trace),
+                  'edges': len(self.edges), 'skipped_edges': skipped}
+        yield f'''
     <style>
-        * {{
+{TRACE_PLAYER_STYLE}    </style>
+    <div class="trace-spacer"></div>
+    <div class="trace-player">
+        <button id="trace-first" title="First step (Home)" disabled>⏮</button>
+        <button id="trace-back" title="Previous step (←)" disabled>⏪</button>
+        <button id="trace-play" title="Play/pause (Space)" disabled>▶</button>
+        <button id="trace-forward" title="Next step (→)" disabled>⏩</button>
+        <button id="trace-last" title="Last step (End)" disabled>⏭</button>
+        <input type="range" id="trace-slider" min="0" max="{len(trace)}" value="0" disabled>
+        <select id="trace-speed" title="Steps per second" disabled>
+            <option value="0">1/s</option>
+            <option value="1" selected>10/s</option>
+            <option value="2">100/s</option>
+            <option value="3">1000/s</option>
+            <option value="4">10000/s</option>
+        </select>
+        <span class="trace-status" id="trace-status">Loading trace…</span>
+    </div>
+    <script type="application/json" id="trace-header">{_compact_json(header)}</script>
+    <script type="application/octet-stream" id="trace-data">'''
+        yield base64.b64encode(encode_trace(trace)).decode('ascii')
+        yield f'''</script>
+    <script>
+{TRACE_PLAYER_SCRIPT}    </script>
+'''
+    
+    def check_trace(self, trace) -> List:
+        """This design's node ID for every state of the trace; ValueError if one is missing.
+        
+        The editor's node IDs change every time a design is opened, so a
+        state whose ID is not a node with the same path is matched by its
+        path instead.
+        """
+        from search_index import PATH_SEPARATOR
+        
+        def path(node):
+            titles = [node['title']]
+            parent = self.node_map.get(node.get('parent_id'))
+            while parent is not None:
+                titles.append(parent['title'])
+                parent = self.node_map.get(parent.get('parent_id'))
+            return PATH_SEPARATOR.join(reversed(titles))
+        
+        by_path = None
+        node_ids = []
+        for state_id, state_path in zip(trace.state_ids, trace.state_paths):
+            node = self.node_map.get(state_id)
+            if node is None or path(node) != state_path:
+                if by_path is None:
+                    by_path = {}
+                    for candidate in self.nodes:
+                        by_path.setdefault(path(candidate), candidate)
+                node = by_path.get(state_path)
+                if node is None:
+                    raise ValueError(f"The trace was not recorded on this design (no state '{state_path}')")
+            node_ids.append(node['id'])
+        if max(trace.transitions, default=-1) >= len(self.edges):
+            raise ValueError("The trace was not recorded on this design")
+        return node_ids
+    
+    def iter_canvas_html(self, assets: Optional[str] = None) -> Iterator[str]:
+        """Yield an HTML page that draws the design on a canvas, fragment by fragment.
+        
+        Instead of one SVG element per node and edge, the page embeds the
+        geometry as compact JSON with coordinates rounded to hundredths (see
+        CANVAS_SCRIPT for the layout), and its script draws only what is in
+        view, found through a uniform grid index that also serves hit
+        testing. Titles, labels and arrowheads are left out when zoomed far
+        out. assets works as for iter_html.
+        """
+        nodes = list(self._iter_drawn_nodes())
+        index = {id(node): i for i, (node, _) in enumerate(nodes)}
+        types = sorted({node.get('node_type', 'State') for node, _ in nodes})
+        type_index = {node_type: i for i, node_type in enumerate(types)}
+        
+        yield CANVAS_PAGE_HEAD.format(title=os.path.basename(self.json_file),
+                                      style=_style_element(CANVAS_STYLE, assets, 'statechart-canvas.css'),
+                                      nodes=len(self.nodes), edges=len(self.edges))
+        yield '<script type="application/json" id="design-data">{"bounds":'
+        yield _compact_json([round(v, 2) for v in self._diagram_bounds()])
+        yield ',"types":' + _compact_json(types) + ',"nodes":['
+        yield from _iter_json_rows(
+            [round(v, 2) for v in (*self.calculate_absolute_position(node),
+                                           node['rect']['width'],
+                                           node['rect']['height'] + (30 if node.get('is_container', False) else 0))]
+            + [type_index[node.get('node_type', 'State')], 1 if node.get('is_initial', False) else 0, parent]
+            for node, parent in nodes)
+        yield '],"titles":['
+        yield from _iter_json_rows([node['title']] for node, _ in nodes)
+        
+        edges = []
+        for edge in self.edges:
+            geometry = self._edge_geometry(edge)
+            if geometry is not None:
+                edges.append((edge, geometry))
+        
+        def edge_row(edge, geometry):
+            points, label_x, label_y, text_anchor = geometry
+            points = points + points[-1:] * (4 - len(points))
+            start = self.node_map[edge['start_node_id']]
+            end = self.node_map[edge['end_node_id']]
+            return ([round(v, 2) for point in points for v in point]
+                    + [round(label_x, 2), round(label_y, 2), 1 if text_anchor == "middle" else 0,
+                       index.get(id(start), -1), index.get(id(end), -1)])
+        
+        yield '],"edges":['
+        yield from _iter_json_rows(edge_row(edge, geometry) for edge, geometry in edges)
+        yield '],"labels":['
+        yield from _iter_json_rows([edge.get('title', '')] for edge, _ in edges)
+        yield ']}</script>\n'
+        yield _script_element(CANVAS_SCRIPT, assets, 'statechart-canvas.js') + '</body>\n</html>\n'
+    
+    def _iter_drawn_nodes(self) -> Iterator[Tuple[Dict, int]]:
+        """Nodes in the order the SVG draws them, with the drawing index of their parent (-1 at the top)."""
+        children = self.get_node_hierarchy()['children']
+        stack = [(node, -1) for node in reversed(self.get_node_hierarchy()['root'])]
+        count = 0
+        while stack:
+            node, parent = stack.pop()
+            yield node, parent
+            if node.get('is_container', False):
+                stack.extend((child, count) for child in reversed(children.get(node['id'], [])))
+            count += 1
+    
+    def write_html(self, stream: TextIO, target: str = "svg", assets: Optional[str] = None, trace=None):
+        """Write the HTML document to a text stream as it is generated."""
+        if target not in EXPORT_TARGETS:
+            raise ValueError(f"Unknown export target '{target}' (available: {', '.join(EXPORT_TARGETS)})")
+        if trace is not None:
+            if target == "canvas":
+                raise ValueError("Traces can only be embedded in the svg target")
+            self.check_trace(trace)
+        fragments = self.iter_canvas_html(assets) if target == "canvas" else self.iter_html(assets, trace)
+        for fragment in fragments:
+            stream.write(fragment)
+    
+    def generate_html(self, output_file: str, target: str = "svg", assets: Optional[str] = None, trace=None):
+        """Generate the complete HTML file, drawn with SVG or (target "canvas") on a canvas."""
+        with open(output_file, 'w') as f:
+            self.write_html(f, target, assets, trace)
+        
+        print(f"✅ Successfully generated: {output_file}")
+        print(f"📊 Nodes: {len(self.nodes)}, Edges: {len(self.edges)}")
+
+
+def _style_element(style: str, assets: Optional[str], name: str) -> str:
+    if assets is None:
+        return f"    <style>\n{style}    </style>\n"
+    return f'    <link rel="stylesheet" href="{assets}/{name}">\n'
+
+
+def _script_element(script: str, assets: Optional[str], name: str) -> str:
+    if assets is None:
+        return f"    <script>\n{script}    </script>\n"
+    return f'    <script src="{assets}/{name}"></script>\n'
+
+
+def shared_assets(target: str = "svg") -> Dict[str, str]:
+    """Stylesheet and script files that pages exported with assets link to, as {file name: text}."""
+    if target == "canvas":
+        return {'statechart-canvas.css': CANVAS_STYLE, 'statechart-canvas.js': CANVAS_SCRIPT}
+    return {'statechart.css': SVG_STYLE, 'statechart.js': SVG_SCRIPT}
+
+
+def _compact_json(value) -> str:
+    # '<' is escaped so that no text in the data can close its <script> element
+    return json.dumps(value, separators=(',', ':')).replace('<', '\\u003c')
+
+
+def _iter_json_rows(rows) -> Iterator[str]:
+    """The values of all rows as the body of one flat JSON array, JSON_CHUNK_ROWS rows per fragment."""
+    chunk = []
+    count = 0
+    separator = ''
+    for row in rows:
+        chunk.extend(row)
+        count += 1
+        if count == JSON_CHUNK_ROWS:
+            yield separator + _compact_json(chunk)[1:-1]
+            chunk = []
+            count = 0
+            separator = ','
+    if chunk:
+        yield separator + _compact_json(chunk)[1:-1]
+
+
+# Stylesheet and script of the SVG page, inlined or (with assets) shared between pages
+SVG_STYLE = '''        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
             color: #fff;
             padding: 20px;
             min-height: 100vh;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 100%;
             margin: 0 auto;
-        }}
+        }
         
-        h1 {{
+        h1 {
             text-align: center;
             margin-bottom: 30px;
             color: #88ccff;
             text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.5);
-        }}
+        }
         
-        .diagram-container {{
+        .diagram-container {
             background: #0f1419;
             border-radius: 10px;
             padding: 20px;
             box-shadow: 0 10px 30px rgba(0, 0, 0, 0.5);
             overflow: auto;
-        }}
+        }
         
-        svg {{
+        svg {
             display: block;
             margin: 0 auto;
             background: #1a1f26;
             border-radius: 5px;
-        }}
+        }
         
-        .node {{
+        .node {
             cursor: pointer;
             transition: all 0.3s ease;
-        }}
+        }
         
-        .node:hover rect {{
+        .node:hover rect {
             filter: brightness(1.2);
-        }}
+        }
         
-        .edge {{
+        .edge {
             opacity: 1 !important;
             pointer-events: all;
-        }}
+        }
         
-        .edge-path {{
+        .edge-path {
             transition: all 0.3s ease;
             opacity: 1 !important;
             stroke: #aaddff !important;
-        }}
+        }
         
-        .edge:hover .edge-path {{
+        .edge:hover .edge-path {
             stroke: #ffaa44;
             stroke-width: 3;
-        }}
+        }
         
-        .edge:hover .edge-label {{
+        .edge:hover .edge-label {
             fill: #ffaa44;
             font-weight: bold;
-        }}
+        }
         
-        .info-panel {{
+        .info-panel {
             background: #1a2332;
             border-radius: 10px;
             padding: 20px;
             margin-top: 20px;
             border: 1px solid #3a4a5a;
-        }}
+        }
         
-        .info-panel h2 {{
+        .info-panel h2 {
             color: #88ccff;
             margin-bottom: 15px;
             font-size: 1.2em;
-        }}
+        }
         
-        .info-panel ul {{
+        .info-panel ul {
             list-style: none;
             padding-left: 0;
-        }}
+        }
         
-        .info-panel li {{
+        .info-panel li {
             padding: 8px 0;
             border-bottom: 1px solid #2a3a4a;
             color: #aaddff;
-        }}
+        }
         
-        .info-panel li:last-child {{
+        .info-panel li:last-child {
             border-bottom: none;
-        }}
+        }
         
-        .legend {{
+        .legend {
             display: flex;
             justify-content: center;
             gap: 30px;
             margin-top: 20px;
             flex-wrap: wrap;
-        }}
+        }
         
-        .legend-item {{
+        .legend-item {
             display: flex;
             align-items: center;
             gap: 10px;
-        }}
+        }
         
-        .legend-box {{
+        .legend-box {
             width: 30px;
             height: 20px;
             border-radius: 3px;
             border: 2px solid;
-        }}
+        }
         
-        .legend-statemachine {{
+        .legend-statemachine {
             background: #3a4a5a;
             border-color: #5a7a9a;
-        }}
+        }
         
-        .legend-state {{
+        .legend-state {
             background: #2a3a4a;
             border-color: #4a6a8a;
-        }}
+        }
         
-        .legend-initial {{
+        .legend-initial {
             width: 16px;
             height: 16px;
             border-radius: 50%;
             background: #88ff88;
             border-color: #44aa44;
-        }}
+        }
         
-        @media (max-width: 768px) {{
-            body {{
+        @media (max-width: 768px) {
+            body {
                 padding: 10px;
-            }}
+            }
             
-            h1 {{
+            h1 {
                 font-size: 1.5em;
-            }}
+            }
             
-            .legend {{
+            .legend {
                 flex-direction: column;
                 align-items: flex-start;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🔄 Statechart Diagram</h1>
-        
-        <div class="diagram-container">
-            <svg width="{svg_width}" height="{svg_height}" viewBox="{min_x} {min_y} {svg_width} {svg_height}">
-                <defs>
-                    <!-- Arrow marker for edges -->
-                    <marker id="arrowhead" markerWidth="10" markerHeight="10" refX="9" refY="3" orient="auto" markerUnits="strokeWidth">
-                        <polygon points="0 0, 10 3, 0 6" fill="#aaddff"/>
-                    </marker>
-                    <!-- Arrow marker for initial state -->
-                    <marker id="arrowhead-initial" markerWidth="10" markerHeight="10" refX="9" refY="3" orient="auto">
-                        <polygon points="0 0, 10 3, 0 6" fill="#44aa44"/>
-                    </marker>
-                </defs>
-                
-                <!-- Nodes (drawn first) -->
-                {svg_nodes}
-                
-                <!-- Edges (drawn last so they appear on top) -->
-                {svg_edges}
-            </svg>
-        </div>
-        
-        <div class="legend">
-            <div class="legend-item">
-                <div class="legend-box legend-statemachine"></div>
-                <span>State Machine</span>
-            </div>
-            <div class="legend-item">
-                <div class="legend-box legend-state"></div>
-                <span>State</span>
-            </div>
-            <div class="legend-item">
-                <div class="legend-box legend-initial"></div>
-                <span>Initial State</span>
-            </div>
-        </div>
-        
-        <div class="info-panel">
-            <h2>📊 Diagram Statistics</h2>
-            <ul>
-                <li><strong>Total Nodes:</strong> {len(self.nodes)}</li>
-                <li><strong>Total Transitions:</strong> {len(self.edges)}</li>
-                <li><strong>State Machines:</strong> {sum(1 for n in self.nodes if n.get('node_type') == 'StateMachine')}</li>
-                <li><strong>States:</strong> {sum(1 for n in self.nodes if n.get('node_type') == 'State')}</li>
-                <li><strong>Container States:</strong> {sum(1 for n in self.nodes if n.get('is_container'))}</li>
-                <li><strong>Initial States:</strong> {sum(1 for n in self.nodes if n.get('is_initial'))}</li>
-            </ul>
-        </div>
-    </div>
-    
-    <script>
-        // Add interactivity
-        document.querySelectorAll('.node').forEach(node => {{
-            node.addEventListener('click', function() {{
+            }
+        }
+'''
+
+SVG_SCRIPT = '''        // Add interactivity
+        document.querySelectorAll('.node').forEach(node => {
+            node.addEventListener('click', function() {
                 const nodeId = this.id;
                 console.log('Clicked node:', nodeId);
                 
                 // Highlight the node
                 this.style.opacity = this.style.opacity === '0.7' ? '1' : '0.7';
-            }});
-        }});
+            });
+        });
         
         // Add hover effects for edges
-        document.querySelectorAll('.edge').forEach(edge => {{
-            edge.addEventListener('mouseenter', function() {{
+        document.querySelectorAll('.edge').forEach(edge => {
+            edge.addEventListener('mouseenter', function() {
                 this.style.opacity = '1';
-            }});
+            });
             
-            edge.addEventListener('mouseleave', function() {{
+            edge.addEventListener('mouseleave', function() {
                 this.style.opacity = '0.8';
-            }});
-        }});
-    </script>
-</body>
-</html>'''
+            });
+        });
+'''
+
+CANVAS_STYLE = '''        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
         
-        # Write to file
-        with open(output_file, 'w') as f:
-            f.write(html_content)
+        body {
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
+            color: #fff;
+            padding: 20px;
+            height: 100vh;
+            display: flex;
+            flex-direction: column;
+        }
         
-        print(f"✅ Successfully generated: {output_file}")
-        print(f"📊 Nodes: {len(self.nodes)}, Edges: {len(self.edges)}")
+        h1 {
+            text-align: center;
+            margin-bottom: 20px;
+            color: #88ccff;
+            text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.5);
+        }
+        
+        .diagram-container {
+            flex: 1;
+            min-height: 0;
+            background: #0f1419;
+            border-radius: 10px;
+            padding: 20px;
+            box-shadow: 0 10px 30px rgba(0, 0, 0, 0.5);
+        }
+        
+        canvas {
+            display: block;
+            width: 100%;
+            height: 100%;
+            border-radius: 5px;
+            cursor: grab;
+        }
+        
+        canvas.dragging {
+            cursor: grabbing;
+        }
+        
+        .status-bar {
+            display: flex;
+            justify-content: space-between;
+            gap: 20px;
+            margin-top: 10px;
+            color: #aaddff;
+            font-size: 0.9em;
+        }
+'''
+
+CANVAS_PAGE_HEAD = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Statechart Diagram - {title}</title>
+{style}</head>
+<body>
+    <h1>🔄 Statechart Diagram</h1>
+    <div class="diagram-container">
+        <canvas id="diagram"></canvas>
+    </div>
+    <div class="status-bar">
+        <span id="status">Drag to pan, wheel to zoom, double-click or F to fit, click a node to dim it</span>
+        <span id="stats">{nodes} nodes, {edges} transitions</span>
+    </div>
+'''
+
+# Data layout (flat arrays, NODE_FIELDS / EDGE_FIELDS values per item, items in drawing order):
+#   nodes:  x, y, width, height (including a container's title bar), type (index into types),
+#           initial (0/1), parent (node index, -1 at the top)
+#   edges:  four route points x0, y0 .. x3, y3 (the last repeated for three-point routes),
+#           label x, label y, label centred (0/1), source and target (node index, -1 if not drawn)
+#   titles, labels: node titles and edge labels by index
+CANVAS_SCRIPT = '''    (function () {
+        'use strict';
+        const data = JSON.parse(document.getElementById('design-data').textContent);
+        const NODE_FIELDS = 7, EDGE_FIELDS = 13;
+        const nodes = data.nodes, edges = data.edges;
+        const nodeCount = nodes.length / NODE_FIELDS, edgeCount = edges.length / EDGE_FIELDS;
+
+        // Level of detail, by zoom factor: titles and labels from TEXT_SCALE, rounded
+        // nodes, arrowheads and initial markers from DETAIL_SCALE. Items smaller than
+        // MIN_SIZE screen pixels are not drawn.
+        const TEXT_SCALE = 0.4, DETAIL_SCALE = 0.2, MIN_SIZE = 2;
+        const MIN_ZOOM = 1e-4, MAX_ZOOM = 20;
+
+        // Fill, stroke, title and hover fill by node type, as in the SVG export
+        const STYLES = {
+            StateMachine: ['#3a4a5a', '#5a7a9a', '#88ccff'],
+            State: ['#2a3a4a', '#4a6a8a', '#aaddff'],
+        };
+        const OTHER_STYLE = ['#2a2a3a', '#4a4a6a', '#ccccff'];
+        function brighter(color) {
+            const value = parseInt(color.slice(1), 16);
+            const channel = shift => Math.min(255, Math.round(((value >> shift) & 255) * 1.2));
+            return `rgb(${channel(16)}, ${channel(8)}, ${channel(0)})`;
+        }
+        const typeStyles = data.types.map(type => {
+            const style = STYLES[type] || OTHER_STYLE;
+            return style.concat([brighter(style[0])]);
+        });
+
+        // Uniform grid over item bounding boxes (x0, y0, x1, y1 per item), cells in
+        // compressed-row form. Items spanning more than LARGE_CELLS cells (big
+        // containers) are kept in a list of their own and tested on every query.
+        const LARGE_CELLS = 64;
+        class Grid {
+            constructor(boxes, bounds) {
+                const count = boxes.length / 4;
+                this.boxes = boxes;
+                this.x0 = bounds[0];
+                this.y0 = bounds[1];
+                const width = Math.max(bounds[2] - bounds[0], 1), height = Math.max(bounds[3] - bounds[1], 1);
+                this.cell = Math.max(Math.sqrt(width * height / Math.min(Math.max(count, 1), 65536)), 1);
+                this.columns = Math.ceil(width / this.cell);
+                this.rows = Math.ceil(height / this.cell);
+                this.large = [];
+                this.seen = new Uint32Array(count);
+                this.stamp = 0;
+                const starts = new Int32Array(this.columns * this.rows + 1);
+                const large = new Uint8Array(count);
+                for (let i = 0; i < count; i++) {
+                    const [c0, r0, c1, r1] = this.span(boxes[4 * i], boxes[4 * i + 1], boxes[4 * i + 2], boxes[4 * i + 3]);
+                    if ((c1 - c0 + 1) * (r1 - r0 + 1) > LARGE_CELLS) {
+                        large[i] = 1;
+                        this.large.push(i);
+                        continue;
+                    }
+                    for (let r = r0; r <= r1; r++)
+                        for (let c = c0; c <= c1; c++) starts[r * this.columns + c + 1]++;
+                }
+                for (let k = 1; k < starts.length; k++) starts[k] += starts[k - 1];
+                const fill = starts.slice(0, -1);
+                this.items = new Int32Array(starts[starts.length - 1]);
+                for (let i = 0; i < count; i++) {
+                    if (large[i]) continue;
+                    const [c0, r0, c1, r1] = this.span(boxes[4 * i], boxes[4 * i + 1], boxes[4 * i + 2], boxes[4 * i + 3]);
+                    for (let r = r0; r <= r1; r++)
+                        for (let c = c0; c <= c1; c++) this.items[fill[r * this.columns + c]++] = i;
+                }
+                this.starts = starts;
+            }
+
+            span(x0, y0, x1, y1) {
+                const clamp = (value, limit) => Math.min(Math.max(value, 0), limit - 1);
+                return [clamp(Math.floor((x0 - this.x0) / this.cell), this.columns),
+                        clamp(Math.floor((y0 - this.y0) / this.cell), this.rows),
+                        clamp(Math.floor((x1 - this.x0) / this.cell), this.columns),
+                        clamp(Math.floor((y1 - this.y0) / this.cell), this.rows)];
+            }
+
+            // Indices of the items whose boxes overlap the rectangle, in drawing order
+            query(x0, y0, x1, y1) {
+                const boxes = this.boxes, seen = this.seen, result = [];
+                const stamp = ++this.stamp;
+                const overlaps = i => boxes[4 * i] <= x1 && boxes[4 * i + 2] >= x0 &&
+                                      boxes[4 * i + 1] <= y1 && boxes[4 * i + 3] >= y0;
+                const [c0, r0, c1, r1] = this.span(x0, y0, x1, y1);
+                for (let r = r0; r <= r1; r++) {
+                    for (let c = c0; c <= c1; c++) {
+                        const cell = r * this.columns + c;
+                        for (let k = this.starts[cell]; k < this.starts[cell + 1]; k++) {
+                            const i = this.items[k];
+                            if (seen[i] !== stamp) {
+                                seen[i] = stamp;
+                                if (overlaps(i)) result.push(i);
+                            }
+                        }
+                    }
+                }
+                for (const i of this.large) if (overlaps(i)) result.push(i);
+                return result.sort((a, b) => a - b);
+            }
+        }
+
+        const nodeBoxes = new Float64Array(4 * nodeCount);
+        for (let i = 0; i < nodeCount; i++) {
+            const o = i * NODE_FIELDS;
+            nodeBoxes.set([nodes[o], nodes[o + 1], nodes[o] + nodes[o + 2], nodes[o + 1] + nodes[o + 3]], 4 * i);
+        }
+        // Edge boxes cover the route, the arrowhead and (roughly) the label
+        const edgeBoxes = new Float64Array(4 * edgeCount);
+        for (let i = 0; i < edgeCount; i++) {
+            const o = i * EDGE_FIELDS;
+            let x0 = Infinity, y0 = Infinity, x1 = -Infinity, y1 = -Infinity;
+            for (let p = 0; p < 8; p += 2) {
+                x0 = Math.min(x0, edges[o + p]); x1 = Math.max(x1, edges[o + p]);
+                y0 = Math.min(y0, edges[o + p + 1]); y1 = Math.max(y1, edges[o + p + 1]);
+            }
+            const labelWidth = 7 * String(data.labels[i]).length;
+            const labelX = edges[o + 10] ? edges[o + 8] - labelWidth / 2 : edges[o + 8];
+            edgeBoxes.set([Math.min(x0 - 12, labelX), Math.min(y0 - 12, edges[o + 9] - 12),
+                           Math.max(x1 + 12, labelX + labelWidth), Math.max(y1 + 12, edges[o + 9] + 4)], 4 * i);
+        }
+        const nodeGrid = new Grid(nodeBoxes, data.bounds);
+        const edgeGrid = new Grid(edgeBoxes, data.bounds);
+
+        const canvas = document.getElementById('diagram');
+        const ctx = canvas.getContext('2d');
+        const status = document.getElementById('status');
+        const stats = document.getElementById('stats');
+        const defaultStatus = status.textContent;
+        const dimmed = new Uint8Array(nodeCount);
+        const view = {scale: 1, x: 0, y: 0};
+        let hover = null;  // {kind: 'node' | 'edge', index}
+        let width = 0, height = 0, pending = false;
+
+        function invalidate() {
+            if (!pending) {
+                pending = true;
+                requestAnimationFrame(() => { pending = false; draw(); });
+            }
+        }
+
+        // Route of an edge as the points that differ from their predecessor
+        function routePoints(o) {
+            const points = [[edges[o], edges[o + 1]]];
+            for (let p = 2; p < 8; p += 2) {
+                const last = points[points.length - 1];
+                if (edges[o + p] !== last[0] || edges[o + p + 1] !== last[1]) points.push([edges[o + p], edges[o + p + 1]]);
+            }
+            return points;
+        }
+
+        function drawNode(i, detail, text, minSize) {
+            const o = i * NODE_FIELDS;
+            const x = nodes[o], y = nodes[o + 1], w = nodes[o + 2], h = nodes[o + 3];
+            if (w < minSize && h < minSize) return;
+            const style = typeStyles[nodes[o + 4]];
+            const hovered = hover !== null && hover.kind === 'node' && hover.index === i;
+            ctx.globalAlpha = dimmed[i] ? 0.7 : 1;
+            ctx.fillStyle = hovered ? style[3] : style[0];
+            ctx.strokeStyle = style[1];
+            ctx.lineWidth = 2;
+            if (!detail) {
+                ctx.fillRect(x, y, w, h);
+                ctx.strokeRect(x, y, w, h);
+                ctx.globalAlpha = 1;
+                return;
+            }
+            ctx.beginPath();
+            if (ctx.roundRect) ctx.roundRect(x, y, w, h, 5); else ctx.rect(x, y, w, h);
+            ctx.fill();
+            ctx.stroke();
+            ctx.lineWidth = 1;
+            ctx.beginPath();
+            ctx.moveTo(x, y + 30);
+            ctx.lineTo(x + w, y + 30);
+            ctx.stroke();
+            if (nodes[o + 5]) {
+                ctx.beginPath();
+                ctx.arc(x + w - 20, y + 15, 10, 0, 2 * Math.PI);
+                ctx.fillStyle = 'white';
+                ctx.fill();
+                ctx.strokeStyle = '#888';
+                ctx.lineWidth = 2;
+                ctx.stroke();
+            }
+            if (text) {
+                ctx.fillStyle = style[2];
+                ctx.font = 'bold 14px sans-serif';
+                ctx.textAlign = 'start';
+                ctx.fillText(data.titles[i], x + 10, y + 20);
+            }
+            ctx.globalAlpha = 1;
+        }
+
+        function drawEdge(i, text, highlighted) {
+            const o = i * EDGE_FIELDS;
+            const points = routePoints(o);
+            const color = highlighted ? '#ffaa44' : '#aaddff';
+            ctx.strokeStyle = color;
+            ctx.lineWidth = highlighted ? 3 : 2;
+            ctx.beginPath();
+            ctx.moveTo(points[0][0], points[0][1]);
+            for (let p = 1; p < points.length; p++) ctx.lineTo(points[p][0], points[p][1]);
+            ctx.stroke();
+            if (points.length > 1) {
+                // Arrowhead along the last segment, tip 2 units past the end as with the SVG marker
+                const [ex, ey] = points[points.length - 1], [px, py] = points[points.length - 2];
+                const length = Math.hypot(ex - px, ey - py);
+                const dx = (ex - px) / length, dy = (ey - py) / length;
+                ctx.fillStyle = color;
+                ctx.beginPath();
+                ctx.moveTo(ex + 2 * dx, ey + 2 * dy);
+                ctx.lineTo(ex - 18 * dx - 6 * dy, ey - 18 * dy + 6 * dx);
+                ctx.lineTo(ex - 18 * dx + 6 * dy, ey - 18 * dy - 6 * dx);
+                ctx.closePath();
+                ctx.fill();
+            }
+            if (text && data.labels[i]) {
+                ctx.fillStyle = highlighted ? '#ffaa44' : '#ddd';
+                ctx.font = (highlighted ? 'bold ' : '') + '12px sans-serif';
+                ctx.textAlign = edges[o + 10] ? 'center' : 'start';
+                ctx.fillText(data.labels[i], edges[o + 8], edges[o + 9]);
+            }
+        }
+
+        function draw() {
+            const ratio = window.devicePixelRatio || 1;
+            ctx.setTransform(1, 0, 0, 1, 0, 0);
+            ctx.fillStyle = '#1a1f26';
+            ctx.fillRect(0, 0, canvas.width, canvas.height);
+            const scale = view.scale;
+            ctx.setTransform(ratio * scale, 0, 0, ratio * scale, ratio * view.x, ratio * view.y);
+            const x0 = -view.x / scale, y0 = -view.y / scale;
+            const x1 = x0 + width / scale, y1 = y0 + height / scale;
+            const detail = scale >= DETAIL_SCALE, text = scale >= TEXT_SCALE, minSize = MIN_SIZE / scale;
+
+            const visibleNodes = nodeGrid.query(x0, y0, x1, y1);
+            for (const i of visibleNodes) drawNode(i, detail, text, minSize);
+
+            const visibleEdges = edgeGrid.query(x0, y0, x1, y1);
+            let drawnEdges = 0;
+            if (detail) {
+                for (const i of visibleEdges) drawEdge(i, text, false);
+                drawnEdges = visibleEdges.length;
+            } else {
+                // One path for all edges, without arrowheads or labels
+                ctx.strokeStyle = '#aaddff';
+                ctx.lineWidth = Math.max(2, 1 / scale);
+                ctx.beginPath();
+                for (const i of visibleEdges) {
+                    if (edgeBoxes[4 * i + 2] - edgeBoxes[4 * i] < minSize &&
+                        edgeBoxes[4 * i + 3] - edgeBoxes[4 * i + 1] < minSize) continue;
+                    const o = i * EDGE_FIELDS;
+                    ctx.moveTo(edges[o], edges[o + 1]);
+                    for (let p = 2; p < 8; p += 2) ctx.lineTo(edges[o + p], edges[o + p + 1]);
+                    drawnEdges++;
+                }
+                ctx.stroke();
+            }
+            if (hover !== null && hover.kind === 'edge') drawEdge(hover.index, true, true);
+            stats.textContent = `${visibleNodes.length} of ${nodeCount} nodes, ${drawnEdges} of ${edgeCount} transitions in view`;
+        }
+
+        function fit() {
+            const [x0, y0, x1, y1] = data.bounds;
+            view.scale = Math.min(width / (x1 - x0), height / (y1 - y0), 1) || 1;
+            view.x = (width - (x1 - x0) * view.scale) / 2 - x0 * view.scale;
+            view.y = (height - (y1 - y0) * view.scale) / 2 - y0 * view.scale;
+            invalidate();
+        }
+
+        function resize() {
+            const ratio = window.devicePixelRatio || 1;
+            width = canvas.clientWidth;
+            height = canvas.clientHeight;
+            canvas.width = Math.round(width * ratio);
+            canvas.height = Math.round(height * ratio);
+            invalidate();
+        }
+
+        function distanceToSegment(x, y, ax, ay, bx, by) {
+            const dx = bx - ax, dy = by - ay;
+            const length = dx * dx + dy * dy;
+            const t = length ? Math.max(0, Math.min(1, ((x - ax) * dx + (y - ay) * dy) / length)) : 0;
+            return Math.hypot(x - ax - t * dx, y - ay - t * dy);
+        }
+
+        // Topmost item under a canvas point: edges are drawn above nodes
+        function hitTest(sx, sy) {
+            const x = (sx - view.x) / view.scale, y = (sy - view.y) / view.scale;
+            const tolerance = 5 / view.scale;
+            const nearEdges = edgeGrid.query(x - tolerance, y - tolerance, x + tolerance, y + tolerance);
+            for (let k = nearEdges.length - 1; k >= 0; k--) {
+                const o = nearEdges[k] * EDGE_FIELDS;
+                for (let p = 0; p < 6; p += 2) {
+                    if (distanceToSegment(x, y, edges[o + p], edges[o + p + 1], edges[o + p + 2], edges[o + p + 3]) <= tolerance)
+                        return {kind: 'edge', index: nearEdges[k]};
+                }
+            }
+            const nearNodes = nodeGrid.query(x, y, x, y);
+            return nearNodes.length ? {kind: 'node', index: nearNodes[nearNodes.length - 1]} : null;
+        }
+
+        function nodePath(i) {
+            const titles = [];
+            for (; i >= 0; i = nodes[i * NODE_FIELDS + 6]) titles.unshift(data.titles[i]);
+            return titles.join(' / ');
+        }
+
+        function describe(item) {
+            if (item === null) return defaultStatus;
+            if (item.kind === 'node')
+                return `${data.types[nodes[item.index * NODE_FIELDS + 4]]}: ${nodePath(item.index)}`;
+            const o = item.index * EDGE_FIELDS;
+            const title = i => i >= 0 ? data.titles[i] : '?';
+            return `${data.labels[item.index] || '(no event)'}: ${title(edges[o + 11])} → ${title(edges[o + 12])}`;
+        }
+
+        let drag = null;
+        canvas.addEventListener('mousedown', event => {
+            drag = {x: event.clientX, y: event.clientY, moved: false};
+            canvas.classList.add('dragging');
+        });
+        window.addEventListener('mouseup', () => {
+            if (drag !== null && !drag.moved && hover !== null && hover.kind === 'node') {
+                dimmed[hover.index] ^= 1;
+                invalidate();
+            }
+            drag = null;
+            canvas.classList.remove('dragging');
+        });
+        canvas.addEventListener('mousemove', event => {
+            if (drag !== null) {
+                const dx = event.clientX - drag.x, dy = event.clientY - drag.y;
+                if (drag.moved || Math.abs(dx) + Math.abs(dy) > 3) {
+                    drag.moved = true;
+                    view.x += dx;
+                    view.y += dy;
+                    drag.x = event.clientX;
+                    drag.y = event.clientY;
+                    invalidate();
+                }
+                return;
+            }
+            const rect = canvas.getBoundingClientRect();
+            const item = hitTest(event.clientX - rect.left, event.clientY - rect.top);
+            if ((item === null) !== (hover === null) ||
+                (item !== null && (item.kind !== hover.kind || item.index !== hover.index))) {
+                hover = item;
+                status.textContent = describe(item);
+                invalidate();
+            }
+        });
+        canvas.addEventListener('mouseleave', () => {
+            if (hover !== null) {
+                hover = null;
+                status.textContent = defaultStatus;
+                invalidate();
+            }
+        });
+        canvas.addEventListener('wheel', event => {
+            event.preventDefault();
+            const rect = canvas.getBoundingClientRect();
+            const sx = event.clientX - rect.left, sy = event.clientY - rect.top;
+            const scale = Math.min(Math.max(view.scale * Math.exp(-event.deltaY * 0.0015), MIN_ZOOM), MAX_ZOOM);
+            // Keep the point under the cursor in place
+            view.x = sx - (sx - view.x) * scale / view.scale;
+            view.y = sy - (sy - view.y) * scale / view.scale;
+            view.scale = scale;
+            invalidate();
+        }, {passive: false});
+        canvas.addEventListener('dblclick', fit);
+        window.addEventListener('keydown', event => {
+            if (event.key === 'f' || event.key === 'F') fit();
+        });
+
+        new ResizeObserver(resize).observe(canvas);
+        resize();
+        fit();
+    })();
+'''
+
+
+def encode_trace(trace) -> bytes:
+    """Steps of an sm_trace.Trace for the page player, zlib-compressed.
+    
+    Each column of TRACE_COLUMNS is stored as its item count followed by
+    the differences between consecutive items, all as zigzag varints, so
+    the state and transition indices of nearby steps take a byte or two
+    before compression.
+    """
+    data = bytearray()
+    
+    def varint(value):
+        while value >= 0x80:
+            data.append(value & 0x7f | 0x80)
+            value >>= 7
+        data.append(value)
+    
+    for name in TRACE_COLUMNS:
+        column = getattr(trace, name)
+        varint(len(column))
+        previous = 0
+        for value in column:
+            delta = value - previous
+            previous = value
+            zigzag = delta << 1 if delta >= 0 else (-delta << 1) - 1
+            if zigzag < 0x80:
+                data.append(zigzag)
+            else:
+                varint(zigzag)
+    return zlib.compress(bytes(data), 9)
+
+
+TRACE_PLAYER_STYLE = '''        .node.trace-active > rect {
+            stroke: #66dd88;
+            stroke-width: 4;
+        }
+        
+        .node.trace-active > text {
+            fill: #aaffbb;
+        }
+        
+        .edge.trace-fired .edge-path {
+            stroke: #ffaa44 !important;
+            stroke-width: 4;
+        }
+        
+        .edge.trace-fired .edge-label {
+            fill: #ffaa44;
+            font-weight: bold;
+        }
+        
+        .trace-spacer {
+            height: 70px;
+        }
+        
+        .trace-player {
+            position: fixed;
+            left: 0;
+            right: 0;
+            bottom: 0;
+            display: flex;
+            align-items: center;
+            gap: 10px;
+            padding: 12px 20px;
+            background: #1a2332;
+            border-top: 1px solid #3a4a5a;
+            color: #aaddff;
+        }
+        
+        .trace-player button, .trace-player select {
+            background: #2a3a4a;
+            color: #fff;
+            border: 1px solid #4a6a8a;
+            border-radius: 3px;
+            padding: 3px 8px;
+        }
+        
+        .trace-player input[type=range] {
+            flex: 1;
+        }
+        
+        .trace-status {
+            min-width: 320px;
+            white-space: nowrap;
+            overflow: hidden;
+            text-overflow: ellipsis;
+        }
+'''
+
+# Layout of the trace data: see encode_trace and TRACE_COLUMNS; trace-header holds the
+# step count, the node ID of every trace state, the design's edge count and the edges
+# that are not drawn (their nodes are missing)
+TRACE_PLAYER_SCRIPT = '''    (function () {
+        'use strict';
+        const header = JSON.parse(document.getElementById('trace-header').textContent);
+        const COLUMNS = ['transitions', 'exitCounts', 'entryCounts', 'states'];
+        const SPEEDS = [1, 10, 100, 1000, 10000];  // Steps per second
+        const stepCount = header.steps;
+
+        const slider = document.getElementById('trace-slider');
+        const status = document.getElementById('trace-status');
+        const play = document.getElementById('trace-play');
+        const speed = document.getElementById('trace-speed');
+        const buttons = document.querySelectorAll('.trace-player button, .trace-player input, .trace-player select');
+
+        // Elements indexed once: by trace state, and by transition (the design's edge order)
+        const stateElements = header.states.map(id => document.getElementById(`node_${id}`));
+        const skipped = new Set(header.skipped_edges);
+        const edgeNodes = document.querySelectorAll('g.edge');
+        const edgeElements = [];
+        for (let t = 0, drawn = 0; t < header.edges; t++) edgeElements.push(skipped.has(t) ? null : edgeNodes[drawn++]);
+
+        async function inflate(text) {
+            const binary = atob(text);
+            const bytes = new Uint8Array(binary.length);
+            for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+            return new Uint8Array(await new Response(stream).arrayBuffer());
+        }
+
+        // Columns of zigzag varint differences -> Int32Arrays of values
+        function decode(bytes) {
+            let position = 0;
+            function varint() {
+                let value = 0, scale = 1, byte;
+                do {
+                    byte = bytes[position++];
+                    value += (byte & 127) * scale;
+                    scale *= 128;
+                } while (byte & 128);
+                return value;
+            }
+            const columns = {};
+            for (const name of COLUMNS) {
+                const column = new Int32Array(varint());
+                let value = 0;
+                for (let i = 0; i < column.length; i++) {
+                    const zigzag = varint();
+                    value += zigzag % 2 ? -(zigzag + 1) / 2 : zigzag / 2;
+                    column[i] = value;
+                }
+                columns[name] = column;
+            }
+            return columns;
+        }
+
+        function title(state) {
+            const element = stateElements[state];
+            const text = element && element.querySelector('text');
+            return text ? text.textContent.trim() : `#${state}`;
+        }
+
+        function start(trace) {
+            const {transitions, exitCounts, entryCounts, states} = trace;
+            // Position in states of each step's exits, then its entries
+            const offsets = new Int32Array(stepCount + 1);
+            for (let i = 0; i < stepCount; i++) offsets[i + 1] = offsets[i] + exitCounts[i] + entryCounts[i];
+            const stateCount = header.states.length;
+            const active = new Uint8Array(stateCount);  // After the current step
+            const shown = new Uint8Array(stateCount);  // As the classes show it
+            const marked = new Uint8Array(stateCount);
+            const touched = [];
+            let current = 0, firedElement = null;
+
+            function touch(state, value) {
+                active[state] = value;
+                if (!marked[state]) {
+                    marked[state] = 1;
+                    touched.push(state);
+                }
+            }
+
+            // Apply or undo steps in the arrays, then toggle classes only where the result differs
+            function seek(target) {
+                target = Math.max(0, Math.min(stepCount, target));
+                while (current < target) {
+                    const exitEnd = offsets[current] + exitCounts[current];
+                    for (let k = offsets[current]; k < exitEnd; k++) touch(states[k], 0);
+                    for (let k = exitEnd; k < offsets[current + 1]; k++) touch(states[k], 1);
+                    current++;
+                }
+                while (current > target) {
+                    current--;
+                    const exitEnd = offsets[current] + exitCounts[current];
+                    for (let k = offsets[current + 1] - 1; k >= exitEnd; k--) touch(states[k], 0);
+                    for (let k = exitEnd - 1; k >= offsets[current]; k--) touch(states[k], 1);
+                }
+                for (const state of touched) {
+                    marked[state] = 0;
+                    if (active[state] !== shown[state]) {
+                        shown[state] = active[state];
+                        if (stateElements[state]) stateElements[state].classList.toggle('trace-active', shown[state] === 1);
+                    }
+                }
+                touched.length = 0;
+
+                const step = current - 1;
+                const fired = step >= 0 && transitions[step] >= 0 ? edgeElements[transitions[step]] : null;
+                if (fired !== firedElement) {
+                    if (firedElement) firedElement.classList.remove('trace-fired');
+                    if (fired) fired.classList.add('trace-fired');
+                    firedElement = fired;
+                }
+                slider.value = current;
+                let text = `Step ${current} / ${stepCount}`;
+                if (step >= 0) {
+                    // The leaf left (first exit) and the leaf entered (last entry)
+                    const leaf = title(states[offsets[step + 1] - 1]);
+                    if (transitions[step] < 0) {
+                        text += `: start ${leaf}`;
+                    } else {
+                        const label = fired && fired.querySelector('.edge-label');
+                        const left = exitCounts[step] ? `${title(states[offsets[step]])} → ` : '';
+                        text += `: ${label ? label.textContent.trim() : `#${transitions[step]}`}: ${left}${leaf}`;
+                    }
+                }
+                status.textContent = text;
+            }
+
+            let playing = false, last = 0, carry = 0, pending = null;
+            function frame(time) {
+                if (!playing) return;
+                carry += (time - last) / 1000 * SPEEDS[speed.value];
+                last = time;
+                const steps = Math.floor(carry);
+                carry -= steps;
+                if (steps) seek(current + steps);
+                if (current >= stepCount) setPlaying(false);
+                else requestAnimationFrame(frame);
+            }
+            function setPlaying(value) {
+                playing = value;
+                play.textContent = playing ? '⏸' : '▶';
+                if (playing) {
+                    if (current >= stepCount) seek(0);
+                    last = performance.now();
+                    carry = 0;
+                    requestAnimationFrame(frame);
+                }
+            }
+
+            slider.addEventListener('input', () => {
+                // One seek per frame while dragging
+                if (pending === null) requestAnimationFrame(() => { seek(pending); pending = null; });
+                pending = Number(slider.value);
+            });
+            play.addEventListener('click', () => setPlaying(!playing));
+            document.getElementById('trace-first').addEventListener('click', () => seek(0));
+            document.getElementById('trace-back').addEventListener('click', () => seek(current - 1));
+            document.getElementById('trace-forward').addEventListener('click', () => seek(current + 1));
+            document.getElementById('trace-last').addEventListener('click', () => seek(stepCount));
+            window.addEventListener('keydown', event => {
+                if (event.target === slider || event.target === speed) return;
+                const keys = {ArrowLeft: () => seek(current - 1), ArrowRight: () => seek(current + 1),
+                              Home: () => seek(0), End: () => seek(stepCount), ' ': () => setPlaying(!playing)};
+                if (keys[event.key]) {
+                    event.preventDefault();
+                    keys[event.key]();
+                }
+            });
+            buttons.forEach(element => { element.disabled = false; });
+            seek(0);
+        }
+
+        if (typeof DecompressionStream === 'undefined') {
+            status.textContent = 'This browser cannot decompress the trace (no DecompressionStream)';
+            return;
+        }
+        inflate(document.getElementById('trace-data').textContent.trim())
+            .then(bytes => start(decode(bytes)))
+            .catch(error => { status.textContent = `Cannot read the trace: ${error}`; });
+    })();
+'''
+
+
+class PageSummary(NamedTuple):
+    design_file: str
+    page: str  # Page file name in the output directory
+    nodes: int
+    edges: int
+    statemachines: int
+    states: int
+    error: Optional[str]  # Why the design could not be exported, None if it was
+
+
+def find_designs(sources: List[str]) -> List[str]:
+    """Design files named by the sources: directories (their *.json files) and glob patterns."""
+    designs = set()
+    for source in sources:
+        if os.path.isdir(source):
+            designs.update(glob.glob(os.path.join(source, '*.json')))
+        else:
+            designs.update(path for path in glob.glob(source, recursive=True) if os.path.isfile(path))
+    return sorted(designs)
+
+
+def _export_page(task: Tuple[str, str, str, str]) -> PageSummary:
+    design_file, output_file, target, assets = task
+    page = os.path.basename(output_file)
+    messages = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(messages):
+            generator = StatechartGenerator(design_file)
+            generator.generate_html(output_file, target, assets)
+    except SystemExit:
+        # StatechartGenerator reports unreadable designs and exits
+        error = messages.getvalue().strip()
+    except (KeyError, TypeError, ValueError, OSError) as e:
+        error = f"Error: {type(e).__name__}: {e}"
+    else:
+        error = None
+    if error is not None:
+        # No partly written page for a design that failed halfway
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        return PageSummary(design_file, page, 0, 0, 0, 0, error)
+    nodes = generator.nodes
+    return PageSummary(design_file, page, len(nodes), len(generator.edges),
+                       sum(1 for n in nodes if n.get('node_type') == 'StateMachine'),
+                       sum(1 for n in nodes if n.get('node_type') == 'State'), None)
+
+
+def export_batch(sources: List[str], output_dir: str, target: str = "svg",
+                 jobs: Optional[int] = None) -> List[PageSummary]:
+    """Export every design named by sources into output_dir, with shared assets and an index page.
+    
+    Pages are written in jobs worker processes (default: one per CPU) and
+    link the stylesheet and script in output_dir/assets instead of
+    embedding them; index.html lists the pages.
+    """
+    if target not in EXPORT_TARGETS:
+        raise ValueError(f"Unknown export target '{target}' (available: {', '.join(EXPORT_TARGETS)})")
+    designs = find_designs(sources)
+    if not designs:
+        raise ValueError(f"No design files found in {', '.join(sources)}")
+    
+    asset_dir = os.path.join(output_dir, ASSET_DIR)
+    os.makedirs(asset_dir, exist_ok=True)
+    # The index page uses the SVG page's stylesheet
+    for name, text in {**shared_assets("svg"), **shared_assets(target)}.items():
+        with open(os.path.join(asset_dir, name), 'w') as f:
+            f.write(text)
+    
+    # One page per design, named after it (numbered when names repeat across directories)
+    tasks = []
+    pages = set()
+    for design_file in designs:
+        stem = os.path.splitext(os.path.basename(design_file))[0]
+        page = f"{stem}.html"
+        number = 1
+        while page in pages or page == INDEX_PAGE:
+            number += 1
+            page = f"{stem}-{number}.html"
+        pages.add(page)
+        tasks.append((design_file, os.path.join(output_dir, page), target, ASSET_DIR))
+    
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+            summaries = list(pool.map(_export_page, tasks))
+    else:
+        summaries = [_export_page(task) for task in tasks]
+    
+    with open(os.path.join(output_dir, INDEX_PAGE), 'w') as f:
+        f.write(index_html(summaries))
+    return summaries
+
+
+def index_html(summaries: List[PageSummary]) -> str:
+    """Index page linking the pages of a batch export."""
+    items = []
+    for summary in summaries:
+        name = html.escape(summary.design_file)
+        if summary.error is not None:
+            items.append(f'                <li class="error">{name}: {html.escape(summary.error)}</li>\n')
+        else:
+            items.append(f'                <li><a href="{html.escape(summary.page)}">{name}</a>: '
+                         f'{summary.nodes} nodes, {summary.edges} transitions, '
+                         f'{summary.statemachines} state machines, {summary.states} states</li>\n')
+    exported = sum(1 for summary in summaries if summary.error is None)
+    return f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Statechart Diagrams</title>
+    <link rel="stylesheet" href="{ASSET_DIR}/statechart.css">
+    <style>
+        .info-panel a {{
+            color: #88ccff;
+        }}
+        
+        .info-panel li.error {{
+            color: #ff8888;
+        }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>🔄 Statechart Diagrams</h1>
+        
+        <div class="info-panel">
+            <h2>📁 {exported} of {len(summaries)} designs exported</h2>
+            <ul>
+{''.join(items)}            </ul>
+        </div>
+    </div>
+</body>
+</html>
+'''
 
 
 def main():
     """Main entry point for the script."""
-    if len(sys.argv) < 2:
-        print("Usage: python generate_statechart.py <input.json> [output.html]")
+    argv = list(sys.argv)
+    flags = {'--target': "svg", '--jobs': "0", '--trace': ""}
+    for flag in flags:
+        if flag in argv:
+            position = argv.index(flag)
+            flags[flag] = argv[position + 1] if position + 1 < len(argv) else ""
+            del argv[position:position + 2]
+    target = flags['--target']
+    if len(argv) < 2 or target not in EXPORT_TARGETS or not flags['--jobs'].isdigit():
+        print("Usage: python generate_statechart.py <input.json> [output.html] [--target svg|canvas] "
+              "[--trace run.smtrace]")
+        print("       python generate_statechart.py <directory|glob> [output_dir] [--target svg|canvas] [--jobs N]")
         print("\nExample:")
         print("  python generate_statechart.py design5.json")
         print("  python generate_statechart.py design5.json output.html")
+        print("  python generate_statechart.py design5.json --target canvas")
+        print("  python generate_statechart.py design5.json --trace run.smtrace")
+        print('  python generate_statechart.py "models/*.json" docs --jobs 8')
         sys.exit(1)
     
-    input_file = sys.argv[1]
+    input_file = argv[1]
+    
+    if os.path.isdir(input_file) or any(c in input_file for c in '*?['):
+        output_dir = argv[2] if len(argv) >= 3 else "statecharts"
+        try:
+            summaries = export_batch([input_file], output_dir, target, int(flags['--jobs']))
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        failed = [summary for summary in summaries if summary.error is not None]
+        for summary in failed:
+            print(f"  {summary.design_file}: {summary.error}")
+        print(f"✅ {len(summaries) - len(failed)} of {len(summaries)} designs exported to {output_dir}")
+        print(f"\n🌐 Open the index in your browser:")
+        print(f"   file://{os.path.abspath(os.path.join(output_dir, INDEX_PAGE))}")
+        return
     
     # Determine output file name
-    if len(sys.argv) >= 3:
-        output_file = sys.argv[2]
+    if len(argv) >= 3:
+        output_file = argv[2]
     else:
         # Generate output filename from input filename
         base_name = os.path.splitext(input_file)[0]
@@ -597,7 +1803,18 @@ def main():
     
     # Generate the statechart
     generator = StatechartGenerator(input_file)
-    generator.generate_html(output_file)
+    trace = None
+    if flags['--trace']:
+        from sm_trace import Trace
+        try:
+            trace = Trace.load(flags['--trace'])
+            if target == "canvas":
+                raise ValueError("Traces can only be embedded in the svg target")
+            generator.check_trace(trace)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    generator.generate_html(output_file, target, trace=trace)
     
     print(f"\n🌐 Open the file in your browser to view the diagram:")
     print(f"   file://{os.path.abspath(output_file)}")
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Statechart Auto-Layout
+Lays out the children of every container with a layered (Sugiyama-style)
+algorithm driven by the transitions between them, bottom-up through the
+hierarchy, and resizes containers to fit. Works on the saved JSON design
+format, so it can be used headless on imported or generated designs.
+"""
+
+import json
+import os
+import sys
+from typing import Dict, List, NamedTuple, Optional
+
+# Geometry used by the editor's Node class
+TITLE_HEIGHT = 30
+PADDING = 10
+MARGIN = 10  # Extra indent inside the inner rect (matches Node.add_child_node)
+MIN_WIDTH = 200
+MIN_HEIGHT = 100
+
+# Spacing between laid-out children
+NODE_GAP = 40
+LAYER_GAP = 60  # Leaves room for transition titles between layers
+PINNED_GAP = 10  # Space between the Entry/Exit/Run band and the layered content
+
+# Children the editor pins to container corners instead of laying out
+PINNED_TYPES = ("Entry", "Exit", "Run")
+
+# Barycenter ordering passes (each pass is one downward and one upward sweep)
+ORDERING_PASSES = 4
+
+
+class Placement(NamedTuple):
+    """New geometry for a node: position in its parent's coordinates and rect size."""
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+def compute_layout(nodes: List[dict], edges: List[dict],
+                   container_ids: Optional[List] = None) -> Dict[object, Placement]:
+    """Compute new positions and sizes for a design.
+
+    ``nodes`` and ``edges`` use the saved JSON format. Only children of
+    containers are moved; top-level nodes keep their position. When
+    ``container_ids`` is given, only those containers and their descendants
+    are laid out. Returns a mapping of node ID to Placement for every node
+    whose geometry was computed.
+    """
+    node_map = {node['id']: node for node in nodes}
+    children: Dict[object, List] = {}
+    for node in nodes:
+        parent_id = node.get('parent_id')
+        if parent_id in node_map:
+            children.setdefault(parent_id, []).append(node['id'])
+
+    sizes = {node_id: (node['rect']['width'], node['rect']['height'])
+             for node_id, node in node_map.items()}
+
+    # Lift every transition to the pair of siblings it connects
+    sibling_edges: Dict[object, List[tuple]] = {}
+    depth_cache: Dict[object, int] = {}
+    for edge in edges:
+        pair = _sibling_pair(edge.get('start_node_id'), edge.get('end_node_id'), node_map, depth_cache)
+        if pair is not None:
+            parent_id, source, target = pair
+            sibling_edges.setdefault(parent_id, []).append((source, target))
+
+    # Containers to process, children before parents
+    if container_ids is None:
+        roots = [node_id for node_id, node in node_map.items() if node.get('parent_id') not in node_map]
+    else:
+        roots = [node_id for node_id in container_ids if node_id in node_map]
+    order = []
+    seen = set()
+    for root in roots:
+        stack = [(root, False)]
+        while stack:
+            node_id, expanded = stack.pop()
+            if expanded:
+                order.append(node_id)
+                continue
+            if node_id in seen:
+                continue
+            seen.add(node_id)
+            stack.append((node_id, True))
+            for child_id in children.get(node_id, ()):
+                stack.append((child_id, False))
+
+    placements: Dict[object, Placement] = {}
+    for container_id in order:
+        child_ids = children.get(container_id)
+        if not child_ids:
+            continue
+        layered = [child_id for child_id in child_ids if node_map[child_id].get('node_type') not in PINNED_TYPES]
+        pinned = [child_id for child_id in child_ids if node_map[child_id].get('node_type') in PINNED_TYPES]
+        if not layered:
+            continue
+
+        top_band = max((sizes[c][1] for c in pinned if node_map[c].get('node_type') in ("Entry", "Exit")), default=0)
+        bottom_band = max((sizes[c][1] for c in pinned if node_map[c].get('node_type') == "Run"), default=0)
+        top_band = top_band + PINNED_GAP if top_band else 0
+        bottom_band = bottom_band + PINNED_GAP if bottom_band else 0
+
+        initial = [child_id for child_id in layered if node_map[child_id].get('is_initial')]
+        local, content_width, content_height = _layer_siblings(
+            layered, sibling_edges.get(container_id, []), sizes, initial)
+
+        origin_x = PADDING + MARGIN
+        origin_y = TITLE_HEIGHT + PADDING + MARGIN + top_band
+        for child_id, (x, y) in local.items():
+            width, height = sizes[child_id]
+            placements[child_id] = Placement(origin_x + x, origin_y + y, width, height)
+
+        # Resize the container to fit, keeping room for its pinned corner nodes
+        pinned_width = sum(sizes[c][0] for c in pinned if node_map[c].get('node_type') in ("Entry", "Exit"))
+        if pinned_width:
+            pinned_width += NODE_GAP
+        width = max(MIN_WIDTH, content_width + 2 * (PADDING + MARGIN), pinned_width + 2 * PADDING)
+        height = max(MIN_HEIGHT, TITLE_HEIGHT + 2 * (PADDING + MARGIN) + top_band + content_height + bottom_band)
+        sizes[container_id] = (width, height)
+
+        # Pinned nodes follow the container corners (as Node.update_inner_rect does)
+        inner_left = PADDING
+        inner_top = TITLE_HEIGHT + PADDING
+        inner_right = width - PADDING
+        inner_bottom = height - PADDING
+        for child_id in pinned:
+            child_width, child_height = sizes[child_id]
+            node_type = node_map[child_id].get('node_type')
+            if node_type == "Entry":
+                placements[child_id] = Placement(inner_left, inner_top, child_width, child_height)
+            elif node_type == "Exit":
+                placements[child_id] = Placement(inner_right - child_width, inner_top, child_width, child_height)
+            else:
+                placements[child_id] = Placement(inner_left, inner_bottom - child_height, child_width, child_height)
+
+        # Keep the container where it is; its own parent (processed later) may move it
+        container = node_map[container_id]
+        placements[container_id] = Placement(container['pos']['x'], container['pos']['y'], width, height)
+
+    return placements
+
+
+def auto_layout(design_data: dict, container_ids: Optional[List] = None) -> dict:
+    """Lay out a design dict in place (see compute_layout) and return it."""
+    nodes = design_data.get('nodes', [])
+    placements = compute_layout(nodes, design_data.get('edges', []), container_ids)
+    for node in nodes:
+        placement = placements.get(node['id'])
+        if placement is None:
+            continue
+        node['pos'] = {'x': placement.x, 'y': placement.y}
+        node['rect'] = dict(node['rect'], width=placement.width, height=placement.height)
+    return design_data
+
+
+def _depth(node_id, node_map, depth_cache):
+    depth = depth_cache.get(node_id)
+    if depth is not None:
+        return depth
+    chain = []
+    current = node_id
+    while current in node_map and current not in depth_cache:
+        chain.append(current)
+        current = node_map[current].get('parent_id')
+    depth = depth_cache.get(current, -1)
+    for item in reversed(chain):
+        depth += 1
+        depth_cache[item] = depth
+    return depth_cache[node_id]
+
+
+def _sibling_pair(source, target, node_map, depth_cache):
+    """Return (container, source child, target child) for the container that encloses both ends."""
+    if source not in node_map or target not in node_map or source == target:
+        return None
+    source_depth = _depth(source, node_map, depth_cache)
+    target_depth = _depth(target, node_map, depth_cache)
+    while source_depth > target_depth:
+        source = node_map[source].get('parent_id')
+        source_depth -= 1
+    while target_depth > source_depth:
+        target = node_map[target].get('parent_id')
+        target_depth -= 1
+    if source == target:
+        # One end contains the other; there is no sibling ordering to express
+        return None
+    while True:
+        source_parent = node_map[source].get('parent_id')
+        target_parent = node_map[target].get('parent_id')
+        if source_parent == target_parent:
+            if source_parent not in node_map:
+                return None  # Top-level nodes are not laid out
+            return source_parent, source, target
+        source, target = source_parent, target_parent
+
+
+def _layer_siblings(child_ids, edge_pairs, sizes, initial):
+    """Sugiyama-style layout of one container's children.
+
+    Returns ({child_id: (x, y)}, content_width, content_height) in coordinates
+    relative to the content origin.
+    """
+    index = {child_id: i for i, child_id in enumerate(child_ids)}
+    count = len(child_ids)
+    successors = [[] for _ in range(count)]
+    predecessors = [[] for _ in range(count)]
+    for source, target in edge_pairs:
+        successors[index[source]].append(index[target])
+
+    # 1. Cycle removal: depth-first search from the initial state(s) first;
+    #    edges that point back to a node on the current DFS path are reversed.
+    start_order = [index[child_id] for child_id in initial] + list(range(count))
+    state = [0] * count  # 0 = unvisited, 1 = on stack, 2 = done
+    dfs_rank = [0] * count
+    forward = [[] for _ in range(count)]
+    rank = 0
+    for start in start_order:
+        if state[start]:
+            continue
+        state[start] = 1
+        dfs_rank[start] = rank
+        rank += 1
+        stack = [(start, iter(successors[start]))]
+        while stack:
+            node, neighbours = stack[-1]
+            advanced = False
+            for neighbour in neighbours:
+                if neighbour == node:
+                    continue
+                if state[neighbour] == 1:
+                    forward[neighbour].append(node)  # Back edge: reverse it
+                    continue
+                forward[node].append(neighbour)
+                if state[neighbour] == 0:
+                    state[neighbour] = 1
+                    dfs_rank[neighbour] = rank
+                    rank += 1
+                    stack.append((neighbour, iter(successors[neighbour])))
+                    advanced = True
+                    break
+            if not advanced:
+                state[node] = 2
+                stack.pop()
+
+    for node in range(count):
+        for neighbour in forward[node]:
+            predecessors[neighbour].append(node)
+
+    # 2. Layering: longest path from the sources (Kahn's topological order)
+    layer = [0] * count
+    remaining = [len(predecessors[node]) for node in range(count)]
+    ready = sorted((node for node in range(count) if remaining[node] == 0), key=dfs_rank.__getitem__)
+    position = 0
+    while position < len(ready):
+        node = ready[position]
+        position += 1
+        for neighbour in forward[node]:
+            if layer[node] + 1 > layer[neighbour]:
+                layer[neighbour] = layer[node] + 1
+            remaining[neighbour] -= 1
+            if remaining[neighbour] == 0:
+                ready.append(neighbour)
+
+    layer_count = max(layer) + 1 if count else 0
+    layers = [[] for _ in range(layer_count)]
+    for node in sorted(range(count), key=dfs_rank.__getitem__):
+        layers[layer[node]].append(node)
+
+    # 3. Crossing reduction: barycenter sweeps using neighbours in earlier
+    #    (downward sweep) or later (upward sweep) layers
+    order_pos = [0.0] * count
+    for nodes in layers:
+        for i, node in enumerate(nodes):
+            order_pos[node] = i
+    for _ in range(ORDERING_PASSES):
+        for sweep, neighbours_of in ((range(1, layer_count), predecessors),
+                                     (range(layer_count - 2, -1, -1), forward)):
+            for layer_index in sweep:
+                nodes = layers[layer_index]
+                keys = {}
+                for node in nodes:
+                    neighbours = neighbours_of[node]
+                    if neighbours:
+                        keys[node] = sum(order_pos[n] for n in neighbours) / len(neighbours)
+                    else:
+                        keys[node] = order_pos[node]
+                nodes.sort(key=lambda n: (keys[n], order_pos[n]))
+                for i, node in enumerate(nodes):
+                    order_pos[node] = i
+
+    # 4. Coordinates: rows of nodes, each row centred on the widest row
+    row_widths = []
+    row_heights = []
+    for nodes in layers:
+        row_widths.append(sum(sizes[child_ids[n]][0] for n in nodes) + NODE_GAP * (len(nodes) - 1))
+        row_heights.append(max(sizes[child_ids[n]][1] for n in nodes))
+    content_width = max(row_widths, default=0)
+
+    positions = {}
+    y = 0.0
+    for nodes, row_width, row_height in zip(layers, row_widths, row_heights):
+        x = (content_width - row_width) / 2
+        for node in nodes:
+            width, height = sizes[child_ids[node]]
+            positions[child_ids[node]] = (x, y)
+            x += width + NODE_GAP
+        y += row_height + LAYER_GAP
+    content_height = y - LAYER_GAP if layers else 0
+    return positions, content_width, content_height
+
+
+def main(argv=None):
+    """Lay out a design file and write the result."""
+    argv = sys.argv if argv is None else argv
+    if len(argv) < 2:
+        print("Usage: python sm_layout.py <input.json> [output.json]")
+        print("\nExample:")
+        print("  python sm_layout.py design.json")
+        print("  python sm_layout.py design.json design_laid_out.json")
+        sys.exit(1)
+
+    input_file = argv[1]
+    if len(argv) >= 3:
+        output_file = argv[2]
+    else:
+        base_name = os.path.splitext(input_file)[0]
+        output_file = f"{base_name}_layout.json"
+
+    try:
+        with open(input_file, 'r') as f:
+            design_data = json.load(f)
+    except FileNotFoundError:
+        print(f"Error: File '{input_file}' not found.")
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in '{input_file}': {e}")
+        sys.exit(1)
+
+    auto_layout(design_data)
+
+    with open(output_file, 'w') as f:
+        json.dump(design_data, f, indent=2)
+    print(f"✅ Laid out {len(design_data.get('nodes', []))} nodes: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
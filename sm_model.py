@@ -0,0 +1,150 @@
+"""
+Design Model
+Qt-free, read-only view of a saved design (the JSON format written by the
+editor): the node hierarchy and the transitions between nodes. Used by the
+headless simulator and tools that work on design files.
+"""
+
+import json
+from typing import Dict, List, Optional
+
+from search_index import PATH_SEPARATOR
+
+# Node types that take part in state machine execution
+STATE_TYPES = ("State", "StateMachine")
+
+# Child node types whose user_text is an action of the enclosing state
+ACTION_TYPES = ("Entry", "Exit", "Run")
+
+
+class StateNode:
+    """A node of the design hierarchy (Process, StateMachine, State, Entry, Exit or Run)."""
+
+    __slots__ = ('id', 'title', 'node_type', 'is_initial', 'user_text', 'parent', 'children')
+
+    def __init__(self, node_id, title, node_type, is_initial=False, user_text=""):
+        self.id = node_id
+        self.title = title
+        self.node_type = node_type
+        self.is_initial = is_initial
+        self.user_text = user_text
+        self.parent: Optional[StateNode] = None
+        self.children: List[StateNode] = []
+
+    def __repr__(self):
+        return f"StateNode({self.title!r}, {self.node_type!r})"
+
+    def ancestors(self):
+        """Yield the parent, grandparent, ... up to the top-level node."""
+        node = self.parent
+        while node is not None:
+            yield node
+            node = node.parent
+
+    def path(self) -> str:
+        """Titles from the top-level node down to this node, as shown in the editor."""
+        titles = [self.title] + [ancestor.title for ancestor in self.ancestors()]
+        return PATH_SEPARATOR.join(reversed(titles))
+
+    def is_inside(self, other):
+        """True if this node is other or one of its descendants."""
+        node = self
+        while node is not None:
+            if node is other:
+                return True
+            node = node.parent
+        return False
+
+
+class Transition:
+    """A titled edge between two nodes; the title is the triggering event."""
+
+    __slots__ = ('index', 'title', 'source', 'target')
+
+    def __init__(self, index, title, source, target):
+        self.index = index  # Position in the design's edge list
+        self.title = title
+        self.source: Optional[StateNode] = source
+        self.target: Optional[StateNode] = target
+
+    def __repr__(self):
+        source = self.source.title if self.source else None
+        target = self.target.title if self.target else None
+        return f"Transition({self.title!r}: {source} -> {target})"
+
+
+class DesignModel:
+    """Node hierarchy and transitions of a design.
+
+    Node and child order follow the design's node list, which is the order the
+    editor shows them in; transitions keep the design's edge order.
+    """
+
+    def __init__(self, design_data: dict):
+        self.nodes: Dict[object, StateNode] = {}
+        self.roots: List[StateNode] = []
+        self.transitions: List[Transition] = []
+
+        for node_data in design_data.get('nodes', []):
+            node = StateNode(node_data['id'], node_data.get('title', ""), node_data.get('node_type'),
+                             bool(node_data.get('is_initial', False)), node_data.get('user_text', "") or "")
+            self.nodes[node.id] = node
+
+        for node_data in design_data.get('nodes', []):
+            node = self.nodes[node_data['id']]
+            parent = self.nodes.get(node_data.get('parent_id'))
+            if parent is not None:
+                node.parent = parent
+                parent.children.append(node)
+            else:
+                self.roots.append(node)
+
+        for index, edge_data in enumerate(design_data.get('edges', [])):
+            self.transitions.append(Transition(
+                index,
+                edge_data.get('title', "") or "",
+                self.nodes.get(edge_data.get('start_node_id')),
+                self.nodes.get(edge_data.get('end_node_id'))))
+
+    @classmethod
+    def from_file(cls, file_path: str) -> 'DesignModel':
+        """Load a design JSON file."""
+        with open(file_path, 'r') as f:
+            return cls(json.load(f))
+
+    def statemachines(self) -> List[StateNode]:
+        """The StateMachine simulated for each top-level Process (its first StateMachine child)."""
+        result = []
+        for root in self.roots:
+            if root.node_type != "Process":
+                continue
+            for child in root.children:
+                if child.node_type == "StateMachine":
+                    result.append(child)
+                    break
+        return result
+
+    def transitions_with_title(self, title: str) -> List[Transition]:
+        """All transitions triggered by an event, in design order."""
+        return [transition for transition in self.transitions if transition.title == title]
+
+    @staticmethod
+    def find_statemachine(node: Optional[StateNode]) -> Optional[StateNode]:
+        """The StateMachine that contains node (node itself if it is one)."""
+        while node is not None:
+            if node.node_type == "StateMachine":
+                return node
+            node = node.parent
+        return None
+
+    @staticmethod
+    def initial_child(node: StateNode) -> Optional[StateNode]:
+        """The State child marked initial, else the first State child, else None."""
+        first = None
+        for child in node.children:
+            if child.node_type == "State":
+                if child.is_initial:
+                    return child
+                if first is None:
+                    first = child
+        return first
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Parallel Simulation
+Runs the Processes of a large design on several worker processes. Each
+top-level Process holds its own StateMachine, so Processes only interact
+through transitions whose source and target lie in different Processes;
+Processes linked that way are kept in the same partition.
+
+The parent process routes every event, in chunks, to the partitions whose
+transitions use it. Each worker runs an ordinary Simulator on its part of the
+design and records a trace of active state changes; the traces are merged
+back into the order a single Simulator would have produced them.
+
+    python sm_parallel.py design.json events.txt [--workers N]
+"""
+
+import heapq
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sm_model import DesignModel, StateNode, STATE_TYPES
+from sm_simulator import DispatchStats, Simulator, SimulatorObserver, read_event_trace
+
+# Events per message sent to a worker
+CHUNK_SIZE = 4096
+
+# Seconds between checks that the workers are still alive while waiting for their results
+WORKER_POLL_SECONDS = 0.5
+
+
+class TraceEntry(NamedTuple):
+    """One active state change, as reported by active_state_changed()."""
+    time: int  # Position of the event in the dispatched stream; -1 for start()
+    transition: int  # Index in the design's edge list; -1 for start()
+    statemachine: object  # Node IDs
+    old_state: object  # None when the StateMachine is started
+    new_state: object
+
+
+class Partition(NamedTuple):
+    """Part of a design simulated by one worker."""
+    root_ids: List[object]  # Top-level nodes (Processes) in this partition
+    design_data: dict  # The nodes below those roots and the edges between them
+    edge_indices: List[int]  # Original edge index of each edge in design_data
+    events: frozenset  # Transition titles used in this partition
+
+
+def partition_design(design_data: dict, count: int) -> List[Partition]:
+    """Split a design into at most count partitions of whole top-level Processes.
+
+    Processes connected by a transition between their states end up in the
+    same partition; partitions are balanced by number of nodes and edges.
+    """
+    model = DesignModel(design_data)
+
+    def root_of(node):
+        while node.parent is not None:
+            node = node.parent
+        return node
+
+    # Union-find over top-level nodes linked by State-to-State transitions
+    group = {root.id: root.id for root in model.roots}
+
+    def find(root_id):
+        while group[root_id] != root_id:
+            group[root_id] = group[group[root_id]]
+            root_id = group[root_id]
+        return root_id
+
+    for transition in model.transitions:
+        source, target = transition.source, transition.target
+        if (source is None or target is None
+                or source.node_type not in STATE_TYPES or target.node_type not in STATE_TYPES):
+            continue
+        a, b = find(root_of(source).id), find(root_of(target).id)
+        if a != b:
+            group[b] = a
+
+    root_group = {}
+    for node in model.nodes.values():
+        root_group[node.id] = find(root_of(node).id)
+    groups: Dict[object, List[object]] = {}
+    for root in model.roots:
+        groups.setdefault(find(root.id), []).append(root.id)
+    weights = {key: 0 for key in groups}
+    for node_id in root_group:
+        weights[root_group[node_id]] += 1
+    edge_groups = []
+    for edge_data in design_data.get('edges', []):
+        start = root_group.get(edge_data.get('start_node_id'))
+        end = root_group.get(edge_data.get('end_node_id'))
+        edge_groups.append(start if start == end else None)
+        if start is not None and start == end:
+            weights[start] += 1
+
+    # Greedy balancing: heaviest group onto the lightest partition
+    count = max(1, min(count, len(groups)))
+    bins = [(0, number, []) for number in range(count)]
+    heapq.heapify(bins)
+    for key in sorted(groups, key=lambda key: -weights[key]):
+        load, number, keys = heapq.heappop(bins)
+        keys.append(key)
+        heapq.heappush(bins, (load + weights[key], number, keys))
+
+    partitions = []
+    for _, _, keys in sorted(bins, key=lambda item: item[1]):
+        if not keys:
+            continue
+        keys = set(keys)
+        root_ids = [root.id for root in model.roots if find(root.id) in keys]
+        nodes = [node_data for node_data in design_data.get('nodes', [])
+                 if root_group.get(node_data['id']) in keys]
+        edges = []
+        edge_indices = []
+        for index, edge_data in enumerate(design_data.get('edges', [])):
+            if edge_groups[index] in keys:
+                edges.append(edge_data)
+                edge_indices.append(index)
+        subset = dict(design_data, nodes=nodes, edges=edges)
+        events = frozenset(edge_data.get('title', "") or "" for edge_data in edges)
+        partitions.append(Partition(root_ids, subset, edge_indices, events))
+    return partitions
+
+
+class _TraceRecorder(SimulatorObserver):
+    """Collects TraceEntry tuples in a worker."""
+
+    def __init__(self, edge_indices):
+        self.edge_indices = edge_indices
+        self.time = -1
+        self.entries = []
+        self._transition = -1
+
+    def transition_fired(self, transition):
+        self._transition = self.edge_indices[transition.index] if transition is not None else -1
+
+    def active_state_changed(self, statemachine, old_leaf, new_leaf):
+        self.entries.append(TraceEntry(self.time, self._transition, statemachine.id,
+                                       old_leaf.id if old_leaf is not None else None, new_leaf.id))
+
+
+def _worker(partition: Partition, inbox, outbox, record_trace: bool):
+    """Worker loop: run the partition's Simulator on the event chunks it receives.
+
+    Messages: ('events', times, events), ('collect',) and None to stop.
+    """
+    simulator = Simulator(DesignModel(partition.design_data))
+    recorder = _TraceRecorder(partition.edge_indices)
+    if record_trace:
+        simulator.add_observer(recorder)
+    simulator.start()
+    transitions = 0
+    while True:
+        message = inbox.get()
+        if message is None:
+            break
+        if message[0] == 'events':
+            _, times, events = message
+            dispatch = simulator.dispatch
+            if record_trace:
+                for event_time, event in zip(times, events):
+                    recorder.time = event_time
+                    transitions += dispatch(event)
+            else:
+                for event in events:
+                    transitions += dispatch(event)
+        elif message[0] == 'collect':
+            leaves = {statemachine.id: leaf.id for statemachine, leaf in simulator.active_leaves().items()}
+            outbox.put((recorder.entries, leaves, transitions))
+            recorder.entries = []
+            transitions = 0
+
+
+class ParallelSimulator:
+    """Simulates the Processes of a design on a pool of worker processes.
+
+    Usage::
+
+        with ParallelSimulator(design_data, workers=4) as simulator:
+            stats = simulator.dispatch_many(events)
+            trace = simulator.trace()
+    """
+
+    def __init__(self, design_data: dict, workers: Optional[int] = None,
+                 chunk_size: int = CHUNK_SIZE, record_trace: bool = True):
+        self.model = DesignModel(design_data)
+        self.partitions = partition_design(design_data, workers or os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.record_trace = record_trace
+        self.time = 0  # Stream position of the next dispatched event
+
+        # Event title -> partitions that use it
+        self._routes: Dict[str, tuple] = {}
+        for number, partition in enumerate(self.partitions):
+            for event in partition.events:
+                self._routes[event] = self._routes.get(event, ()) + (number,)
+
+        # Start order of the StateMachines, for merging start() entries
+        self._rank = {statemachine.id: rank for rank, statemachine in enumerate(self.model.statemachines())}
+        self._trace: List[TraceEntry] = []
+        self._leaves: Dict[object, object] = {}
+        self._processes = []
+        self._inboxes = []
+        self._outbox = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self):
+        """Start one worker per partition, each entering its initial configuration."""
+        self.close()
+        self.time = 0
+        self._trace = []
+        self._leaves = {}
+        self._outbox = multiprocessing.Queue()
+        for number, partition in enumerate(self.partitions):
+            inbox = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=_worker, args=(partition, inbox, self._outbox, self.record_trace), daemon=True)
+            process.start()
+            self._inboxes.append(inbox)
+            self._processes.append(process)
+        self._collect()
+
+    def close(self):
+        """Stop the workers."""
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            process.join()
+        self._inboxes = []
+        self._processes = []
+        self._outbox = None
+
+    def dispatch_many(self, events: Iterable[str]) -> DispatchStats:
+        """Route a stream of events to the workers and wait until all are processed."""
+        if not self._processes:
+            self.start()
+        started = time.perf_counter()
+        routes = self._routes
+        inboxes = self._inboxes
+        chunk_size = self.chunk_size
+        pending = [([], []) for _ in self.partitions]
+        count = 0
+        event_time = self.time
+        for event in events:
+            for number in routes.get(event, ()):
+                times, chunk = pending[number]
+                times.append(event_time)
+                chunk.append(event)
+                if len(chunk) >= chunk_size:
+                    inboxes[number].put(('events', times, chunk))
+                    pending[number] = ([], [])
+            event_time += 1
+            count += 1
+        for number, (times, chunk) in enumerate(pending):
+            if chunk:
+                inboxes[number].put(('events', times, chunk))
+        self.time = event_time
+        transitions = self._collect()
+        return DispatchStats(count, transitions, time.perf_counter() - started)
+
+    def _collect(self) -> int:
+        """Gather traces and active leaves from every worker; returns the transitions they fired."""
+        for inbox in self._inboxes:
+            inbox.put(('collect',))
+        traces = []
+        transitions = 0
+        for _ in self._inboxes:
+            entries, leaves, fired = self._receive()
+            traces.append(entries)
+            self._leaves.update(leaves)
+            transitions += fired
+        # Single-Simulator order: by event, then by transition in design order
+        rank = self._rank
+        self._trace.extend(heapq.merge(
+            *traces, key=lambda entry: (entry.time, entry.transition, rank.get(entry.statemachine, 0))))
+        return transitions
+
+    def _receive(self):
+        """The next worker result; raises RuntimeError (and stops the workers) if a worker died."""
+        while True:
+            try:
+                return self._outbox.get(timeout=WORKER_POLL_SECONDS)
+            except queue.Empty:
+                dead = [process for process in self._processes if not process.is_alive()]
+                if dead:
+                    exitcode = dead[0].exitcode
+                    for process in self._processes:
+                        process.terminate()
+                        process.join()
+                    self._inboxes = []
+                    self._processes = []
+                    self._outbox = None
+                    raise RuntimeError(f"A simulation worker exited unexpectedly (exit code {exitcode})")
+
+    def trace(self) -> List[TraceEntry]:
+        """Merged active state changes since start(), ordered by event."""
+        return self._trace
+
+    def active_leaves(self) -> Dict[StateNode, StateNode]:
+        """Active leaf state per running StateMachine, in start order."""
+        nodes = self.model.nodes
+        ordered = sorted(self._leaves.items(), key=lambda item: self._rank.get(item[0], len(self._rank)))
+        return {nodes[statemachine]: nodes[leaf] for statemachine, leaf in ordered}
+
+
+def main(argv=None):
+    """Simulate an event trace on a design with worker processes and print a summary."""
+    argv = sys.argv if argv is None else argv
+    args = list(argv[1:])
+    workers = None
+    if '--workers' in args:
+        position = args.index('--workers')
+        try:
+            workers = int(args[position + 1])
+        except (IndexError, ValueError):
+            print("Error: --workers needs a number")
+            sys.exit(1)
+        del args[position:position + 2]
+    if len(args) < 2:
+        print("Usage: python sm_parallel.py <design.json> <events.txt|events.json> [--workers N]")
+        sys.exit(1)
+
+    try:
+        with open(args[0], 'r') as f:
+            design_data = json.load(f)
+        events = read_event_trace(args[1])
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    with ParallelSimulator(design_data, workers=workers) as simulator:
+        stats = simulator.dispatch_many(events)
+        print(f"{len(simulator.partitions)} partition(s): {stats.events} event(s), "
+              f"{stats.transitions} transition(s) in {stats.seconds * 1000:.1f} ms "
+              f"({stats.events_per_second:,.0f} events/s)")
+        for statemachine, leaf in simulator.active_leaves().items():
+            print(f"  {statemachine.title}: {leaf.title}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+State Machine Simulator
+Headless execution of a DesignModel with the editor's simulator semantics:
+
+- start() enters, for every top-level Process, its first StateMachine and then
+  the initial (or first) State at each level down to a leaf.
+- An event is a transition title. All transitions with that title are checked
+  against the configuration *before* any of them fires; a transition is enabled
+  when the active leaf of its source's StateMachine is the source or inside it.
+- Firing exits the active states up to the common ancestor with the target,
+  then enters the target and descends through initial children. A transition
+  whose target is already active is suppressed.
+
+Events are processed run-to-completion: events raised with raise_event() while
+an event is being processed (e.g. from an entry or exit callback) are handled
+before the next external event. Observers receive exit/entry/transition
+callbacks and one run_completed() per dispatch()/dispatch_many() call; the
+editor is one of them.
+"""
+
+import json
+import time
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sm_compiler import CompiledDesign, compile_design
+from sm_coverage import Coverage
+from sm_model import DesignModel, StateNode, Transition
+
+
+class SimulatorObserver:
+    """Base class for simulator observers; override the callbacks you need."""
+
+    def state_exited(self, state: StateNode):
+        pass
+
+    def transition_fired(self, transition: Optional[Transition]):
+        """Called between exits and entries; transition is None for start()."""
+        pass
+
+    def state_entered(self, state: StateNode):
+        pass
+
+    def active_state_changed(self, statemachine: StateNode, old_leaf: Optional[StateNode], new_leaf: StateNode):
+        pass
+
+    def transition_suppressed(self, transition: Transition):
+        """An enabled transition whose target is already active."""
+        pass
+
+    def run_completed(self):
+        """All queued events have been processed (once per dispatch/dispatch_many call)."""
+        pass
+
+
+class DispatchStats(NamedTuple):
+    """Result of Simulator.dispatch_many()."""
+    events: int  # External and internal events processed
+    transitions: int  # Transitions enabled
+    seconds: float
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events / self.seconds if self.seconds > 0 else float('inf')
+
+
+class Simulator:
+    """Runs the StateMachines of a design without any GUI.
+
+    Dispatch works on the compiled tables (see sm_compiler): an event is a
+    lookup of the transitions enabled by each active leaf, and firing one
+    replays a memoized exit/entry plan.
+    """
+
+    def __init__(self, model: DesignModel, compiled: Optional[CompiledDesign] = None):
+        self.model = model
+        self.compiled = compiled if compiled is not None else compile_design(model)
+        self._observers: List[SimulatorObserver] = []
+        self._leaves: Dict[int, int] = {}  # StateMachine index -> active leaf index
+        self._internal = deque()  # Events raised while processing, handled first
+        self._external = deque()  # Events (and fire() calls, as tuples) posted while processing, handled after
+        self._processing = False
+        self.coverage: Optional[Coverage] = None
+
+    def enable_coverage(self) -> Coverage:
+        """Start counting taken plans and transition firings (kept across start() calls)."""
+        if self.coverage is None:
+            self.coverage = Coverage(self.compiled)
+        return self.coverage
+
+    def add_observer(self, observer: SimulatorObserver):
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: SimulatorObserver):
+        if observer in self._observers:
+            self._observers.remove(observer)
+
+    def start(self) -> int:
+        """Enter the initial configuration; returns the number of StateMachines started."""
+        compiled = self.compiled
+        self._leaves.clear()
+        self._internal.clear()
+        self._external.clear()
+        started = 0
+        self._processing = True
+        try:
+            for statemachine in self.model.statemachines():
+                index = compiled.index.get(statemachine)
+                if index is None or compiled.initial[index] < 0:
+                    continue
+                self._apply(index, None, compiled.plan(-1, index))
+                started += 1
+            self._drain()
+        finally:
+            self._processing = False
+        self._notify_run_completed()
+        return started
+
+    def raise_event(self, event: str):
+        """Queue an internal event, processed before any further external event."""
+        self._internal.append(event)
+        if not self._processing:
+            self.dispatch_many(())
+
+    def post(self, event: str):
+        """Queue an external event; it is processed by the next dispatch/run call, or after the current event."""
+        self._external.append(event)
+
+    def run(self) -> DispatchStats:
+        """Process all posted events."""
+        return self.dispatch_many(())
+
+    def dispatch(self, event: str) -> int:
+        """Process one external event to completion; returns how many transitions it enabled.
+
+        Called while an event is being processed (from an observer), the event
+        is queued instead and 0 is returned.
+        """
+        if self._processing:
+            self._external.append(event)
+            return 0
+        self._processing = True
+        try:
+            enabled = self._step(event)
+            self._drain()
+        finally:
+            self._processing = False
+        self._notify_run_completed()
+        return enabled
+
+    def dispatch_many(self, events: Iterable[str]) -> DispatchStats:
+        """Process a whole event trace, each event run to completion.
+
+        Events already posted are processed first. Observers get a single
+        run_completed() at the end of the batch.
+        """
+        if self._processing:
+            self._external.extend(events)
+            return DispatchStats(0, 0, 0.0)
+        step = self._step
+        internal = self._internal
+        external = self._external
+        count = 0
+        transitions = 0
+        self._processing = True
+        started = time.perf_counter()
+        try:
+            if internal or external:
+                count, transitions = self._drain()
+            for event in events:
+                transitions += step(event)
+                count += 1
+                if internal or external:
+                    drained, fired = self._drain()
+                    count += drained
+                    transitions += fired
+        finally:
+            self._processing = False
+        seconds = time.perf_counter() - started
+        self._notify_run_completed()
+        return DispatchStats(count, transitions, seconds)
+
+    def _drain(self):
+        """Run-to-completion: internal events first, then events posted meanwhile.
+
+        Returns (events processed, transitions enabled).
+        """
+        internal = self._internal
+        external = self._external
+        count = 0
+        transitions = 0
+        while internal or external:
+            if internal:
+                transitions += self._step(internal.popleft())
+            else:
+                event = external.popleft()
+                transitions += self._step(event) if event.__class__ is str else self._fire(event)
+            count += 1
+        return count, transitions
+
+    def _notify_run_completed(self):
+        for observer in self._observers:
+            observer.run_completed()
+
+    def _step(self, event: str) -> int:
+        """Fire every enabled transition titled event; returns how many were enabled."""
+        compiled = self.compiled
+        event_id = compiled.event_ids.get(event)
+        if event_id is None:
+            return 0
+        row = compiled.enabled[event_id]
+        if len(self._leaves) == 1:
+            for leaf in self._leaves.values():
+                enabled = row.get(leaf, ())
+        else:
+            # Several StateMachines: merge their enabled transitions back into design order
+            enabled = set()
+            for leaf in self._leaves.values():
+                enabled.update(row.get(leaf, ()))
+            enabled = sorted(enabled)
+        for transition_index in enabled:
+            self._take(transition_index)
+        return len(enabled)
+
+    def fire(self, transitions: Iterable[Transition]) -> int:
+        """Fire the enabled transitions among transitions, all checked before any fires, then run to completion.
+
+        Called while an event is being processed (from an observer), the
+        transitions are queued like a posted event and 0 is returned.
+        """
+        if self._processing:
+            self._external.append(tuple(transitions))
+            return 0
+        self._processing = True
+        try:
+            fired = self._fire(transitions)
+            self._drain()
+        finally:
+            self._processing = False
+        self._notify_run_completed()
+        return fired
+
+    def _fire(self, transitions) -> int:
+        enabled = [transition.index for transition in transitions if self.is_enabled(transition)]
+        for transition_index in enabled:
+            self._take(transition_index)
+        return len(enabled)
+
+    def is_enabled(self, transition: Transition) -> bool:
+        """True if the transition's source is active and its target is a State/StateMachine."""
+        compiled = self.compiled
+        source = compiled.index.get(transition.source)
+        if source is None or compiled.target[transition.index] < 0:
+            return False
+        leaf = self._leaves.get(compiled.statemachine[source])
+        return leaf is not None and compiled.is_inside(leaf, source)
+
+    def active_leaf(self, statemachine: StateNode) -> Optional[StateNode]:
+        leaf = self._leaves.get(self.compiled.index.get(statemachine))
+        return self.compiled.states[leaf] if leaf is not None else None
+
+    def active_leaves(self) -> Dict[StateNode, StateNode]:
+        """Active leaf state per running StateMachine, in start order."""
+        states = self.compiled.states
+        return {states[statemachine]: states[leaf] for statemachine, leaf in self._leaves.items()}
+
+    def active_configuration(self) -> List[StateNode]:
+        """All active states: per running StateMachine, the StateMachine then each State down to the leaf."""
+        compiled = self.compiled
+        configuration = []
+        for leaf in self._leaves.values():
+            chain = []
+            node = leaf
+            while node >= 0:
+                chain.append(compiled.states[node])
+                node = compiled.parent[node]
+            configuration.extend(reversed(chain))
+        return configuration
+
+    def _take(self, transition_index):
+        compiled = self.compiled
+        target = compiled.target[transition_index]
+        statemachine = compiled.statemachine[target]
+        plan = compiled.plan(self._leaves.get(statemachine, -1), target)
+        if plan is None:
+            transition = compiled.transitions[transition_index]
+            for observer in self._observers:
+                observer.transition_suppressed(transition)
+            return
+        self._apply(statemachine, compiled.transitions[transition_index], plan)
+
+    def _apply(self, statemachine, transition, plan):
+        """Make a plan's leaf active and report its exits and entries."""
+        exits, entries, new_leaf, number = plan
+        old_leaf = self._leaves.get(statemachine)
+        self._leaves[statemachine] = new_leaf
+        coverage = self.coverage
+        if coverage is not None:
+            try:
+                coverage.plan_hits[number] += 1
+            except IndexError:
+                coverage.count_new_plan(number)
+            if transition is not None:
+                coverage.transition_hits[transition.index] += 1
+        if not self._observers:
+            return
+        states = self.compiled.states
+        for observer in self._observers:
+            for state in exits:
+                observer.state_exited(states[state])
+            observer.transition_fired(transition)
+            for state in entries:
+                observer.state_entered(states[state])
+            observer.active_state_changed(states[statemachine],
+                                          states[old_leaf] if old_leaf is not None else None,
+                                          states[new_leaf])
+
+
+def read_event_trace(file_path: str) -> List[str]:
+    """Events from a trace file: a JSON list, or one event per line ('#' starts a comment line)."""
+    with open(file_path, 'r') as f:
+        content = f.read()
+    if file_path.lower().endswith('.json'):
+        return [str(event) for event in json.loads(content)]
+    return [line.strip() for line in content.splitlines()
+            if line.strip() and not line.lstrip().startswith('#')]
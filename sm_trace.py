@@ -0,0 +1,260 @@
+"""
+Simulation Traces
+Compact recording of everything a Simulator does, one step per fired
+transition (or per StateMachine started): event, transition, source, target,
+and the states exited and entered. Steps are stored column-wise in typed
+arrays, with a checkpoint of the active configuration every
+CHECKPOINT_INTERVAL steps, so the configuration after any step is found by
+replaying at most one interval.
+
+    recorder = TraceRecorder(simulator)   # before simulator.start()
+    ...
+    recorder.trace.save("run.smtrace")
+    trace = Trace.load("run.smtrace")
+    trace.configuration(1_000_000)        # {StateMachine index: leaf index}
+
+File format: MAGIC, a little-endian uint32 length and a JSON header (state
+IDs and paths, event names, StateMachines), then each column as a uint64
+item count followed by the raw array data in the header's byte order.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sm_model import DesignModel
+from sm_simulator import Simulator, SimulatorObserver
+
+MAGIC = b'SMTRACE1'
+
+# Steps between configuration checkpoints
+CHECKPOINT_INTERVAL = 4096
+
+# Column name -> array typecode, in file order
+COLUMNS = (
+    ('events', 'i'),  # Event ID, -1 when a StateMachine is started
+    ('transitions', 'i'),  # Transition index in the design, -1 when started
+    ('sources', 'i'),  # State index of the transition source, -1 when started
+    ('targets', 'i'),  # State index of the transition target (the StateMachine when started)
+    ('slots', 'i'),  # Position of the step's StateMachine in Trace.statemachines
+    ('exit_counts', 'H'),
+    ('entry_counts', 'H'),
+    ('states', 'i'),  # Per step: exited states (innermost first), then entered states
+    ('checkpoint_offsets', 'q'),  # Position in states of every checkpointed step
+    ('checkpoint_leaves', 'i'),  # Per checkpoint: active leaf of each StateMachine (-1 if not started)
+)
+
+
+class TraceStep(NamedTuple):
+    """One recorded step; states are trace state indices."""
+    sequence: int
+    event: Optional[str]  # None when a StateMachine is started
+    transition: int
+    source: int
+    target: int
+    exits: Tuple[int, ...]
+    entries: Tuple[int, ...]
+
+
+class Trace:
+    """Recorded simulator steps with periodic configuration checkpoints."""
+
+    def __init__(self, state_ids: List, state_paths: List[str], statemachines: List[int],
+                 event_names: List[str], checkpoint_interval: int = CHECKPOINT_INTERVAL):
+        self.state_ids = state_ids
+        self.state_paths = state_paths
+        self.statemachines = statemachines  # State indices of the StateMachines, in slot order
+        self.event_names = event_names
+        self.checkpoint_interval = checkpoint_interval
+        for name, typecode in COLUMNS:
+            setattr(self, name, array(typecode))
+        self._leaves = array('i', [-1]) * len(statemachines)  # Configuration after the last step
+
+    @classmethod
+    def for_simulator(cls, simulator: Simulator) -> 'Trace':
+        """Empty trace using a simulator's compiled state and event numbering."""
+        compiled = simulator.compiled
+        statemachines = [i for i in range(len(compiled.states)) if compiled.statemachine[i] == i]
+        return cls([state.id for state in compiled.states],
+                   [state.path() for state in compiled.states],
+                   statemachines,
+                   list(compiled.event_names))
+
+    def __len__(self):
+        return len(self.events)
+
+    def append(self, event: int, transition: int, source: int, target: int, slot: int,
+               exits, entries):
+        """Record a step; the last entered state becomes the active leaf of its StateMachine."""
+        if len(self.events) % self.checkpoint_interval == 0:
+            self.checkpoint_offsets.append(len(self.states))
+            self.checkpoint_leaves.extend(self._leaves)
+        self.events.append(event)
+        self.transitions.append(transition)
+        self.sources.append(source)
+        self.targets.append(target)
+        self.slots.append(slot)
+        self.exit_counts.append(len(exits))
+        self.entry_counts.append(len(entries))
+        self.states.extend(exits)
+        self.states.extend(entries)
+        self._leaves[slot] = entries[-1]
+
+    def _seek(self, step: int) -> Tuple[array, int, int]:
+        """Nearest checkpoint at or before step: (leaves, first step, offset into states)."""
+        if not 0 <= step <= len(self):
+            raise IndexError(f"step {step} out of range 0..{len(self)}")
+        slot_count = len(self.statemachines)
+        checkpoint = min(step // self.checkpoint_interval, len(self.checkpoint_offsets) - 1)
+        if checkpoint < 0:
+            return array('i', [-1]) * slot_count, 0, 0
+        leaves = self.checkpoint_leaves[checkpoint * slot_count:(checkpoint + 1) * slot_count]
+        return leaves, checkpoint * self.checkpoint_interval, self.checkpoint_offsets[checkpoint]
+
+    def configuration(self, step: int) -> Dict[int, int]:
+        """Active leaf per StateMachine after the first step steps, as {StateMachine index: leaf index}."""
+        leaves, current, offset = self._seek(step)
+        slots = self.slots
+        states = self.states
+        exit_counts = self.exit_counts
+        entry_counts = self.entry_counts
+        while current < step:
+            offset += exit_counts[current] + entry_counts[current]
+            leaves[slots[current]] = states[offset - 1]
+            current += 1
+        return {self.statemachines[slot]: leaf for slot, leaf in enumerate(leaves) if leaf >= 0}
+
+    def steps(self, start: int = 0, stop: Optional[int] = None) -> Iterator[TraceStep]:
+        """Iterate over recorded steps start..stop-1."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return
+        _, current, offset = self._seek(start)
+        while current < start:
+            offset += self.exit_counts[current] + self.entry_counts[current]
+            current += 1
+        event_names = self.event_names
+        for current in range(start, stop):
+            exit_end = offset + self.exit_counts[current]
+            end = exit_end + self.entry_counts[current]
+            event = self.events[current]
+            yield TraceStep(current, event_names[event] if event >= 0 else None,
+                            self.transitions[current], self.sources[current], self.targets[current],
+                            tuple(self.states[offset:exit_end]), tuple(self.states[exit_end:end]))
+            offset = end
+
+    def step(self, sequence: int) -> TraceStep:
+        """A single recorded step."""
+        for step in self.steps(sequence, sequence + 1):
+            return step
+        raise IndexError(f"step {sequence} out of range 0..{len(self) - 1}")
+
+    def replay(self, observer: SimulatorObserver, model: DesignModel, start: int = 0,
+               stop: Optional[int] = None):
+        """Report steps start..stop-1 to observer exactly as the recording simulator did.
+
+        Nodes are looked up in model by state ID; the transitions by index.
+        """
+        nodes = [model.nodes.get(state_id) for state_id in self.state_ids]
+        leaves = self.configuration(start)
+        slot_statemachine = self.statemachines
+        for step in self.steps(start, stop):
+            statemachine = slot_statemachine[self.slots[step.sequence]]
+            transition = model.transitions[step.transition] if step.transition >= 0 else None
+            for state in step.exits:
+                observer.state_exited(nodes[state])
+            observer.transition_fired(transition)
+            for state in step.entries:
+                observer.state_entered(nodes[state])
+            old_leaf = leaves.get(statemachine)
+            leaves[statemachine] = step.entries[-1]
+            observer.active_state_changed(nodes[statemachine],
+                                          nodes[old_leaf] if old_leaf is not None else None,
+                                          nodes[step.entries[-1]])
+        observer.run_completed()
+
+    def save(self, file_path: str):
+        header = {
+            'version': 1,
+            'byteorder': sys.byteorder,
+            'steps': len(self),
+            'checkpoint_interval': self.checkpoint_interval,
+            'state_ids': self.state_ids,
+            'state_paths': self.state_paths,
+            'statemachines': self.statemachines,
+            'event_names': self.event_names,
+        }
+        encoded = json.dumps(header).encode('utf-8')
+        with open(file_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(encoded)))
+            f.write(encoded)
+            for name, _ in COLUMNS:
+                column = getattr(self, name)
+                f.write(struct.pack('<Q', len(column)))
+                column.tofile(f)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'Trace':
+        with open(file_path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"'{file_path}' is not a simulation trace")
+            (length,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(length).decode('utf-8'))
+            trace = cls(header['state_ids'], header['state_paths'], header['statemachines'],
+                        header['event_names'], header['checkpoint_interval'])
+            for name, typecode in COLUMNS:
+                (count,) = struct.unpack('<Q', f.read(8))
+                column = array(typecode)
+                column.fromfile(f, count)
+                if header['byteorder'] != sys.byteorder:
+                    column.byteswap()
+                setattr(trace, name, column)
+        if len(trace) != header['steps']:
+            raise ValueError(f"'{file_path}' is truncated")
+        trace._leaves = array('i', [-1]) * len(trace.statemachines)
+        for statemachine, leaf in trace.configuration(len(trace)).items():
+            trace._leaves[trace.statemachines.index(statemachine)] = leaf
+        return trace
+
+
+class TraceRecorder(SimulatorObserver):
+    """Records every step of a simulator into a Trace; attach before start()."""
+
+    def __init__(self, simulator: Simulator, trace: Optional[Trace] = None):
+        self.simulator = simulator
+        self.trace = trace if trace is not None else Trace.for_simulator(simulator)
+        compiled = simulator.compiled
+        self._index = compiled.index
+        self._event_ids = compiled.event_ids
+        self._slots = {statemachine: slot for slot, statemachine in enumerate(self.trace.statemachines)}
+        self._exits = []
+        self._entries = []
+        self._transition = None
+        simulator.add_observer(self)
+
+    def state_exited(self, state):
+        self._exits.append(self._index[state])
+
+    def transition_fired(self, transition):
+        self._transition = transition
+
+    def state_entered(self, state):
+        self._entries.append(self._index[state])
+
+    def active_state_changed(self, statemachine, old_leaf, new_leaf):
+        index = self._index
+        transition = self._transition
+        statemachine_index = index[statemachine]
+        if transition is None:
+            self.trace.append(-1, -1, -1, statemachine_index, self._slots[statemachine_index],
+                              self._exits, self._entries)
+        else:
+            self.trace.append(self._event_ids[transition.title], transition.index,
+                              index[transition.source], index[transition.target],
+                              self._slots[statemachine_index], self._exits, self._entries)
+        self._exits = []
+        self._entries = []
+        self._transition = None